@@ -1,7 +1,8 @@
-from .snmp_task import filter_hosts, task
+from .snmp_task import filter_hosts, render_hosts, task
 # exproted functions
 
 __all__ = [
     "filter_hosts",
+    "render_hosts",
     "task",
 ]
@@ -57,10 +57,14 @@ def test_get_snmp_vars_from_host_with_access_list():
     ip2 = ipaddress.ip_network("10.0.0.0/8")
     ip3 = ipaddress.ip_network("172.16.10.5/32")
 
+    # collapsed entries come out sorted by address
     expected_acl_networks = [
-        {"network": str(ip1.network_address), "wildcard": str(ip1.hostmask)},
-        {"network": str(ip2.network_address), "wildcard": str(ip2.hostmask)},
-        {"network": str(ip3.network_address), "wildcard": str(ip3.hostmask)},
+        {
+            "network": str(ip.network_address),
+            "wildcard": str(ip.hostmask),
+            "prefix": str(ip),
+        }
+        for ip in (ip2, ip3, ip1)
     ]
 
     # The result should contain original keys plus the processed ACL list
@@ -78,6 +82,29 @@ def test_get_snmp_vars_from_host_with_access_list():
     assert result_vars == expected_vars
     assert "_snmp_acl_allow_networks" in result_vars
     assert result_vars["_snmp_acl_allow_networks"] == expected_acl_networks
+    # the inventory data is not modified
+    assert "_snmp_acl_allow_networks" not in host_data["baseline_snmp"]
+
+
+def test_get_snmp_vars_from_host_collapses_access_list():
+    """Overlapping and adjacent prefixes are merged into the fewest entries."""
+    host_data = {
+        "baseline_snmp": {
+            "snmp_access_list": [
+                "10.0.1.0/24",
+                "10.0.0.0/24",
+                "10.0.0.128/25",
+                "2001:db8::/33",
+                "2001:db8:8000::/33",
+            ],
+        }
+    }
+    result_vars = get_snmp_vars_from_host(MockHost(host_data))
+    assert [entry["prefix"] for entry in result_vars["_snmp_acl_allow_networks"]] == [
+        "10.0.0.0/23",
+        "2001:db8::/32",
+    ]
+    assert result_vars["_snmp_acl_allow_networks"][0]["wildcard"] == "0.0.1.255"
 
 
 def test_get_snmp_vars_from_host_empty_access_list():
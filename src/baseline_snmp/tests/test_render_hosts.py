@@ -0,0 +1,58 @@
+from unittest import mock
+
+from ..snmp_task import baseline, render_hosts
+
+snmp_vars = {
+    "location": "DC1",
+    "contact": "netadmin@example.com",
+    "v2c": {"ro_community": "public"},
+    "snmp_access_list": ["10.0.0.0/24"],
+}
+
+
+class MockHost:
+    def __init__(self, name, platform, data):
+        self.name = name
+        self.platform = platform
+        self._data = data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+
+def make_hosts():
+    return [
+        MockHost("rtr-1", "ios", {"baseline_snmp": dict(snmp_vars)}),
+        MockHost("rtr-2", "ios", {"baseline_snmp": dict(snmp_vars)}),
+        MockHost("n9k-1", "nxos_ssh", {"baseline_snmp": dict(snmp_vars)}),
+        MockHost("rtr-3", "ios", {"baseline_snmp": {**snmp_vars, "location": "DC2"}}),
+    ]
+
+
+def test_render_hosts_renders_each_combination_once():
+    with mock.patch.object(baseline, "render", wraps=baseline.render) as generate:
+        rendered = render_hosts(make_hosts())
+
+    assert generate.call_count == 3
+    assert rendered["rtr-1"] == rendered["rtr-2"]
+    assert "snmp-server location DC2" in rendered["rtr-3"]
+    assert "  permit ip 10.0.0.0/24 any" in rendered["n9k-1"]
+
+
+def test_render_hosts_skips_unsupported_platform():
+    hosts = make_hosts() + [MockHost("sw-1", "junos", {"baseline_snmp": snmp_vars})]
+    rendered = render_hosts(hosts)
+    assert "sw-1" not in rendered
+    assert "rtr-1" in rendered
+
+
+def test_render_for_host_is_memoized():
+    baseline._render_cache.clear()
+    hosts = make_hosts()
+    with mock.patch.object(baseline, "render", wraps=baseline.render) as generate:
+        first = baseline.render_for_host(hosts[0])
+        second = baseline.render_for_host(hosts[1])
+
+    assert generate.call_count == 1
+    assert first == second
+    assert first is not second
@@ -1,4 +1,27 @@
 from .sanitize_config import sanitize_config
 from .filter_config import filter_config
+from .replace_hostname import replace_config_hostname
+from .config_tree import (
+    ConfigNode,
+    extract_sections,
+    hierarchical_delta,
+    negate_line,
+    parse_config_tree,
+    replace_sections,
+    section_delta,
+    select_sections,
+)
 
-__all__ = ["sanitize_config", "filter_config"]
+__all__ = [
+    "sanitize_config",
+    "filter_config",
+    "replace_config_hostname",
+    "ConfigNode",
+    "extract_sections",
+    "hierarchical_delta",
+    "negate_line",
+    "parse_config_tree",
+    "replace_sections",
+    "section_delta",
+    "select_sections",
+]
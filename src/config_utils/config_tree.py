@@ -0,0 +1,318 @@
+import re
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class ConfigNode:
+    """
+    One configuration line and the lines indented below it.
+    """
+
+    def __init__(self, line: str, indent: int = -1):
+        self.line = line
+        self.indent = indent
+        self.children: List["ConfigNode"] = []
+
+    def to_lines(self, depth: int = 0) -> List[str]:
+        """
+        Render the node and its children, indented by one space per level
+        """
+        lines = [" " * depth + self.line]
+        for child in self.children:
+            lines.extend(child.to_lines(depth + 1))
+        return lines
+
+    def __repr__(self):
+        return f"ConfigNode({self.line!r}, children={len(self.children)})"
+
+
+def is_config_comment(stripped_line: str) -> bool:
+    # '!' separates sections on Cisco, '#' on Comware
+    return stripped_line.startswith("!") or stripped_line.startswith("#")
+
+
+# a banner whose text spans several lines, up to the closing delimiter
+banner_start_regex = re.compile(r"^banner\s+\S+\s+(\^C|\S)(.*)$")
+
+
+def parse_config_tree(config_lines: List[str]) -> ConfigNode:
+    """
+    Parse configuration lines into a tree based on their indentation.
+    Empty lines and comment/separator lines are dropped. The text lines of
+    a multi-line banner are kept as the children of the banner line.
+
+    Returns:
+        A root node (with an empty line) whose children are the top level
+        configuration lines
+    """
+    root = ConfigNode("")
+    stack = [root]
+    banner: Optional[ConfigNode] = None
+    banner_delimiter = ""
+
+    for original_line in config_lines:
+        original_line = original_line.rstrip("\r\n")
+        if banner is not None:
+            # the text isn't configuration, whatever its indentation
+            banner.children.append(ConfigNode(original_line, banner.indent + 1))
+            if banner_delimiter in original_line:
+                banner = None
+            continue
+
+        stripped_line = original_line.strip()
+        if not stripped_line or is_config_comment(stripped_line):
+            continue
+
+        indent = len(original_line) - len(original_line.lstrip(" \t"))
+        while len(stack) > 1 and stack[-1].indent >= indent:
+            stack.pop()
+
+        node = ConfigNode(stripped_line, indent)
+        stack[-1].children.append(node)
+        stack.append(node)
+
+        match = banner_start_regex.match(stripped_line)
+        if match and match.group(1) not in match.group(2):
+            banner, banner_delimiter = node, match.group(1)
+
+    return root
+
+
+def select_sections(root: ConfigNode, selectors: List[str]) -> List[ConfigNode]:
+    """
+    Return the top level nodes whose line matches any of the regex selectors
+    """
+    patterns = [re.compile(selector) for selector in selectors]
+    return [
+        node
+        for node in root.children
+        if any(pattern.search(node.line) for pattern in patterns)
+    ]
+
+
+def _collapse_whitespace(line: str) -> str:
+    return " ".join(line.split())
+
+
+def _node_signature(
+    node: ConfigNode, normalize: Callable[[str], str]
+) -> Tuple[str, tuple]:
+    return (
+        normalize(node.line),
+        tuple(sorted(_node_signature(child, normalize) for child in node.children)),
+    )
+
+
+def negate_line(line: str) -> str:
+    """
+    The command undoing a configuration line: ``no X`` for ``X``, and ``X``
+    for ``no X`` (a removed ``no shutdown`` is undone by ``shutdown``)
+    """
+    if line.startswith("no "):
+        return line[3:].lstrip()
+    return f"no {line}"
+
+
+def section_delta(
+    current: List[ConfigNode],
+    desired: List[ConfigNode],
+    normalize: Optional[Callable[[str], str]] = None,
+) -> List[str]:
+    """
+    Commands turning the ``current`` sections into the ``desired`` ones.
+
+    Single lines are added or negated one by one. A block whose children
+    differ is replaced as a whole (negated, then sent again with all its
+    children), since entries of blocks such as ACLs can't always be negated
+    by their text. Lines are compared after ``normalize``.
+
+    Returns:
+        The commands to send, empty when the sections already match
+    """
+    normalize = normalize or _collapse_whitespace
+    current_by_line = {normalize(node.line): node for node in current}
+    desired_by_line = {normalize(node.line): node for node in desired}
+
+    removals = []
+    additions = []
+
+    for key, node in current_by_line.items():
+        # "no X" replaced by "X" only needs the added line
+        if key not in desired_by_line and (
+            normalize(negate_line(node.line)) not in desired_by_line
+        ):
+            removals.append(negate_line(node.line))
+
+    for key, node in desired_by_line.items():
+        current_node = current_by_line.get(key)
+        if current_node is None:
+            additions.extend(node.to_lines())
+        elif _node_signature(current_node, normalize) != _node_signature(
+            node, normalize
+        ):
+            if current_node.children:
+                removals.append(negate_line(current_node.line))
+            additions.extend(node.to_lines())
+
+    return removals + additions
+
+
+def _children_by_line(
+    node: ConfigNode, normalize: Callable[[str], str]
+) -> Dict[str, ConfigNode]:
+    children = {}
+    for child in node.children:
+        key = normalize(child.line)
+        if key in children:
+            # without a unique key the delta can't tell which line changed
+            raise ValueError(f"Duplicate configuration line: {child.line}")
+        children[key] = child
+    return children
+
+
+def hierarchical_delta(
+    current: ConfigNode,
+    desired: ConfigNode,
+    normalize: Optional[Callable[[str], str]] = None,
+    replace_blocks: Optional[List[str]] = None,
+    depth: int = 0,
+) -> List[str]:
+    """
+    Commands turning the whole ``current`` configuration tree into the
+    ``desired`` one, descending into changed blocks.
+
+    Inside a changed block, the block line is sent followed by the negated
+    and the added child lines (indented like the configuration). Blocks whose
+    line matches one of the ``replace_blocks`` regexes, typically ordered
+    ones such as ACLs, are negated and sent again as a whole.
+
+    Raises:
+        ValueError: when sibling lines aren't unique
+    """
+    normalize = normalize or _collapse_whitespace
+    replace_patterns = [re.compile(pattern) for pattern in replace_blocks or []]
+    indent = " " * depth
+
+    current_by_line = _children_by_line(current, normalize)
+    desired_by_line = _children_by_line(desired, normalize)
+
+    removals = []
+    additions = []
+
+    for key, node in current_by_line.items():
+        if key not in desired_by_line and (
+            normalize(negate_line(node.line)) not in desired_by_line
+        ):
+            removals.append(indent + negate_line(node.line))
+
+    for key, node in desired_by_line.items():
+        current_node = current_by_line.get(key)
+        if current_node is None:
+            additions.extend(node.to_lines(depth))
+            continue
+        if _node_signature(current_node, normalize) == _node_signature(node, normalize):
+            continue
+
+        if any(pattern.search(node.line) for pattern in replace_patterns):
+            removals.append(indent + negate_line(current_node.line))
+            additions.extend(node.to_lines(depth))
+        else:
+            additions.append(f"{indent}{node.line}")
+            additions.extend(
+                hierarchical_delta(
+                    current_node, node, normalize, replace_blocks, depth + 1
+                )
+            )
+
+    return removals + additions
+
+
+def _top_level_blocks(config_lines: List[str]) -> List[Tuple[int, int]]:
+    """
+    (start, end) indexes of the top level lines and the indented lines
+    directly below them, comment and empty lines excluded
+    """
+    blocks = []
+    index = 0
+    while index < len(config_lines):
+        line = config_lines[index].rstrip("\r\n")
+        if not line.strip() or line[0] in " \t" or is_config_comment(line):
+            index += 1
+            continue
+
+        end = index + 1
+        while end < len(config_lines):
+            child = config_lines[end].rstrip("\r\n")
+            if not child.strip() or child[0] not in " \t":
+                break
+            end += 1
+        blocks.append((index, end))
+        index = end
+    return blocks
+
+
+def extract_sections(config_lines: List[str], selectors: List[str]) -> List[str]:
+    """
+    The raw lines of the top level blocks matching any of the regex
+    selectors, as they appear in the configuration
+    """
+    patterns = [re.compile(selector) for selector in selectors]
+    lines = []
+    for start, end in _top_level_blocks(config_lines):
+        if any(pattern.search(config_lines[start].strip()) for pattern in patterns):
+            lines.extend(config_lines[start:end])
+    return lines
+
+
+def replace_sections(
+    config_lines: List[str], selectors: List[str], section_lines: List[str]
+) -> List[str]:
+    """
+    Replace the top level blocks matching any of the regex selectors with
+    the blocks of ``section_lines``, leaving every other line untouched.
+
+    A new block whose line matches an existing block takes its place; the
+    others follow the new block before them (as the device orders them), or
+    go before the first matching block. Without any matching block they go
+    before the final ``end`` (or at the end).
+    """
+    patterns = [re.compile(selector) for selector in selectors]
+    selected = [
+        (start, end)
+        for start, end in _top_level_blocks(config_lines)
+        if any(pattern.search(config_lines[start].strip()) for pattern in patterns)
+    ]
+    existing: Dict[str, Tuple[int, int]] = {}
+    for start, end in selected:
+        existing.setdefault(_collapse_whitespace(config_lines[start]), (start, end))
+
+    # config line index -> new lines going before it
+    inserts: Dict[int, List[str]] = {}
+    leading = []
+    insert_at = None
+    for start, end in _top_level_blocks(section_lines):
+        block = section_lines[start:end]
+        found = existing.pop(_collapse_whitespace(block[0]), None)
+        if found is not None:
+            inserts.setdefault(found[0], []).extend(block)
+            insert_at = found[1]
+        elif insert_at is None:
+            leading.extend(block)
+        else:
+            inserts.setdefault(insert_at, []).extend(block)
+
+    if selected:
+        insert_at = selected[0][0]
+    elif config_lines and config_lines[-1].strip() == "end":
+        insert_at = len(config_lines) - 1
+    else:
+        insert_at = len(config_lines)
+    inserts[insert_at] = leading + inserts.get(insert_at, [])
+
+    removed = {index for start, end in selected for index in range(start, end)}
+    new_lines = []
+    for index, line in enumerate(config_lines):
+        new_lines.extend(inserts.get(index, []))
+        if index not in removed:
+            new_lines.append(line)
+    new_lines.extend(inserts.get(len(config_lines), []))
+    return new_lines
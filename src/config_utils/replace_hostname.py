@@ -0,0 +1,45 @@
+import re
+from typing import List
+
+COMWARE_PLATFORMS = ["hpe_comware", "hp_comware", "hpe", "comware"]
+
+hostname_line_re = re.compile(r"^(\s*)hostname\s+\S+\s*$")
+sysname_line_re = re.compile(r"^(\s*)sysname\s+\S+\s*$")
+nxos_vdc_line_re = re.compile(r"^(\s*)vdc\s+\S+\s+id\s+1\s*$")
+
+
+def replace_config_hostname(
+    platform: str, config_lines: List[str], new_hostname: str
+) -> List[str]:
+    """
+    Rewrite the hostname (or sysname) line of a configuration.
+
+    Args:
+        platform: Nornir platform of the device ('ios', 'nxos_ssh', 'hpe_comware', ...)
+        config_lines: List of configuration lines (without line endings)
+        new_hostname: Hostname to write into the configuration
+
+    Returns:
+        A new list of configuration lines, line for line with the input, where
+        only the hostname related lines are changed
+    """
+    if platform in COMWARE_PLATFORMS:
+        patterns = [(sysname_line_re, "sysname {}")]
+    elif platform in ["nxos", "nxos_ssh"]:
+        patterns = [
+            (hostname_line_re, "hostname {}"),
+            (nxos_vdc_line_re, "vdc {} id 1"),
+        ]
+    else:
+        patterns = [(hostname_line_re, "hostname {}")]
+
+    replaced_lines = []
+    for line in config_lines:
+        for pattern, replacement in patterns:
+            match = pattern.match(line)
+            if match:
+                line = match.group(1) + replacement.format(new_hostname)
+                break
+        replaced_lines.append(line)
+
+    return replaced_lines
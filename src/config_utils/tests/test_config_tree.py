@@ -0,0 +1,277 @@
+import pytest
+
+from config_utils.config_tree import (
+    extract_sections,
+    hierarchical_delta,
+    negate_line,
+    parse_config_tree,
+    replace_sections,
+    section_delta,
+    select_sections,
+)
+
+running_config = """!
+hostname rtr-1
+!
+snmp-server location DC1
+snmp-server community public ro snmp_acl
+!
+ip access-list standard snmp_acl
+ permit 10.0.0.0 0.0.0.255
+ permit 192.168.0.0 0.0.255.255
+!
+interface Loopback0
+ ip address 10.255.0.1 255.255.255.255
+!
+end
+""".splitlines()
+
+selectors = [r"^snmp-server ", r"^ip access-list standard snmp_acl$"]
+
+
+class TestParseConfigTree:
+    """Test indentation based config parsing"""
+
+    def test_parse_nested_blocks(self):
+        root = parse_config_tree(running_config)
+        lines = [node.line for node in root.children]
+        assert lines == [
+            "hostname rtr-1",
+            "snmp-server location DC1",
+            "snmp-server community public ro snmp_acl",
+            "ip access-list standard snmp_acl",
+            "interface Loopback0",
+            "end",
+        ]
+        acl = root.children[3]
+        assert [child.line for child in acl.children] == [
+            "permit 10.0.0.0 0.0.0.255",
+            "permit 192.168.0.0 0.0.255.255",
+        ]
+
+    def test_select_sections(self):
+        root = parse_config_tree(running_config)
+        sections = select_sections(root, selectors)
+        assert [node.line for node in sections] == [
+            "snmp-server location DC1",
+            "snmp-server community public ro snmp_acl",
+            "ip access-list standard snmp_acl",
+        ]
+
+
+class TestSectionDelta:
+    """Test the commands computed between two sets of sections"""
+
+    def current(self):
+        return select_sections(parse_config_tree(running_config), selectors)
+
+    def test_no_delta_when_equal(self):
+        desired = parse_config_tree(
+            [
+                "snmp-server location  DC1",
+                "snmp-server community public ro snmp_acl",
+                "ip access-list standard snmp_acl",
+                "  permit 192.168.0.0 0.0.255.255",
+                "  permit 10.0.0.0 0.0.0.255",
+            ]
+        ).children
+        assert section_delta(self.current(), desired) == []
+
+    def test_single_lines_added_and_negated(self):
+        desired = parse_config_tree(
+            [
+                "snmp-server location DC2",
+                "snmp-server community public ro snmp_acl",
+                "ip access-list standard snmp_acl",
+                "  permit 10.0.0.0 0.0.0.255",
+                "  permit 192.168.0.0 0.0.255.255",
+            ]
+        ).children
+        assert section_delta(self.current(), desired) == [
+            "no snmp-server location DC1",
+            "snmp-server location DC2",
+        ]
+
+    def test_changed_block_is_replaced(self):
+        desired = parse_config_tree(
+            [
+                "snmp-server location DC1",
+                "snmp-server community public ro snmp_acl",
+                "ip access-list standard snmp_acl",
+                "  permit 10.0.0.0 0.0.0.255",
+            ]
+        ).children
+        assert section_delta(self.current(), desired) == [
+            "no ip access-list standard snmp_acl",
+            "ip access-list standard snmp_acl",
+            " permit 10.0.0.0 0.0.0.255",
+        ]
+
+    def test_removed_negation_is_undone(self):
+        current = parse_config_tree(
+            ["snmp-server location DC1", "no snmp-server enable traps"]
+        ).children
+        desired = parse_config_tree(["snmp-server location DC1"]).children
+        assert section_delta(current, desired) == ["snmp-server enable traps"]
+
+        desired = parse_config_tree(
+            ["snmp-server location DC1", "snmp-server enable traps"]
+        ).children
+        assert section_delta(current, desired) == ["snmp-server enable traps"]
+
+
+def test_multi_line_banner_text_belongs_to_the_banner():
+    root = parse_config_tree(
+        [
+            "hostname rtr-1",
+            "banner motd ^C",
+            "Authorized only",
+            "!",
+            "^C",
+            "ntp server 10.0.0.1",
+        ]
+    )
+    assert [node.line for node in root.children] == [
+        "hostname rtr-1",
+        "banner motd ^C",
+        "ntp server 10.0.0.1",
+    ]
+    assert [node.line for node in root.children[1].children] == [
+        "Authorized only",
+        "!",
+        "^C",
+    ]
+
+
+def test_negate_line():
+    assert negate_line("shutdown") == "no shutdown"
+    assert negate_line("no shutdown") == "shutdown"
+
+
+base_config = """hostname rtr-1
+!
+interface GigabitEthernet1
+ description uplink
+ ip address 10.0.0.1 255.255.255.0
+!
+interface GigabitEthernet2
+ shutdown
+!
+ip access-list extended mgmt
+ permit ip 10.0.0.0 0.0.0.255 any
+ deny ip any any
+!
+ntp server 10.0.0.10
+"""
+
+
+def test_hierarchical_delta_descends_into_changed_blocks():
+    new_config = base_config.replace("description uplink", "description core")
+    new_config = new_config.replace("ntp server 10.0.0.10", "ntp server 10.0.0.11")
+
+    assert hierarchical_delta(
+        parse_config_tree(base_config.splitlines()),
+        parse_config_tree(new_config.splitlines()),
+    ) == [
+        "no ntp server 10.0.0.10",
+        "interface GigabitEthernet1",
+        " no description uplink",
+        " description core",
+        "ntp server 10.0.0.11",
+    ]
+
+
+def test_hierarchical_delta_replaces_ordered_blocks():
+    new_config = base_config.replace(
+        " deny ip any any", " permit ip 10.1.0.0 0.0.0.255 any\n deny ip any any"
+    )
+
+    assert hierarchical_delta(
+        parse_config_tree(base_config.splitlines()),
+        parse_config_tree(new_config.splitlines()),
+        replace_blocks=[r"^ip access-list "],
+    ) == [
+        "no ip access-list extended mgmt",
+        "ip access-list extended mgmt",
+        " permit ip 10.0.0.0 0.0.0.255 any",
+        " permit ip 10.1.0.0 0.0.0.255 any",
+        " deny ip any any",
+    ]
+
+
+def test_hierarchical_delta_rejects_duplicate_lines():
+    with pytest.raises(ValueError):
+        hierarchical_delta(
+            parse_config_tree(["end-policy", "end-policy"]), parse_config_tree([])
+        )
+
+
+def test_extract_sections_keeps_raw_lines():
+    assert extract_sections(
+        running_config, [r"^ip access-list standard snmp_acl$"]
+    ) == [
+        "ip access-list standard snmp_acl",
+        " permit 10.0.0.0 0.0.0.255",
+        " permit 192.168.0.0 0.0.255.255",
+    ]
+
+
+def test_replace_sections_only_touches_selected_blocks():
+    new_section = ["snmp-server location DC2", "ip access-list standard snmp_acl"]
+    new_section.append("  permit 10.1.0.0 0.0.0.255")
+    replaced = replace_sections(
+        running_config,
+        [r"^snmp-server ", r"^ip access-list standard snmp_acl$"],
+        new_section,
+    )
+
+    lines = running_config
+    assert replaced[: lines.index("snmp-server location DC1")] == lines[:3]
+    assert "snmp-server location DC2" in replaced
+    assert "snmp-server location DC1" not in replaced
+    assert " permit 10.0.0.0 0.0.0.255" not in replaced
+    assert replaced[-3:] == lines[-3:]
+
+
+def test_replace_sections_inserts_missing_section_before_end():
+    replaced = replace_sections(
+        ["hostname rtr-1", "!", "end"], [r"^ntp "], ["ntp server 10.0.0.1"]
+    )
+    assert replaced == ["hostname rtr-1", "!", "ntp server 10.0.0.1", "end"]
+
+
+def test_replace_sections_keeps_the_place_of_each_block():
+    config = [
+        "hostname rtr-1",
+        "ntp server 10.0.0.1",
+        "!",
+        "interface Loopback0",
+        " ip address 10.255.0.1 255.255.255.255",
+        "!",
+        "ntp source Loopback0",
+        "!",
+        "end",
+    ]
+    replaced = replace_sections(
+        config,
+        [r"^ntp "],
+        ["ntp server 10.0.0.1", "ntp server 10.0.0.2", "ntp source Loopback0"],
+    )
+    assert replaced == [
+        "hostname rtr-1",
+        "ntp server 10.0.0.1",
+        "ntp server 10.0.0.2",
+        "!",
+        "interface Loopback0",
+        " ip address 10.255.0.1 255.255.255.255",
+        "!",
+        "ntp source Loopback0",
+        "!",
+        "end",
+    ]
+
+    replaced = replace_sections(
+        config, [r"^ntp "], ["ntp master 3", "ntp server 10.0.0.1"]
+    )
+    assert replaced[:3] == ["hostname rtr-1", "ntp master 3", "ntp server 10.0.0.1"]
+    assert "ntp source Loopback0" not in replaced
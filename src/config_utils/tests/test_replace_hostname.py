@@ -0,0 +1,34 @@
+from config_utils.replace_hostname import replace_config_hostname
+
+
+class TestReplaceConfigHostname:
+    """Test hostname rewrite of configuration lines"""
+
+    def test_replace_ios_hostname(self):
+        lines = ["!", "hostname old-rtr-1", "interface Loopback0"]
+        result = replace_config_hostname("ios", lines, "new-rtr-1")
+        assert result == ["!", "hostname new-rtr-1", "interface Loopback0"]
+
+    def test_replace_nxos_hostname_and_vdc(self):
+        lines = [
+            "hostname old-n9k",
+            "vdc old-n9k id 1",
+            "  limit-resource vlan minimum 16",
+        ]
+        result = replace_config_hostname("nxos_ssh", lines, "new-n9k")
+        assert result == [
+            "hostname new-n9k",
+            "vdc new-n9k id 1",
+            "  limit-resource vlan minimum 16",
+        ]
+
+    def test_replace_comware_sysname(self):
+        lines = ["#", " sysname old-sw", "#", "hostname not-a-comware-command"]
+        result = replace_config_hostname("hpe_comware", lines, "new-sw")
+        assert result == ["#", " sysname new-sw", "#", "hostname not-a-comware-command"]
+
+    def test_keeps_line_count(self):
+        lines = ["hostname a", "snmp-server contact hostname b", ""]
+        result = replace_config_hostname("ios", lines, "c")
+        assert len(result) == len(lines)
+        assert result[1] == "snmp-server contact hostname b"
@@ -0,0 +1,23 @@
+from .lab import build_lab, default_versions, generate_config
+from .napalm_driver import SimDriver
+from .netmiko_driver import SimNetmikoConnection, register_netmiko_driver
+from .profiles import PlatformProfile, get_profile, platform_profiles
+from .store import DeviceStore, SimDevice, get_store, merge_config
+from .testbed_api import TestbedApiServer
+
+__all__ = [
+    "build_lab",
+    "default_versions",
+    "generate_config",
+    "SimDriver",
+    "SimNetmikoConnection",
+    "register_netmiko_driver",
+    "PlatformProfile",
+    "get_profile",
+    "platform_profiles",
+    "DeviceStore",
+    "SimDevice",
+    "get_store",
+    "merge_config",
+    "TestbedApiServer",
+]
@@ -0,0 +1,137 @@
+import os
+from typing import Dict, List, Optional
+
+import yaml
+
+from .store import DeviceStore, get_store
+
+default_versions = {
+    "ios": "17.9.4",
+    "nxos_ssh": "9.3.8",
+    "iosxr": "7.9.2",
+}
+
+
+def _address(index: int, offset: int) -> str:
+    return f"10.{(index >> 8) & 0xFF}.{index & 0xFF}.{offset}"
+
+
+def generate_config(
+    hostname: str, platform: str, index: int, interfaces: int = 48
+) -> str:
+    """
+    A plausible config of ``platform`` with ``interfaces`` access ports,
+    different for every ``index``
+    """
+    lines = [f"hostname {hostname}"]
+    if platform == "nxos_ssh":
+        lines += [
+            "feature lacp",
+            "interface mgmt0",
+            "  vrf member management",
+            f"  ip address {_address(index, 10)}/24",
+            "vrf context management",
+            f"  ip route 0.0.0.0/0 {_address(index, 1)}",
+        ]
+        for port in range(1, interfaces + 1):
+            lines += [
+                f"interface Ethernet1/{port}",
+                f"  description access-{index}-{port}",
+                "  switchport access vlan 10",
+                "  no shutdown",
+            ]
+        lines += [
+            f"snmp-server location site-{index}",
+            "snmp-server contact noc@example.com",
+        ]
+    else:
+        indent = " "
+        prefix = (
+            "GigabitEthernet0/0/0/" if platform == "iosxr" else "GigabitEthernet1/0/"
+        )
+        for port in range(1, interfaces + 1):
+            lines += [
+                f"interface {prefix}{port}",
+                f"{indent}description access-{index}-{port}",
+                f"{indent}no shutdown",
+            ]
+        lines += [
+            f"snmp-server location site-{index}",
+            "snmp-server contact noc@example.com",
+            "line vty 0 4" if platform == "ios" else "line default",
+            f"{indent}transport input ssh",
+        ]
+    return "\n".join(lines) + "\n"
+
+
+def build_lab(
+    workdir: str,
+    devices: int,
+    platforms: List[str],
+    runner: Optional[Dict] = None,
+    interfaces: int = 48,
+    store: Optional[DeviceStore] = None,
+) -> List[str]:
+    """
+    Write a Nornir inventory, nornir.yaml and cfg/ of ``devices`` simulated
+    devices spread over ``platforms`` into ``workdir`` and add the devices to
+    the store. Their running config differs from cfg/ by the SNMP location,
+    so syncs and applies have a change to handle.
+
+    Returns the host names.
+    """
+    store = store if store is not None else get_store()
+    os.makedirs(os.path.join(workdir, "inventory"), exist_ok=True)
+    os.makedirs(os.path.join(workdir, "cfg"), exist_ok=True)
+
+    hosts = {}
+    for index in range(devices):
+        platform = platforms[index % len(platforms)]
+        name = f"sim-{platform.split('_')[0]}-{index:05d}"
+        version = default_versions.get(platform, "1.0")
+        hosts[name] = {
+            "hostname": name,
+            "groups": [platform],
+            "data": {"version": version},
+        }
+
+        config = generate_config(name, platform, index, interfaces)
+        with open(os.path.join(workdir, "cfg", f"{name}.cfg"), "w") as f:
+            f.write(config)
+        running = config.replace(
+            f"snmp-server location site-{index}\n",
+            f"snmp-server location old-site-{index}\n",
+        )
+        store.add(name, platform, running, version)
+
+    defaults = {
+        "username": "admin",
+        "password": "admin",
+        "connection_options": {
+            "napalm": {"platform": "sim"},
+            "netmiko": {"platform": "sim"},
+        },
+    }
+    nornir_config = {
+        "inventory": {
+            "plugin": "SimpleInventory",
+            "options": {
+                "host_file": "inventory/hosts.yaml",
+                "group_file": "inventory/groups.yaml",
+                "defaults_file": "inventory/defaults.yaml",
+            },
+        },
+        "runner": runner or {"plugin": "threaded", "options": {"num_workers": 100}},
+        "logging": {"enabled": False},
+    }
+    files = {
+        "inventory/hosts.yaml": hosts,
+        "inventory/groups.yaml": {p: {"platform": p} for p in platforms},
+        "inventory/defaults.yaml": defaults,
+        "nornir.yaml": nornir_config,
+    }
+    for path, content in files.items():
+        with open(os.path.join(workdir, path), "w") as f:
+            yaml.safe_dump(content, f, sort_keys=False)
+
+    return list(hosts)
@@ -0,0 +1,163 @@
+import difflib
+from typing import Dict, List, Optional
+
+from napalm.base import NetworkDriver
+from napalm.base.exceptions import (
+    ConnectionClosedException,
+    ConnectionException,
+    MergeConfigException,
+    ReplaceConfigException,
+)
+
+from .profiles import get_profile
+from .store import DeviceStore, get_store, merge_config
+
+
+class SimDriver(NetworkDriver):
+    """
+    NAPALM driver of a simulated device of the device store, taking the time
+    of its platform profile for each operation.
+
+    ``optional_args`` may override the profile (``login``, ``latency``,
+    ``bandwidth``, ``commit``).
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        username: str,
+        password: str,
+        timeout: int = 60,
+        optional_args: Optional[dict] = None,
+        store: Optional[DeviceStore] = None,
+    ):
+        self.hostname = hostname
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self.optional_args = optional_args or {}
+        self.store = store if store is not None else get_store()
+        self.device = None
+        self.profile = None
+        self._candidate: Optional[List[str]] = None
+
+    def open(self):
+        try:
+            self.device = self.store.get(self.hostname)
+        except KeyError as e:
+            raise ConnectionException(str(e))
+        self.profile = get_profile(self.device.platform, self.optional_args)
+        self.profile.connect()
+
+    def close(self):
+        self.device = None
+
+    def is_alive(self) -> Dict[str, bool]:
+        return {"is_alive": self.device is not None}
+
+    def _connected(self):
+        if self.device is None:
+            raise ConnectionClosedException(f"Not connected to {self.hostname}")
+        return self.device
+
+    def get_facts(self) -> dict:
+        device = self._connected()
+        self.profile.round_trip()
+        return {
+            "hostname": device.hostname,
+            "fqdn": device.hostname,
+            "vendor": "Simulated",
+            "model": device.platform,
+            "os_version": device.version,
+            "serial_number": device.hostname,
+            "uptime": 0.0,
+            "interface_list": [],
+        }
+
+    def get_config(
+        self,
+        retrieve: str = "all",
+        full: bool = False,
+        sanitized: bool = False,
+        format: str = "text",
+    ) -> Dict[str, str]:
+        device = self._connected()
+        config = {"running": "", "startup": "", "candidate": ""}
+        if retrieve in ("all", "running"):
+            config["running"] = device.running_config
+        if retrieve in ("all", "startup"):
+            config["startup"] = "\n".join(device.startup) + "\n"
+        if retrieve in ("all", "candidate") and self._candidate is not None:
+            config["candidate"] = "\n".join(self._candidate) + "\n"
+        self.profile.round_trip(sum(len(c) for c in config.values()))
+        return config
+
+    def _get_checkpoint_file(self) -> str:
+        # NX-OS driver method used to sync the config
+        return self.get_config(retrieve="running")["running"]
+
+    def cli(self, commands: List[str], encoding: str = "text") -> Dict[str, str]:
+        device = self._connected()
+        outputs = {}
+        for command in commands:
+            outputs[command] = device.run_command(command)
+            self.profile.round_trip(len(outputs[command]))
+        return outputs
+
+    def _read_candidate(self, filename: Optional[str], config: Optional[str]) -> str:
+        if filename:
+            with open(filename, "r") as f:
+                config = f.read()
+        if config is None:
+            raise ValueError("filename or config must be provided")
+        self.profile.round_trip(len(config))
+        return config
+
+    def load_replace_candidate(
+        self, filename: Optional[str] = None, config: Optional[str] = None
+    ):
+        self._connected()
+        try:
+            self._candidate = self._read_candidate(filename, config).splitlines()
+        except (OSError, ValueError) as e:
+            raise ReplaceConfigException(str(e))
+
+    def load_merge_candidate(
+        self, filename: Optional[str] = None, config: Optional[str] = None
+    ):
+        device = self._connected()
+        try:
+            commands = self._read_candidate(filename, config).splitlines()
+        except (OSError, ValueError) as e:
+            raise MergeConfigException(str(e))
+        base = self._candidate if self._candidate is not None else device.running
+        self._candidate = merge_config(base, commands)
+
+    def compare_config(self) -> str:
+        device = self._connected()
+        if self._candidate is None:
+            return ""
+        diff = "\n".join(
+            difflib.unified_diff(device.running, self._candidate, lineterm="", n=0)
+        )
+        self.profile.round_trip(len(diff))
+        return diff
+
+    def commit_config(self, message: str = "", revert_in: Optional[int] = None):
+        device = self._connected()
+        if self._candidate is None:
+            return
+        self.profile.apply()
+        device.replace(self._candidate)
+        device.save()
+        self._candidate = None
+
+    def discard_config(self):
+        self._candidate = None
+
+    def rollback(self):
+        device = self._connected()
+        if len(device.commits) < 2:
+            return
+        self.profile.apply()
+        device.replace(device.commits[-2])
@@ -0,0 +1,118 @@
+import importlib
+from typing import List, Optional, Union
+
+from netmiko import NetmikoTimeoutException
+
+from .profiles import get_profile
+from .store import DeviceStore, get_store
+
+device_type = "sim"
+
+
+class SimNetmikoConnection:
+    """
+    Netmiko connection to a simulated device of the device store, with the
+    methods the tasks and the testbed use.
+
+    The profile settings (``login``, ``latency``, ``bandwidth``, ``commit``)
+    may be given as connection extras.
+    """
+
+    def __init__(
+        self,
+        host: str = "",
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        store: Optional[DeviceStore] = None,
+        **kwargs,
+    ):
+        self.host = host
+        self.username = username
+        try:
+            self.device = (store if store is not None else get_store()).get(host)
+        except KeyError as e:
+            raise NetmikoTimeoutException(str(e))
+        self.profile = get_profile(self.device.platform, kwargs)
+        self.profile.connect()
+        self._config_mode = False
+
+    def find_prompt(self) -> str:
+        self.profile.round_trip()
+        return f"{self.device.hostname}{')#' if self._config_mode else '#'}"
+
+    def send_command(self, command_string: str, **kwargs) -> str:
+        output = self.device.run_command(command_string)
+        self.profile.round_trip(len(command_string) + len(output))
+        return output
+
+    def send_command_timing(self, command_string: str, **kwargs) -> str:
+        return self.send_command(command_string, **kwargs)
+
+    def check_config_mode(self, *args, **kwargs) -> bool:
+        return self._config_mode
+
+    def config_mode(self, *args, **kwargs) -> str:
+        self.profile.round_trip()
+        self._config_mode = True
+        return "configure terminal\n"
+
+    def exit_config_mode(self, *args, **kwargs) -> str:
+        self.profile.round_trip()
+        self._config_mode = False
+        return "end\n"
+
+    def send_config_set(
+        self,
+        config_commands: Union[str, List[str], None] = None,
+        exit_config_mode: bool = True,
+        enter_config_mode: bool = True,
+        cmd_verify: bool = True,
+        **kwargs,
+    ) -> str:
+        if isinstance(config_commands, str):
+            config_commands = config_commands.splitlines()
+        commands = list(config_commands or [])
+
+        output = ""
+        if enter_config_mode:
+            output += self.config_mode()
+        echo = "\n".join(commands) + "\n"
+        if cmd_verify:
+            # the echo of each line is read before the next one is sent
+            for command in commands:
+                self.profile.round_trip(len(command) * 2)
+        else:
+            self.profile.round_trip(len(echo) * 2)
+        self.device.merge(commands)
+        output += echo
+        if exit_config_mode:
+            output += self.exit_config_mode()
+        return output
+
+    def commit(self, *args, **kwargs) -> str:
+        self.profile.apply()
+        return "commit\n"
+
+    def save_config(self, *args, **kwargs) -> str:
+        self.profile.apply()
+        self.device.save()
+        return "[OK]\n"
+
+    def is_alive(self) -> bool:
+        return self.device is not None
+
+    def disconnect(self):
+        self.device = None
+
+
+def register_netmiko_driver():
+    """
+    Make ``sim`` a Netmiko device_type, so hosts whose netmiko connection
+    options set ``platform: sim`` connect to the simulated devices
+    """
+    # netmiko.ssh_dispatcher is shadowed by the function of the same name
+    ssh_dispatcher = importlib.import_module("netmiko.ssh_dispatcher")
+
+    ssh_dispatcher.CLASS_MAPPER[device_type] = SimNetmikoConnection
+    if device_type not in ssh_dispatcher.platforms:
+        ssh_dispatcher.platforms.append(device_type)
@@ -0,0 +1,69 @@
+import os
+import time
+from typing import Dict, Optional
+
+# multiplies every simulated delay, e.g. 0.01 to run a benchmark 100x faster
+time_scale = float(os.environ.get("DEVICE_SIM_TIME_SCALE", 1.0))
+
+
+class PlatformProfile:
+    """
+    Timing of a simulated platform: ``login`` seconds to open a session,
+    ``latency`` seconds per command round trip, ``bandwidth`` bytes per second
+    for config transfers and ``commit`` seconds to apply a config
+    """
+
+    def __init__(
+        self,
+        login: float = 1.0,
+        latency: float = 0.05,
+        bandwidth: float = 250_000,
+        commit: float = 2.0,
+    ):
+        self.login = login
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.commit = commit
+
+    def updated(self, overrides: Optional[dict]) -> "PlatformProfile":
+        settings = {
+            "login": self.login,
+            "latency": self.latency,
+            "bandwidth": self.bandwidth,
+            "commit": self.commit,
+        }
+        settings.update({k: v for k, v in (overrides or {}).items() if k in settings})
+        return PlatformProfile(**settings)
+
+    def _wait(self, seconds: float):
+        if seconds > 0 and time_scale > 0:
+            time.sleep(seconds * time_scale)
+
+    def connect(self):
+        self._wait(self.login)
+
+    def round_trip(self, size: int = 0):
+        """
+        One command and its output of ``size`` bytes
+        """
+        self._wait(self.latency + size / self.bandwidth)
+
+    def apply(self):
+        self._wait(self.commit)
+
+
+platform_profiles: Dict[str, PlatformProfile] = {
+    "ios": PlatformProfile(login=1.0, latency=0.05, bandwidth=200_000, commit=3.0),
+    "nxos_ssh": PlatformProfile(login=1.5, latency=0.08, bandwidth=400_000, commit=5.0),
+    "iosxr": PlatformProfile(login=2.0, latency=0.1, bandwidth=300_000, commit=4.0),
+}
+
+default_profile = PlatformProfile()
+
+
+def get_profile(platform: str, overrides: Optional[dict] = None) -> PlatformProfile:
+    """
+    The profile of ``platform``, with the settings in ``overrides`` (e.g. from
+    the connection options of a host) replaced
+    """
+    return platform_profiles.get(platform, default_profile).updated(overrides)
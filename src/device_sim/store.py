@@ -0,0 +1,247 @@
+import re
+import threading
+from typing import Dict, List, Optional
+
+from config_utils import extract_sections
+
+# `show running-config <keyword>` keywords not named after their top level lines
+section_keyword_regexes = {
+    "snmp": r"^snmp-server ",
+    "aclmgr": r"^(ip|ipv6) access-list ",
+}
+
+first_commit_id = 1000000001
+
+
+class SimDevice:
+    """
+    In-memory state of a simulated device: running and startup config,
+    checkpoint files and, like IOS-XR, the list of committed configs
+    """
+
+    def __init__(self, hostname: str, platform: str, config: str, version: str = ""):
+        self.hostname = hostname
+        self.platform = platform
+        self.version = version
+        self.lock = threading.Lock()
+        self.running: List[str] = config.splitlines()
+        self.startup: List[str] = list(self.running)
+        self.files: Dict[str, List[str]] = {}
+        self.commits: List[List[str]] = [list(self.running)]
+
+    @property
+    def running_config(self) -> str:
+        with self.lock:
+            return "\n".join(self.running) + "\n"
+
+    def replace(self, lines: List[str]):
+        with self.lock:
+            self._commit(lines)
+
+    def merge(self, lines: List[str]):
+        """
+        Enter config lines as on the CLI: a line of a block is added to the
+        block of the last top level line, ``no <line>`` removes the line if
+        it is configured
+        """
+        with self.lock:
+            self._commit(merge_config(self.running, lines))
+
+    def save(self):
+        with self.lock:
+            self.startup = list(self.running)
+
+    def _commit(self, lines: List[str]):
+        self.running = list(lines)
+        self.commits.append(list(lines))
+
+    def run_command(self, command: str) -> str:
+        """
+        Output of an exec mode command
+        """
+        command = command.strip()
+        with self.lock:
+            return self._run_command(command)
+
+    def _run_command(self, command: str) -> str:
+        match = re.match(r"^show running-config \| section (.+)$", command)
+        if match:
+            return _join(extract_sections(self.running, [match.group(1)]))
+
+        match = re.match(r"^show running-config (\S+)$", command)
+        if match:
+            keyword = match.group(1)
+            selector = section_keyword_regexes.get(keyword, rf"^{re.escape(keyword)}\b")
+            return _join(extract_sections(self.running, [selector]))
+
+        if command in ("show running-config", "show running-config all"):
+            return _join(self.running)
+
+        if command == "show version":
+            return f"{self.platform} software, Version {self.version}\n"
+
+        # NX-OS checkpoint
+        match = re.match(r"^(no )?checkpoint (\S+)$", command)
+        if match:
+            name = f"checkpoint:{match.group(2)}"
+            if match.group(1):
+                self.files.pop(name, None)
+            else:
+                self.files[name] = list(self.running)
+            return "Done\n"
+
+        match = re.match(r"^rollback running-config checkpoint (\S+)$", command)
+        if match:
+            return self._restore(f"checkpoint:{match.group(1)}")
+
+        # IOS-XE archive
+        match = re.match(r"^copy running-config (\S+)$", command)
+        if match:
+            self.files[match.group(1)] = list(self.running)
+            size = len(_join(self.running))
+            return f"{size} bytes copied in 0.1 secs\n"
+
+        match = re.match(r"^configure replace (\S+)( force)?$", command)
+        if match:
+            return self._restore(match.group(1))
+
+        # IOS-XR commit database
+        if command.startswith("show configuration commit list"):
+            lines = [
+                "SNo. Label/ID              User      Line     Client      Time Stamp",
+                "~~~~ ~~~~~~~~              ~~~~      ~~~~     ~~~~~~      ~~~~~~~~~~",
+            ]
+            for number, index in enumerate(reversed(range(len(self.commits)))):
+                commit_id = first_commit_id + index
+                lines.append(f"{number + 1:<4} {commit_id:<21} admin     vty0     CLI")
+            return _join(lines)
+
+        match = re.match(r"^rollback configuration to (\d+)$", command)
+        if match:
+            index = int(match.group(1)) - first_commit_id
+            if not 0 <= index < len(self.commits):
+                return f"% Commit {match.group(1)} not found\n"
+            self._commit(self.commits[index])
+            return "Configuration rolled back\n"
+
+        if command.startswith("show rollback log"):
+            return "Rollback log: no errors\n"
+
+        return ""
+
+    def _restore(self, name: str) -> str:
+        if name not in self.files:
+            return f"% {name} not found\n"
+        self._commit(self.files[name])
+        return "Rollback Done\n"
+
+
+def _join(lines: List[str]) -> str:
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _block_end(lines: List[str], start: int) -> int:
+    end = start + 1
+    while end < len(lines) and lines[end][:1] in (" ", "\t"):
+        end += 1
+    return end
+
+
+def merge_config(running: List[str], commands: List[str]) -> List[str]:
+    lines = list(running)
+    parent: Optional[str] = None
+    for command in commands:
+        if not command.strip() or command.strip() in ("end", "exit", "commit"):
+            continue
+
+        nested = command[:1] in (" ", "\t")
+        negated = command.strip().startswith("no ")
+        target = command.strip()[3:] if negated else command.strip()
+
+        if not nested:
+            start = next(
+                (i for i, line in enumerate(lines) if line.strip() == target),
+                None,
+            )
+            if negated:
+                if start is not None:
+                    del lines[start : _block_end(lines, start)]
+                parent = None
+            else:
+                if start is None:
+                    lines.append(command)
+                parent = target
+            continue
+
+        # a line of the block of ``parent``
+        start = next(
+            (i for i, line in enumerate(lines) if line.strip() == parent), None
+        )
+        if start is None:
+            continue
+        end = _block_end(lines, start)
+        existing = next(
+            (i for i in range(start + 1, end) if lines[i].strip() == target),
+            None,
+        )
+        if negated:
+            if existing is not None:
+                del lines[existing]
+                continue
+            # e.g. "no shutdown", shown as is in the running config
+            target = command.strip()
+            existing = next(
+                (i for i in range(start + 1, end) if lines[i].strip() == target),
+                None,
+            )
+        if existing is None:
+            lines.insert(end, command)
+    return lines
+
+
+class DeviceStore:
+    """
+    Simulated devices by the hostname connections use to reach them, shared
+    by every simulated NAPALM and Netmiko connection of the process
+    """
+
+    def __init__(self):
+        self._devices: Dict[str, SimDevice] = {}
+        self._lock = threading.Lock()
+
+    def add(
+        self, hostname: str, platform: str, config: str, version: str = ""
+    ) -> SimDevice:
+        device = SimDevice(hostname, platform, config, version)
+        with self._lock:
+            self._devices[hostname] = device
+        return device
+
+    def get(self, hostname: str) -> SimDevice:
+        with self._lock:
+            if hostname not in self._devices:
+                raise KeyError(f"No simulated device at {hostname}")
+            return self._devices[hostname]
+
+    def remove(self, hostname: str):
+        with self._lock:
+            self._devices.pop(hostname, None)
+
+    def clear(self):
+        with self._lock:
+            self._devices = {}
+
+    def __contains__(self, hostname: str) -> bool:
+        with self._lock:
+            return hostname in self._devices
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._devices)
+
+
+default_store = DeviceStore()
+
+
+def get_store() -> DeviceStore:
+    return default_store
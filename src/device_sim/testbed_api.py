@@ -0,0 +1,157 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from .store import DeviceStore, get_store
+
+
+class _TestbedApiHandler(BaseHTTPRequestHandler):
+    server: "_TestbedHttpServer"
+
+    def log_message(self, format, *args):
+        # one line per request would flood a benchmark
+        pass
+
+    def _reply(self, status: int, body: dict):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _authorized(self) -> bool:
+        token = self.server.api.token
+        if token and self.headers.get("Authorization") != f"Bearer {token}":
+            self._reply(401, {"error": "Unauthorized"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        if self.path.rstrip("/") == "/machines":
+            self._reply(200, {"machines": self.server.api.list_machines()})
+        else:
+            self._reply(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        api = self.server.api
+
+        match = re.match(r"^/reserve/([^/]+)/([^/]+)/([^/]+)/?$", self.path)
+        if match:
+            machine = api.reserve(*match.groups())
+            if machine is None:
+                self._reply(409, {"error": "No machine available"})
+            else:
+                self._reply(200, machine)
+            return
+
+        match = re.match(r"^/release/([^/]+)/?$", self.path)
+        if match:
+            if api.release(match.group(1)):
+                self._reply(200, {"released": match.group(1)})
+            else:
+                self._reply(404, {"error": "Unknown or not reserved machine"})
+            return
+
+        self._reply(404, {"error": "Not found"})
+
+
+class _TestbedHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, api: "TestbedApiServer"):
+        super().__init__(address, _TestbedApiHandler)
+        self.api = api
+
+
+class TestbedApiServer:
+    """
+    Local stand-in of the testbed inventory API (``/machines``,
+    ``/reserve/<vendor>/<model>/<version>``, ``/release/<serial>``).
+
+    Each machine is a dict with ``serial``, ``vendor``, ``model``,
+    ``version``, ``platform``, ``hostname``, ``mgmt_ip``, ``netmask`` and
+    ``default_gateway``. A reserved machine is added to the device store at
+    its ``mgmt_ip`` with an empty config, so the simulated drivers reach it.
+    """
+
+    def __init__(
+        self,
+        machines: List[dict],
+        token: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        store: Optional[DeviceStore] = None,
+    ):
+        self.machines: Dict[str, dict] = {
+            m["serial"]: dict(m, status=m.get("status", "available")) for m in machines
+        }
+        self.token = token
+        self.store = store if store is not None else get_store()
+        self._lock = threading.Lock()
+        self._server = _TestbedHttpServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def list_machines(self) -> List[dict]:
+        with self._lock:
+            return [dict(m) for m in self.machines.values()]
+
+    def reserve(self, vendor: str, model: str, version: str) -> Optional[dict]:
+        with self._lock:
+            for machine in self.machines.values():
+                if (
+                    machine["status"] == "available"
+                    and machine["vendor"] == vendor
+                    and machine["model"] == model
+                    and machine["version"] == version
+                ):
+                    machine["status"] = "reserved"
+                    break
+            else:
+                return None
+        self.store.add(
+            machine["mgmt_ip"],
+            machine.get("platform", model),
+            f"hostname {machine['hostname']}\n",
+            version,
+        )
+        return dict(machine, ip=machine["mgmt_ip"])
+
+    def release(self, serial: str) -> bool:
+        with self._lock:
+            machine = self.machines.get(serial)
+            if machine is None or machine["status"] != "reserved":
+                return False
+            machine["status"] = "available"
+        self.store.remove(machine["mgmt_ip"])
+        return True
+
+    def start(self) -> "TestbedApiServer":
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="testbed-api", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> "TestbedApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,79 @@
+import pytest
+from napalm import get_network_driver
+from napalm.base.exceptions import ConnectionException
+from netmiko import ConnectHandler
+
+from .. import profiles
+from ..netmiko_driver import register_netmiko_driver
+from ..store import DeviceStore, get_store
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setattr(profiles, "time_scale", 0)
+    store = get_store()
+    store.add("r1", "ios", "hostname r1\nsnmp-server location old\n")
+    yield store
+    store.clear()
+
+
+def test_napalm_replace_compare_commit(store):
+    driver = get_network_driver("sim")("r1", "admin", "admin")
+    driver.open()
+
+    driver.load_replace_candidate(config="hostname r1\nsnmp-server location new\n")
+    diff = driver.compare_config()
+    driver.commit_config()
+
+    assert "-snmp-server location old" in diff
+    assert "+snmp-server location new" in diff
+    assert driver.get_config()["running"] == "hostname r1\nsnmp-server location new\n"
+    assert driver.compare_config() == ""
+
+
+def test_napalm_merge_candidate(store):
+    driver = get_network_driver("sim")("r1", "admin", "admin")
+    driver.open()
+
+    driver.load_merge_candidate(config="snmp-server contact noc\n")
+    driver.commit_config()
+
+    assert store.get("r1").running == [
+        "hostname r1",
+        "snmp-server location old",
+        "snmp-server contact noc",
+    ]
+
+
+def test_napalm_unknown_device():
+    driver = get_network_driver("sim")("missing", "admin", "admin", store=DeviceStore())
+    with pytest.raises(ConnectionException):
+        driver.open()
+
+
+def test_netmiko_device_type(store):
+    register_netmiko_driver()
+    netmiko_con = ConnectHandler(device_type="sim", host="r1")
+
+    netmiko_con.config_mode()
+    netmiko_con.send_config_set(
+        ["snmp-server contact noc"],
+        cmd_verify=False,
+        enter_config_mode=False,
+        exit_config_mode=False,
+    )
+    netmiko_con.exit_config_mode()
+    netmiko_con.save_config()
+
+    assert netmiko_con.send_command("show running-config").splitlines() == [
+        "hostname r1",
+        "snmp-server location old",
+        "snmp-server contact noc",
+    ]
+    assert store.get("r1").startup == store.get("r1").running
+
+
+def test_profile_overrides():
+    profile = profiles.get_profile("ios", {"latency": 1.5, "unknown": 1})
+    assert profile.latency == 1.5
+    assert profile.login == profiles.platform_profiles["ios"].login
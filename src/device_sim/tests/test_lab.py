@@ -0,0 +1,25 @@
+from nornir import InitNornir
+
+from nornir_tasks import napalm_sync_config_from_devices
+
+from .. import profiles
+from ..lab import build_lab
+from ..store import DeviceStore
+
+
+def test_sync_from_simulated_lab(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiles, "time_scale", 0)
+    store = DeviceStore()
+    monkeypatch.setattr("device_sim.store.default_store", store)
+
+    hosts = build_lab(str(tmp_path), 6, ["ios", "nxos_ssh", "iosxr"], store=store)
+    monkeypatch.chdir(tmp_path)
+    nr = InitNornir(config_file="nornir.yaml")
+
+    result = nr.run(task=napalm_sync_config_from_devices)
+
+    assert len(hosts) == len(store) == 6
+    assert not result.failed
+    # the running configs have another SNMP location than cfg/
+    assert all(r[0].changed for r in result.values())
+    assert "old-site-1" in (tmp_path / "cfg" / f"{hosts[1]}.cfg").read_text()
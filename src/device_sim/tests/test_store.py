@@ -0,0 +1,86 @@
+from ..store import SimDevice, merge_config
+
+running = [
+    "hostname r1",
+    "interface Ethernet1/1",
+    "  description old",
+    "snmp-server location site-1",
+]
+
+
+def test_merge_adds_lines_to_their_block():
+    merged = merge_config(
+        running,
+        [
+            "interface Ethernet1/1",
+            "  no shutdown",
+            "interface Ethernet1/2",
+            "  description new",
+            "snmp-server location site-1",
+        ],
+    )
+    assert merged == [
+        "hostname r1",
+        "interface Ethernet1/1",
+        "  description old",
+        "  no shutdown",
+        "snmp-server location site-1",
+        "interface Ethernet1/2",
+        "  description new",
+    ]
+
+
+def test_merge_negation_removes_lines_and_blocks():
+    merged = merge_config(
+        running,
+        [
+            "interface Ethernet1/1",
+            "  no description old",
+            "no snmp-server location site-1",
+        ],
+    )
+    assert merged == ["hostname r1", "interface Ethernet1/1"]
+
+    assert merge_config(running, ["no interface Ethernet1/1"]) == [
+        "hostname r1",
+        "snmp-server location site-1",
+    ]
+
+
+def test_show_running_config_sections():
+    device = SimDevice("r1", "nxos_ssh", "\n".join(running))
+
+    assert device.run_command("show running-config snmp") == (
+        "snmp-server location site-1\n"
+    )
+    assert device.run_command("show running-config interface") == (
+        "interface Ethernet1/1\n  description old\n"
+    )
+    assert device.run_command("show running-config | section hostname") == (
+        "hostname r1\n"
+    )
+
+
+def test_nxos_checkpoint_rollback():
+    device = SimDevice("r1", "nxos_ssh", "\n".join(running))
+    device.run_command("checkpoint base")
+    device.replace(["hostname changed"])
+
+    assert device.run_command("rollback running-config checkpoint base") == (
+        "Rollback Done\n"
+    )
+    assert device.running == running
+    assert device.run_command("rollback running-config checkpoint other").startswith(
+        "%"
+    )
+
+
+def test_iosxr_rollback_to_listed_commit():
+    device = SimDevice("r1", "iosxr", "\n".join(running))
+    listed = device.run_command("show configuration commit list 1")
+    commit_id = listed.splitlines()[2].split()[1]
+    device.replace(["hostname changed"])
+
+    device.run_command(f"rollback configuration to {commit_id}")
+
+    assert device.running == running
@@ -0,0 +1,47 @@
+import requests
+
+from ..store import DeviceStore
+from .. import testbed_api
+
+machines = [
+    {
+        "serial": "SIM-n9k-0",
+        "vendor": "cisco",
+        "model": "n9k",
+        "version": "9.3.8",
+        "platform": "nxos_ssh",
+        "hostname": "lab-n9k-0",
+        "mgmt_ip": "192.0.2.1",
+        "netmask": "255.255.255.0",
+        "default_gateway": "192.0.2.254",
+    }
+]
+
+
+def test_reserve_and_release():
+    store = DeviceStore()
+    session = requests.Session()
+    session.headers.update({"Authorization": "Bearer token"})
+
+    with testbed_api.TestbedApiServer(machines, token="token", store=store) as api:
+        listed = session.get(f"{api.url}/machines").json()["machines"]
+        assert [m["status"] for m in listed] == ["available"]
+
+        response = session.post(f"{api.url}/reserve/cisco/n9k/9.3.8")
+        assert response.json()["ip"] == "192.0.2.1"
+        assert store.get("192.0.2.1").platform == "nxos_ssh"
+
+        # the only machine is taken
+        response = session.post(f"{api.url}/reserve/cisco/n9k/9.3.8")
+        assert response.status_code == 409
+
+        assert session.post(f"{api.url}/release/SIM-n9k-0").ok
+        assert "192.0.2.1" not in store
+        assert session.post(f"{api.url}/release/SIM-n9k-0").status_code == 404
+
+
+def test_token_is_required():
+    with testbed_api.TestbedApiServer(
+        machines, token="token", store=DeviceStore()
+    ) as api:
+        assert requests.get(f"{api.url}/machines").status_code == 401
@@ -0,0 +1,5 @@
+from .module import BaselineModule
+
+__all__ = [
+    "BaselineModule",
+]
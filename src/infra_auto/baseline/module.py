@@ -0,0 +1,470 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    TemplateNotFound,
+)
+from nornir.core.task import Result, Task
+from nornir_netmiko import CONNECTION_NAME as NETMIKO_CONNECTION_NAME
+
+from config_utils import parse_config_tree, section_delta, select_sections
+from infra_auto.testbed.execute import run_preconfig_check
+from nornir_runners import run_cpu_bound
+from nornir_tasks.netmiko_bulk_push import (
+    PushReport,
+    bulk_push,
+    missing_config_lines,
+    select_push_mode,
+)
+
+# compiled templates are kept on disk so new processes skip the compilation
+bytecode_cache_dir = os.environ.get(
+    "INFRA_AUTO_JINJA_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "infra-auto", "jinja"),
+)
+
+# comments and empty lines of the rendered configuration
+comment_line_regex = re.compile(r"(^\s*!.*)|(^\s*$)")
+
+# sequence numbers of ACL entries, not part of the rendered commands
+acl_sequence_regex = re.compile(r"^\d+\s+")
+
+# above this many distinct (platform, vars) combinations, render_hosts
+# renders them in worker processes
+parallel_render_threshold = 32
+
+# distinct (platform, vars) renders kept by render_for_host
+render_cache_size = 4096
+
+
+# Jinja environments per template directory, shared by the modules of a
+# process so the copies unpickled by run_cpu_bound in a worker reuse the
+# templates compiled there
+_environments: Dict[str, Environment] = {}
+_environments_lock = threading.Lock()
+
+
+def get_environment(template_dir: str) -> Environment:
+    with _environments_lock:
+        environment = _environments.get(template_dir)
+        if environment is None:
+            bytecode_cache = None
+            try:
+                os.makedirs(bytecode_cache_dir, exist_ok=True)
+                bytecode_cache = FileSystemBytecodeCache(bytecode_cache_dir)
+            except OSError:
+                # a read-only home only costs the on-disk cache
+                pass
+
+            # templates ship with the package, no need to stat them on every
+            # lookup
+            environment = _environments[template_dir] = Environment(
+                loader=FileSystemLoader(template_dir),
+                bytecode_cache=bytecode_cache,
+                auto_reload=False,
+            )
+        return environment
+
+
+def vars_fingerprint(module_vars: dict) -> str:
+    serialized = json.dumps(module_vars, sort_keys=True, default=str)
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class BaselineModule:
+    """
+    Declarative baseline module run by ``infra-auto execute``.
+
+    A baseline only declares its templates per platform, the schema of its
+    vars and the running config sections it owns. The framework provides
+    cached rendering, the offline comparison against ``cfg/<host>.cfg``, the
+    pre-configuration check and the bulk push with commit/save per platform.
+
+    Arguments:
+        name: inventory data key holding the module vars, e.g. baseline_snmp
+        template_dir: directory of the Jinja2 templates
+        templates: template file name per platform
+        section_selectors: regexes of the top level running config lines the
+            templates own, per platform
+        vars_schema: expected type of each known var
+        required_vars: vars every host must define
+        prepare_vars: module level function deriving the template vars from
+            the host vars (must be picklable)
+        line_aliases: per platform (regex, replacement) pairs mapping rendered
+            lines to the way the device shows them in its running config
+        cfg_dir: directory of the running configs synced from the devices
+        sync_sections: per platform keywords of the section show command
+            (e.g. ``show running-config | section <keyword>``) fetching the
+            owned sections, used by ``sync-config-from-device --module``
+    """
+
+    def __init__(
+        self,
+        name: str,
+        template_dir: str,
+        templates: Dict[str, str],
+        section_selectors: Optional[Dict[str, List[str]]] = None,
+        vars_schema: Optional[Dict[str, type]] = None,
+        required_vars: Optional[List[str]] = None,
+        prepare_vars: Optional[Callable[[dict], dict]] = None,
+        line_aliases: Optional[Dict[str, List[Tuple[Pattern, str]]]] = None,
+        cfg_dir: str = "cfg",
+        sync_sections: Optional[Dict[str, List[str]]] = None,
+    ):
+        self.name = name
+        self.template_dir = template_dir
+        self.templates = templates
+        self.section_selectors = section_selectors or {}
+        self.vars_schema = vars_schema or {}
+        self.required_vars = required_vars or []
+        self.prepare_vars = prepare_vars
+        self.line_aliases = line_aliases or {}
+        self.cfg_dir = cfg_dir
+        self.sync_sections = sync_sections or {}
+
+        self._render_cache: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # sent to worker processes by run_cpu_bound, the render cache stays
+        # in the parent and the environment is the one of the worker
+        state = self.__dict__.copy()
+        state["_render_cache"] = {}
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    # --- Vars ---
+
+    def filter_hosts(self, host) -> bool:
+        return self.name in host.keys()
+
+    def validate_vars(self, module_vars: dict):
+        missing = [key for key in self.required_vars if key not in module_vars]
+        if missing:
+            raise ValueError(f"Missing {self.name} vars: {', '.join(missing)}")
+
+        for key, expected_type in self.vars_schema.items():
+            if key in module_vars and not isinstance(module_vars[key], expected_type):
+                raise ValueError(
+                    f"{self.name} var {key} must be of type {expected_type.__name__}"
+                )
+
+    def get_vars(self, host) -> dict:
+        module_vars = host.get(self.name, {})
+        self.validate_vars(module_vars)
+        if self.prepare_vars:
+            module_vars = self.prepare_vars(module_vars)
+        return module_vars
+
+    # --- Rendering ---
+
+    def get_environment(self) -> Environment:
+        return get_environment(self.template_dir)
+
+    def get_template(self, platform: str) -> Template:
+        if platform not in self.templates:
+            raise ValueError(f"Unsupported platform: {platform}")
+
+        try:
+            # the environment caches the compiled template after the first lookup
+            return self.get_environment().get_template(self.templates[platform])
+        except TemplateNotFound:
+            template_full_path = os.path.join(
+                self.template_dir, self.templates[platform]
+            )
+            raise FileNotFoundError(f"Template file not found: {template_full_path}")
+
+    def render(self, platform: str, module_vars: dict) -> List[str]:
+        rendered_config = self.get_template(platform).render(**module_vars)
+
+        # Filter out comments and empty lines
+        return [
+            line
+            for line in rendered_config.splitlines()
+            if not comment_line_regex.match(line)
+        ]
+
+    def _try_render(
+        self, platform: str, module_vars: dict
+    ) -> Tuple[Optional[List[str]], Optional[str]]:
+        try:
+            return self.render(platform, module_vars), None
+        except (ValueError, FileNotFoundError) as e:
+            return None, str(e)
+
+    def render_for_host(self, host) -> List[str]:
+        """
+        Render the config of a host, rendering each distinct combination of
+        platform and resolved vars only once per run. Hosts of the same group
+        share the result of the first host that needed it.
+        """
+        module_vars = self.get_vars(host)
+        key = (host.platform, vars_fingerprint(module_vars))
+
+        with self._lock:
+            future = self._render_cache.get(key)
+            owner = future is None
+            if owner:
+                future = self._render_cache[key] = Future()
+                if len(self._render_cache) > render_cache_size:
+                    # the oldest entry, hosts still waiting on it keep their
+                    # reference to the future
+                    del self._render_cache[next(iter(self._render_cache))]
+
+        if owner:
+            try:
+                future.set_result(
+                    run_cpu_bound(self.render, host.platform, module_vars)
+                )
+            except Exception as e:
+                # the hosts waiting on it fail too, the next ones render again
+                with self._lock:
+                    if self._render_cache.get(key) is future:
+                        del self._render_cache[key]
+                future.set_exception(e)
+
+        # copy so a caller changing its list doesn't change other hosts' config
+        return list(future.result())
+
+    def clear_render_cache(self):
+        """
+        Forget the renders of a previous run, called when a run starts
+        """
+        with self._lock:
+            self._render_cache.clear()
+
+    def render_hosts(self, hosts: Iterable) -> Dict[str, List[str]]:
+        """
+        Render the config of many hosts at once, grouped by platform and
+        resolved vars so each distinct combination is rendered once.
+        Hosts that can't be rendered are left out and reported.
+        """
+        groups: Dict[Tuple[str, str], list] = {}
+        group_vars: Dict[Tuple[str, str], dict] = {}
+        for host in hosts:
+            try:
+                module_vars = self.get_vars(host)
+            except ValueError as e:
+                print(f"Failed to render {host.name}: {e}")
+                continue
+            key = (host.platform, vars_fingerprint(module_vars))
+            groups.setdefault(key, []).append(host.name)
+            group_vars[key] = module_vars
+
+        keys = list(groups)
+        platforms = [key[0] for key in keys]
+        vars_list = [group_vars[key] for key in keys]
+        if len(keys) > parallel_render_threshold:
+            with ProcessPoolExecutor(
+                mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                outcomes = list(pool.map(self._try_render, platforms, vars_list))
+        else:
+            outcomes = list(map(self._try_render, platforms, vars_list))
+
+        rendered = {}
+        for key, (config, error) in zip(keys, outcomes):
+            if error:
+                print(f"Failed to render {', '.join(groups[key])}: {error}")
+                continue
+            for host_name in groups[key]:
+                rendered[host_name] = config
+        return rendered
+
+    # --- Offline comparison ---
+
+    def normalize_line(self, platform: str, line: str) -> str:
+        line = acl_sequence_regex.sub("", " ".join(line.split()))
+        for pattern, replacement in self.line_aliases.get(platform, []):
+            line = pattern.sub(replacement, line)
+        return line
+
+    def config_delta(
+        self, platform: str, running_config: List[str], commands: List[str]
+    ) -> List[str]:
+        """
+        Commands turning the owned sections of ``running_config`` into the
+        rendered ``commands`` (negations of extra commands first)
+        """
+        # templates reset their sections with 'no' commands, the delta
+        # negates exactly what differs instead
+        desired_lines = [
+            line for line in commands if not line.strip().startswith("no ")
+        ]
+
+        selectors = self.section_selectors[platform]
+        current = select_sections(parse_config_tree(running_config), selectors)
+        desired = select_sections(parse_config_tree(desired_lines), selectors)
+
+        return section_delta(
+            current, desired, lambda line: self.normalize_line(platform, line)
+        )
+
+    def offline_delta(
+        self, host_name: str, platform: str, commands: List[str]
+    ) -> Optional[List[str]]:
+        """
+        Compare the rendered commands with the owned sections of
+        cfg/<host>.cfg.
+
+        Returns:
+            The commands still missing on the device (negations of extra
+            commands first), an empty list if the device is already
+            compliant, or None when there is nothing to compare with
+        """
+        if platform not in self.section_selectors:
+            return None
+
+        try:
+            with open(os.path.join(self.cfg_dir, f"{host_name}.cfg"), "r") as f:
+                running_config = f.read().splitlines()
+        except FileNotFoundError:
+            return None
+
+        return self.config_delta(platform, running_config, commands)
+
+    # --- Push ---
+
+    def push(
+        self,
+        netmiko_con,
+        platform: str,
+        commands: List[str],
+        mode: Optional[str] = None,
+        desired_commands: Optional[List[str]] = None,
+    ) -> PushReport:
+        """
+        Push the commands in one configuration session, then commit or save
+        depending on the platform. The follow-up check of bulk mode compares
+        the owned sections with ``desired_commands`` (the full rendered
+        config, defaults to the pushed commands) like the offline comparison.
+        """
+        if platform in self.section_selectors:
+            desired_commands = desired_commands or commands
+
+            def verify(running_config: str, _pushed_commands: List[str]) -> List[str]:
+                return self.config_delta(
+                    platform, running_config.splitlines(), desired_commands
+                )
+
+        else:
+
+            def verify(running_config: str, pushed_commands: List[str]) -> List[str]:
+                return missing_config_lines(
+                    running_config,
+                    pushed_commands,
+                    lambda line: self.normalize_line(platform, line),
+                )
+
+        return bulk_push(netmiko_con, platform, commands, mode=mode, verify=verify)
+
+    # --- Main Task ---
+
+    def task(self, task: Task, dry_run: Optional[bool] = False) -> Result:
+        platform = task.host.platform
+        try:
+            config_commands = self.render_for_host(task.host)
+        except (ValueError, FileNotFoundError) as e:
+            return Result(
+                host=task.host,
+                result=f"Failed to generate {self.name} config: {e}",
+                changed=False,
+                failed=True,
+            )
+
+        # --- Offline Idempotency Check ---
+
+        rendered_commands = config_commands
+        delta_commands = self.offline_delta(task.host.name, platform, config_commands)
+        if delta_commands == []:
+            # no SSH session nor testbed reservation for compliant hosts
+            return Result(
+                host=task.host,
+                result=f"{self.name} config already compliant according to cfg/, skipped.",
+                changed=False,
+            )
+        if delta_commands is not None:
+            config_commands = delta_commands
+
+        netmiko_con = task.host.get_connection(
+            NETMIKO_CONNECTION_NAME, task.nornir.config
+        )
+        if not netmiko_con:
+            return Result(
+                host=task.host,
+                result="Failed to get Netmiko connection",
+                changed=False,
+                failed=True,
+            )
+
+        # --- Pre-Configuration Check ---
+
+        precheck_result = run_preconfig_check(task, config_commands)
+
+        if precheck_result.failed:
+            # Return the detailed failure result from the pre-check
+            return precheck_result
+
+        # --- Apply to Target Device (if pre-check passed) ---
+        if task.is_dry_run(dry_run):
+            return Result(
+                host=task.host,
+                result="Dry run mode (pre-check successful), no changes applied to target.\n",
+                diff=precheck_result.diff,
+                changed=False,
+            )
+
+        if precheck_result.diff.strip() == "":
+            return Result(
+                host=task.host,
+                result="No changes detected in the configuration.",
+                changed=False,
+            )
+
+        try:
+            report = self.push(
+                netmiko_con,
+                platform,
+                config_commands,
+                select_push_mode(task.host),
+                rendered_commands,
+            )
+        except Exception as e:
+            return Result(
+                host=task.host,
+                result=f"Failed applying config to target after successful pre-check: {e}",
+                failed=True,
+                changed=False,
+            )
+
+        result_output = f"{report.summary(len(config_commands))}\n{report.output}"
+        if not report.verified:
+            return Result(
+                host=task.host,
+                result=f"{result_output}\nCommands missing after push:\n"
+                + "\n".join(report.missing),
+                diff=precheck_result.diff,
+                failed=True,
+                changed=True,
+            )
+
+        return Result(
+            host=task.host,
+            result=result_output,
+            diff=f"Pre-check Diff:\n{precheck_result.diff}\nTarget Diff:\n{report.output}",
+            changed=True,
+        )
@@ -1,64 +1,269 @@
+import asyncio
 import os
-import urllib.parse
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# concurrent requests when paging through large responses
+default_max_workers = 8
+# (connect, read) seconds
+default_timeout = (5, 30)
+default_retries = 5
+default_backoff_factor = 1
+# longest wait for a rate limit or a retry, in seconds
+default_max_retry_wait = 60
+# GET responses kept with their ETag
+default_etag_cache_size = 256
+
+retry_status_codes = frozenset([429, 500, 502, 503, 504])
+
+
+class GitLabApiError(Exception):
+    """
+    GitLab answered a request with an error status
+    """
 
 
 class GitLabClient:
-    def __init__(self, endpoint: str, token: str):
+    """
+    Client of the GitLab REST API.
+
+    Requests share a pooled session with ``timeout`` on every request.
+    Connection errors are retried by the adapter. GET requests answered
+    with 429 or 5xx are retried, other requests only on 429, which GitLab
+    didn't process. The delay comes from Retry-After, then RateLimit-Reset,
+    then exponential backoff. Once RateLimit-Remaining reaches 0, requests
+    wait for RateLimit-Reset.
+
+    GET responses with an ETag are cached, so a repeated GET sends
+    If-None-Match and a 304 answer reuses the cached body.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        token: str,
+        timeout: Union[float, Tuple[float, float]] = default_timeout,
+        retries: int = default_retries,
+        backoff_factor: float = default_backoff_factor,
+        max_retry_wait: float = default_max_retry_wait,
+        pool_size: int = default_max_workers,
+        etag_cache_size: int = default_etag_cache_size,
+    ):
         self.api_endpoint = endpoint
         self.api_token = token
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.max_retry_wait = max_retry_wait
+        self.etag_cache_size = etag_cache_size
+
+        # the request wasn't sent when the connection failed, safe to retry
+        # whatever the method
+        connect_retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff_factor,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size,
+            pool_maxsize=pool_size,
+            max_retries=connect_retry,
+        )
         self.session = requests.Session()
         self.session.headers.update({"PRIVATE-TOKEN": self.api_token})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        # epoch time until which the rate limit is exhausted
+        self._throttled_until = 0.0
+        self._etag_cache: "OrderedDict[Tuple, Tuple[str, Any, Dict]]" = OrderedDict()
+
+    # --- Requests ---
+
+    def _wait_for_rate_limit(self):
+        with self._lock:
+            delay = self._throttled_until - time.time()
+        if delay > 0:
+            time.sleep(min(delay, self.max_retry_wait))
+
+    def _note_rate_limit(self, resp: requests.Response):
+        remaining = resp.headers.get("RateLimit-Remaining")
+        reset = resp.headers.get("RateLimit-Reset")
+        if remaining is None or not reset or not reset.isdigit():
+            return
+        if int(remaining) <= 0:
+            with self._lock:
+                self._throttled_until = max(self._throttled_until, float(reset))
+
+    def _retry_delay(self, resp: requests.Response, attempt: int) -> float:
+        retry_after = resp.headers.get("Retry-After", "")
+        reset = resp.headers.get("RateLimit-Reset", "")
+        if retry_after.isdigit():
+            delay = float(retry_after)
+        elif reset.isdigit():
+            delay = float(reset) - time.time()
+        else:
+            delay = self.backoff_factor * 2**attempt
+        return min(max(delay, 0), self.max_retry_wait)
+
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        retry_statuses = retry_status_codes if method == "GET" else {429}
+        for attempt in range(self.retries + 1):
+            self._wait_for_rate_limit()
+            resp = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            self._note_rate_limit(resp)
+            if resp.status_code not in retry_statuses or attempt == self.retries:
+                return resp
+
+            delay = self._retry_delay(resp, attempt)
+            print(
+                f"GitLab API answered {resp.status_code} to {method} {url}, "
+                f"retrying in {delay:.1f}s",
+                file=sys.stderr,
+            )
+            time.sleep(delay)
+        return resp
+
+    @staticmethod
+    def _check(resp: requests.Response, message: str):
+        if resp.status_code > 299 or resp.status_code < 200:
+            raise GitLabApiError(f"{message}: {resp.text}")
+
+    def _get(
+        self, url: str, params: Optional[dict] = None, message: str = "Failed to get"
+    ) -> Tuple[Any, Dict]:
+        """
+        JSON body and headers of a GET, revalidated with its ETag when cached
+        """
+        key = (url, tuple(sorted((params or {}).items())))
+        with self._lock:
+            cached = self._etag_cache.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        resp = self._request("GET", url, params=params, headers=headers)
+        if resp.status_code == 304 and cached:
+            with self._lock:
+                self._etag_cache.move_to_end(key)
+            return cached[1], cached[2]
+        self._check(resp, message)
+
+        data = resp.json()
+        etag = resp.headers.get("ETag")
+        if etag and self.etag_cache_size > 0:
+            with self._lock:
+                self._etag_cache[key] = (etag, data, dict(resp.headers))
+                self._etag_cache.move_to_end(key)
+                while len(self._etag_cache) > self.etag_cache_size:
+                    self._etag_cache.popitem(last=False)
+        return data, resp.headers
+
+    # --- Endpoints ---
 
     def get_mr_change_files(self, project_id: str, merge_request_iid: str):
-        resp = self.session.get(
-            f"{self.api_endpoint}/projects/{project_id}/merge_requests/{merge_request_iid}/changes"
+        data, _ = self._get(
+            f"{self.api_endpoint}/projects/{project_id}/merge_requests/{merge_request_iid}/changes",
+            message="Failed to get changes",
         )
+        return data
 
-        if resp.status_code > 299 or resp.status_code < 200:
-            raise Exception(f"Failed to get changes: {resp.text}")
+    def _get_page(self, url: str, page: int, per_page: int) -> Tuple[List, Dict]:
+        return self._get(
+            url,
+            params={"page": page, "per_page": per_page},
+            message=f"Failed to get {url} page {page}",
+        )
 
-        return resp.json()
+    def get_all_pages(
+        self, url: str, per_page: int = 100, max_workers: int = default_max_workers
+    ) -> List[dict]:
+        """
+        Every item of a paginated list. When GitLab gives the page count, the
+        pages after the first one are fetched concurrently, otherwise they are
+        followed one by one.
+        """
+        first, headers = self._get_page(url, 1, per_page)
+        items = list(first)
 
-    def post_mr_note(self, project_id: str, merge_request_iid: str, body: str):
-        resp = self.session.post(
-            f"{self.api_endpoint}/projects/{project_id}/merge_requests/{merge_request_iid}/notes?body={urllib.parse.quote(body)}"
+        total_pages = headers.get("X-Total-Pages")
+        if total_pages:
+            pages = range(2, int(total_pages) + 1)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                responses = executor.map(
+                    lambda page: self._get_page(url, page, per_page), pages
+                )
+                for page_items, _ in responses:
+                    items.extend(page_items)
+            return items
+
+        # large lists don't report their page count
+        next_page = headers.get("X-Next-Page")
+        while next_page:
+            page_items, headers = self._get_page(url, int(next_page), per_page)
+            items.extend(page_items)
+            next_page = headers.get("X-Next-Page")
+        return items
+
+    def get_mr_diffs(self, project_id: str, merge_request_iid: str) -> List[dict]:
+        """
+        Every file diff of a merge request (old_path, new_path, new_file,
+        renamed_file, deleted_file), unlike /changes which is truncated on
+        large merge requests
+        """
+        return self.get_all_pages(
+            f"{self.api_endpoint}/projects/{project_id}/merge_requests/{merge_request_iid}/diffs"
         )
 
-        if resp.status_code > 299 or resp.status_code < 200:
-            raise Exception(f"Failed to post note: {resp.text}")
+    def post_mr_note(self, project_id: str, merge_request_iid: str, body: str):
+        # in the JSON body, a query string is limited to a few kB
+        resp = self._request(
+            "POST",
+            f"{self.api_endpoint}/projects/{project_id}/merge_requests/{merge_request_iid}/notes",
+            json={"body": body},
+        )
+        self._check(resp, "Failed to post note")
 
         return resp.json()
 
     def trigger_pipeline(self, project_id: str, branch: str, variables: list):
         default_variables = [{"key": "CI_PIPELINE_SOURCE", "value": "api"}]
 
-        # remove duplicates in variables
-        for default_var in default_variables:
-            for var in variables:
-                if var["key"] == default_var["key"]:
-                    default_variables.remove(default_var)
-
-        vars = default_variables.extend(variables)
+        # the given variables override the default ones
+        keys = {var["key"] for var in variables}
+        pipeline_variables = [
+            var for var in default_variables if var["key"] not in keys
+        ] + list(variables)
 
-        resp = self.session.post(
+        resp = self._request(
+            "POST",
             f"{self.api_endpoint}/projects/{project_id}/pipeline",
-            json={"ref": branch, "variables": vars},
+            json={"ref": branch, "variables": pipeline_variables},
         )
-
-        if resp.status_code != 200:
-            raise Exception(f"Failed to trigger pipeline: {resp.text}")
+        self._check(resp, "Failed to trigger pipeline")
 
         return resp.json()
 
+    def close(self):
+        self.session.close()
+
 
 class GitLabCiApiClient(GitLabClient):
-    def __init__(self):
+    def __init__(self, **kwargs):
         endpoint = os.environ.get("CI_API_V4_URL")
         token = os.environ.get("GITLAB_API_TOKEN")
 
-        super().__init__(endpoint, token)
+        super().__init__(endpoint, token, **kwargs)
 
         self.project_id = os.environ.get("CI_PROJECT_ID")
         self.merge_request_iid = os.environ.get("CI_MERGE_REQUEST_IID", None)
@@ -66,8 +271,52 @@ class GitLabCiApiClient(GitLabClient):
     def get_mr_change_files(self):
         return super().get_mr_change_files(self.project_id, self.merge_request_iid)
 
+    def get_mr_diffs(self):
+        return super().get_mr_diffs(self.project_id, self.merge_request_iid)
+
     def post_mr_note(self, body: str):
         return super().post_mr_note(self.project_id, self.merge_request_iid, body)
 
     def trigger_pipeline(self, branch: str, variables: list):
         return super().trigger_pipeline(self.project_id, branch, variables)
+
+
+class AsyncGitLabCiApiClient:
+    """
+    asyncio variant of ``GitLabCiApiClient``, the requests of the pooled
+    client run in worker threads
+    """
+
+    def __init__(self, client: GitLabCiApiClient):
+        self.client = client
+
+    async def get_mr_change_files(self):
+        return await asyncio.to_thread(self.client.get_mr_change_files)
+
+    async def get_mr_diffs(self) -> List[dict]:
+        return await asyncio.to_thread(self.client.get_mr_diffs)
+
+    async def get_all_pages(self, url: str, per_page: int = 100) -> List[dict]:
+        return await asyncio.to_thread(self.client.get_all_pages, url, per_page)
+
+    async def post_mr_note(self, body: str):
+        return await asyncio.to_thread(self.client.post_mr_note, body)
+
+    async def trigger_pipeline(self, branch: str, variables: list):
+        return await asyncio.to_thread(self.client.trigger_pipeline, branch, variables)
+
+
+_ci_client: Optional[GitLabCiApiClient] = None
+_ci_client_lock = threading.Lock()
+
+
+def get_ci_client() -> GitLabCiApiClient:
+    """
+    The client of the current CI job, shared by the CI helpers so they reuse
+    its connections, rate limit state and ETag cache
+    """
+    global _ci_client
+    with _ci_client_lock:
+        if _ci_client is None:
+            _ci_client = GitLabCiApiClient()
+        return _ci_client
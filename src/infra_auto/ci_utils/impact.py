@@ -0,0 +1,217 @@
+import importlib
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Set
+
+import yaml
+from jinja2 import meta
+
+from nornir_tasks.napalm_apply_config_to_devices import read_base_config
+
+from ..task_runners import NornirRunner
+
+
+def _path_key(path: str) -> str:
+    return os.path.abspath(os.path.normpath(path))
+
+
+def changed_keys(path: str, base_rev: str) -> Set[str]:
+    """
+    Top level keys of a YAML file (hosts, groups) added, removed or changed
+    since ``base_rev``
+    """
+    new = {}
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            new = yaml.safe_load(f) or {}
+    base = read_base_config(os.path.relpath(path), base_rev)
+    old = (yaml.safe_load(base) or {}) if base else {}
+    if not isinstance(old, dict):
+        old = {}
+    if not isinstance(new, dict):
+        new = {}
+    return {key for key in set(old) | set(new) if old.get(key) != new.get(key)}
+
+
+def _is_task_module_dir(directory: str) -> bool:
+    # a package shipping its templates or vars next to the code
+    return os.path.isfile(os.path.join(directory, "__init__.py")) and (
+        os.path.isdir(os.path.join(directory, "templates"))
+        or os.path.isdir(os.path.join(directory, "vars"))
+    )
+
+
+class _ModuleImpact:
+    """
+    Hosts a task module runs on, and per template file the hosts rendering
+    it directly or through an include/import
+    """
+
+    def __init__(self, name: str, directory: str):
+        self.name = name
+        self.directory = directory
+        self.hosts: Set[str] = set()
+        self.template_hosts: Dict[str, Set[str]] = {}
+
+
+class ImpactIndex:
+    """
+    Index from every inventory file, inventory group, task module vars file
+    and template to the hosts it affects, built once from the Nornir
+    inventory, to turn the changed files of a commit or merge request into
+    the devices to run on.
+    """
+
+    def __init__(self, nr_runner: NornirRunner):
+        self.nr_runner = nr_runner
+        inventory = nr_runner.nornir.inventory
+        self.all_hosts: Set[str] = set(inventory.hosts)
+
+        self.hosts_by_group: Dict[str, Set[str]] = {}
+        for host in inventory.hosts.values():
+            groups = list(host.groups)
+            while groups:
+                group = groups.pop()
+                self.hosts_by_group.setdefault(group.name, set()).add(host.name)
+                groups.extend(group.groups)
+
+        options = nr_runner.nornir.config.inventory.options
+        self.inventory_files = {
+            _path_key(options.get(option, default)): kind
+            for option, default, kind in (
+                ("host_file", "hosts.yaml", "hosts"),
+                ("group_file", "groups.yaml", "groups"),
+                ("defaults_file", "defaults.yaml", "defaults"),
+            )
+        }
+        self._modules: Dict[str, Optional[_ModuleImpact]] = {}
+
+    # --- Task modules ---
+
+    def _load_module(self, name: str) -> Optional[_ModuleImpact]:
+        if name in self._modules:
+            return self._modules[name]
+
+        impact = None
+        try:
+            module = importlib.import_module(name)
+        except Exception:
+            module = None
+        if module is not None and getattr(module, "__file__", None):
+            impact = self._index_module(name, module)
+        self._modules[name] = impact
+        return impact
+
+    def _index_module(self, name: str, module) -> Optional[_ModuleImpact]:
+        task_module = getattr(module, "baseline", module)
+        if getattr(task_module, "task", None) is None:
+            return None
+
+        impact = _ModuleImpact(name, os.path.dirname(os.path.abspath(module.__file__)))
+        inventory = self.nr_runner.nornir.inventory
+        group_vars = os.path.join(impact.directory, "vars/groups.yaml")
+        host_vars = os.path.join(impact.directory, "vars/hosts.yaml")
+        if os.path.exists(group_vars):
+            self.nr_runner.load_group_vars(name, group_vars)
+        if os.path.exists(host_vars):
+            self.nr_runner.load_host_vars(name, host_vars)
+
+        filter_func = getattr(task_module, "filter_hosts", None)
+        impact.hosts = {
+            host.name
+            for host in inventory.hosts.values()
+            if filter_func is None or filter_func(host)
+        }
+
+        # templates per platform, and the templates they include
+        templates = getattr(task_module, "templates", None)
+        if templates:
+            environment = task_module.get_environment()
+            for platform, template_name in templates.items():
+                platform_hosts = {
+                    h for h in impact.hosts if inventory.hosts[h].platform == platform
+                }
+                for referenced in self._template_closure(environment, template_name):
+                    path = _path_key(os.path.join(task_module.template_dir, referenced))
+                    impact.template_hosts.setdefault(path, set()).update(platform_hosts)
+        return impact
+
+    def _template_closure(self, environment, template_name: str) -> Set[str]:
+        seen = set()
+        pending = [template_name]
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            try:
+                source = environment.loader.get_source(environment, name)[0]
+            except Exception:
+                continue
+            pending.extend(
+                referenced
+                for referenced in meta.find_referenced_templates(
+                    environment.parse(source)
+                )
+                if referenced
+            )
+        return seen
+
+    def _module_for_path(self, path: str) -> Optional[_ModuleImpact]:
+        parts = os.path.normpath(path).split(os.sep)
+        for i, name in enumerate(parts[:-1]):
+            directory = os.path.join(*parts[: i + 1])
+            # only import what looks like a task module, not any directory
+            if not name.isidentifier() or not _is_task_module_dir(directory):
+                continue
+            impact = self._load_module(name)
+            if impact and impact.directory == _path_key(directory):
+                return impact
+        return None
+
+    # --- Changes ---
+
+    def hosts_for_path(self, path: str, base_rev: str) -> Set[str]:
+        """
+        Hosts affected by a change of ``path`` since ``base_rev``
+        """
+        key = _path_key(path)
+        kind = self.inventory_files.get(key)
+        if kind == "defaults":
+            return set(self.all_hosts)
+        if kind == "hosts":
+            return changed_keys(path, base_rev) & self.all_hosts
+        if kind == "groups":
+            return self._group_hosts(changed_keys(path, base_rev))
+
+        module = self._module_for_path(path)
+        if module is None:
+            return set()
+        if key == _path_key(os.path.join(module.directory, "vars/hosts.yaml")):
+            return changed_keys(path, base_rev) & module.hosts
+        if key == _path_key(os.path.join(module.directory, "vars/groups.yaml")):
+            return self._group_hosts(changed_keys(path, base_rev)) & module.hosts
+        if key in module.template_hosts:
+            return set(module.template_hosts[key])
+        if path.endswith(".j2"):
+            # a template no platform renders
+            return set()
+        # code of the module
+        return set(module.hosts)
+
+    def _group_hosts(self, groups: Iterable[str]) -> Set[str]:
+        hosts = set()
+        for group in groups:
+            hosts |= self.hosts_by_group.get(group, set())
+        return hosts
+
+    def affected_hosts(self, paths: Iterable[str], base_rev: str) -> List[str]:
+        hosts = set()
+        for path in paths:
+            if path.startswith("cfg/"):
+                continue
+            affected = self.hosts_for_path(path, base_rev)
+            if affected:
+                print(f"{path} affects {len(affected)} devices", file=sys.stderr)
+            hosts |= affected
+        return sorted(hosts)
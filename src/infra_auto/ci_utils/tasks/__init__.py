@@ -1,10 +1,12 @@
 from .detect_cfg_changes import detect_cfg_changes
+from .merge_shard_results import merge_shard_results
 from .report_changes import report_changes_to_mr_comment
 from .run_config import run_specific_configs
 from .trigger_post_deploy_pipeline import trigger_post_deploy_pipeline
 
 __all__ = [
     "detect_cfg_changes",
+    "merge_shard_results",
     "report_changes_to_mr_comment",
     "run_specific_configs",
     "trigger_post_deploy_pipeline",
@@ -1,46 +1,123 @@
 import os
 import re
+import subprocess
+import sys
+from typing import Iterable, List, Optional
 
-from ..gitlab_api import GitLabCiApiClient
+from ...task_runners import NornirRunner
+from ..gitlab_api import get_ci_client
+from ..impact import ImpactIndex
 
 merge_request_iid = os.environ.get("CI_MERGE_REQUEST_IID", None)
 
-gitlab_client = GitLabCiApiClient()
-
 device_parse_re = re.compile(r"^cfg/(.*)\.cfg$")
 
 
+def cfg_device(path: Optional[str]) -> Optional[str]:
+    match = device_parse_re.search(path or "")
+    return match.group(1) if match else None
+
+
+def devices_from_changes(changes: Iterable[dict]) -> List[str]:
+    """
+    Devices whose cfg was added, modified or renamed to, once each. A deleted
+    cfg, or the old path of a renamed one, has no config to apply.
+    """
+    devices = {}  # ordered set
+    for change in changes:
+        if change.get("renamed_file") or change.get("deleted_file"):
+            removed = cfg_device(change.get("old_path"))
+            if removed:
+                print(f"cfg of {removed} was removed, skipping it", file=sys.stderr)
+            if change.get("deleted_file"):
+                continue
+
+        device = cfg_device(change.get("new_path"))
+        if device:
+            devices[device] = True
+
+    return list(devices)
+
+
+def changed_paths(changes: Iterable[dict]) -> List[str]:
+    paths = {}  # ordered set
+    for change in changes:
+        for key in ("old_path", "new_path"):
+            if change.get(key):
+                paths[change[key]] = True
+    return list(paths)
+
+
 def get_mr_change_files():
-    changeset = gitlab_client.get_mr_change_files()["changes"]
-    device_list = []
+    return devices_from_changes(get_ci_client().get_mr_diffs())
+
+
+def parse_name_status(output: str) -> List[dict]:
+    """
+    Changes of `git diff --name-status -M`, as GitLab diffs
+    """
+    changes = []
+    for line in output.splitlines():
+        fields = line.split("\t")
+        status = fields[0][:1]
+        if status == "R":
+            old_path, new_path = fields[1], fields[2]
+        else:
+            old_path = new_path = fields[1]
+        changes.append(
+            {
+                "old_path": old_path,
+                "new_path": new_path,
+                "new_file": status == "A",
+                "renamed_file": status == "R",
+                "deleted_file": status == "D",
+            }
+        )
+    return changes
 
-    for change in changeset:
-        # if new_path is in cfg/
-        if change["new_path"].startswith("cfg/"):
-            # use filename to get the device host
-            device = device_parse_re.search(change["new_path"]).group(1)
-            device_list.append(device)
 
-    return device_list
+def get_merged_changes() -> List[dict]:
+    output = subprocess.run(
+        ["git", "diff", "--name-status", "-M", "HEAD^1", "HEAD"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return parse_name_status(output)
 
 
 def get_merged_mr_changes():
-    # use git command to get diff file names
-    diff_cmd = "git diff --name-only HEAD^1 HEAD cfg/"
-    diff_files = os.popen(diff_cmd).read().splitlines()
-    device_list = []
-    for file in diff_files:
-        device = device_parse_re.search(file).group(1)
-        device_list.append(device)
+    return devices_from_changes(get_merged_changes())
 
-    return device_list
 
+def get_impacted_devices(
+    paths: List[str], base_rev: str, config_file: str = "nornir.yaml"
+) -> List[str]:
+    """
+    Devices affected by the changed inventory, vars and template files
+    """
+    if not any(not path.startswith("cfg/") for path in paths):
+        return []
+    if not os.path.exists(config_file):
+        print(f"{config_file} not found, skipping impact analysis", file=sys.stderr)
+        return []
 
-def detect_cfg_changes() -> None:
+    index = ImpactIndex(NornirRunner(config_file=config_file))
+    return index.affected_hosts(paths, base_rev)
+
+
+def detect_cfg_changes(config_file: str = "nornir.yaml") -> None:
     if merge_request_iid:
-        device_list = get_mr_change_files()
+        changes = get_ci_client().get_mr_diffs()
+        base_rev = os.environ.get("CI_MERGE_REQUEST_DIFF_BASE_SHA", "HEAD^1")
     else:
-        device_list = get_merged_mr_changes()
+        changes = get_merged_changes()
+        base_rev = "HEAD^1"
+
+    device_list = devices_from_changes(changes)
+    impacted = get_impacted_devices(changed_paths(changes), base_rev, config_file)
+    listed = set(device_list)
+    device_list += [device for device in impacted if device not in listed]
 
     for device in device_list:
         print(device)
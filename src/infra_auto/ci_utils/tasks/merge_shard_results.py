@@ -0,0 +1,38 @@
+import json
+from typing import List, Optional
+
+from infra_auto.report import format_result_report, merge_result_files
+
+
+def merge_shard_results(
+    result_files: List[str],
+    output_file: Optional[str] = None,
+    report_file: Optional[str] = None,
+) -> dict:
+    """
+    Merge the --result-json files of parallel shard jobs into one result,
+    written as JSON and/or as a text report for report-diff-to-mr
+    """
+    if not result_files:
+        raise ValueError("No result files to merge")
+
+    merged = merge_result_files(result_files)
+
+    if output_file:
+        with open(output_file, "w") as f:
+            json.dump(merged, f, indent=2)
+
+    report = format_result_report(merged)
+    if report_file:
+        with open(report_file, "w") as f:
+            f.write(report)
+    else:
+        print(report)
+
+    hosts = merged["hosts"].values()
+    print(
+        f"Merged {len(result_files)} result files: {len(merged['hosts'])} devices, "
+        f"{sum(1 for host in hosts if host['changed'])} changed, "
+        f"{sum(1 for host in hosts if host['failed'])} failed"
+    )
+    return merged
@@ -1,17 +1,46 @@
 import os
+from typing import List, Optional
 
-from infra_auto.ci_utils.gitlab_api import GitLabCiApiClient
+from infra_auto.ci_utils.gitlab_api import get_ci_client
+from infra_auto.report import (
+    format_result_report,
+    merge_result_files,
+    plan_report_notes,
+    summarize_results,
+)
+from infra_auto.report.mr_report import default_max_note_size
 
 
-def report_changes_to_mr_comment(report_file_name: str):
-    if not os.path.exists(report_file_name):
-        raise FileNotFoundError(f"File {report_file_name} not found")
+def report_changes_to_mr_comment(
+    report_file_name: Optional[str],
+    artifact_path: Optional[str] = None,
+    max_note_size: int = default_max_note_size,
+    result_files: Optional[List[str]] = None,
+):
+    """
+    Post a report to the merge request, or with ``result_files`` (the
+    --result-json files of the jobs) the diffs grouped across devices
+    """
+    groups = None
+    if result_files:
+        data = merge_result_files(result_files)
+        groups = summarize_results(data)
+        output = format_result_report(data)
+    else:
+        if not report_file_name or not os.path.exists(report_file_name):
+            raise FileNotFoundError(f"File {report_file_name} not found")
+        with open(report_file_name) as f:
+            output = f.read()
 
-    gitlab_client = GitLabCiApiClient()
+    gitlab_client = get_ci_client()
 
-    with open(report_file_name) as f:
-        output = f.read()
-
-    output = "### Nornir Dry Run Output\n```\n" + output + "\n```\n"
-
-    gitlab_client.post_mr_note(output)
+    notes = plan_report_notes(
+        output,
+        "### Nornir Dry Run Output",
+        max_note_size=max_note_size,
+        artifact_path=artifact_path,
+        groups=groups,
+    )
+    for note in notes:
+        gitlab_client.post_mr_note(note)
+    print(f"Posted the report in {len(notes)} notes")
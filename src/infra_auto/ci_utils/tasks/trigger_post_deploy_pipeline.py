@@ -1,10 +1,10 @@
 import os
 
-from infra_auto.ci_utils.gitlab_api import GitLabCiApiClient
+from infra_auto.ci_utils.gitlab_api import get_ci_client
 
 
 def trigger_post_deploy_pipeline(device_list_file: str):
-    gitlab_client = GitLabCiApiClient()
+    gitlab_client = get_ci_client()
     default_branch = os.environ.get("CI_DEFAULT_BRANCH", None)
 
     if not os.path.exists(device_list_file):
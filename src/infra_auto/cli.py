@@ -6,10 +6,13 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")
 
 from infra_auto.commands import (
     ApplyCfgToDeviceCommand,
+    BenchCommand,
     ChangeHostnameCommand,
     CiCommand,
     ExecuteCommand,
+    RenderCommand,
     SyncConfigFromDeviceCommand,
+    TestbedCommand,
 )
 
 
@@ -22,6 +25,9 @@ def main() -> None:
     ApplyCfgToDeviceCommand(subparsers)
     ExecuteCommand(subparsers)
     ChangeHostnameCommand(subparsers)
+    RenderCommand(subparsers)
+    TestbedCommand(subparsers)
+    BenchCommand(subparsers)
 
     args = parser.parse_args()
 
@@ -30,9 +36,9 @@ def main() -> None:
         parser.print_help()
         sys.exit(1)
 
-    # Some commands like change-hostname, sync-config-from-device, apply-cfg-to-device, execute don't have subcommands, so they won't have a 'command' attribute
+    # Some commands like change-hostname, sync-config-from-device, apply-cfg-to-device, execute, render don't have subcommands, so they won't have a 'command' attribute
     # Only check for 'command' if it's expected (for commands with subcommands)
-    if args.category in ["ci"] and not hasattr(args, "command"):
+    if args.category in ["ci", "testbed"] and not hasattr(args, "command"):
         parser.print_help()
         sys.exit(1)
 
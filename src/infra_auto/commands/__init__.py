@@ -3,6 +3,9 @@ from .execute_command import ExecuteCommand
 from .change_hostname_command import ChangeHostnameCommand
 from .sync_config_from_device_command import SyncConfigFromDeviceCommand
 from .apply_cfg_to_device_command import ApplyCfgToDeviceCommand
+from .render_command import RenderCommand
+from .testbed_command import TestbedCommand
+from .bench_command import BenchCommand
 
 __all__ = [
     "CiCommand",
@@ -10,4 +13,7 @@ __all__ = [
     "ChangeHostnameCommand",
     "SyncConfigFromDeviceCommand",
     "ApplyCfgToDeviceCommand",
+    "RenderCommand",
+    "TestbedCommand",
+    "BenchCommand",
 ]
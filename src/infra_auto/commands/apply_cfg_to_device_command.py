@@ -1,6 +1,16 @@
 from nornir_utils.plugins.functions import print_result
 
+from infra_auto.report import (
+    aggregated_result_to_dict,
+    format_diff_summary,
+    summarize_results,
+    write_result_json,
+)
 from infra_auto.task_runners import NornirRunner
+from infra_auto.testbed.pool import TestbedPool
+from nornir_tasks import napalm_apply_config_to_devices
+
+from .common_arguments import add_shard_arguments, add_summary_argument
 
 
 class ApplyCfgToDeviceCommand:
@@ -26,11 +36,39 @@ class ApplyCfgToDeviceCommand:
             help="Path to the config file",
             default="nornir.yaml",
         )
+        apply_to_parser.add_argument(
+            "--mode",
+            choices=["replace", "delta"],
+            default="replace",
+            help="replace: replace the whole config, "
+            "delta: merge only the changes since --base-rev when it is safe",
+        )
+        apply_to_parser.add_argument(
+            "--base-rev",
+            type=str,
+            default="HEAD^1",
+            help="Git revision holding the last synced configs, used by delta mode",
+        )
+        add_summary_argument(apply_to_parser)
+        add_shard_arguments(apply_to_parser)
 
     def apply_cfg_to_device(self, args):
         print("Syncing data from local to remote...")
-        nr = NornirRunner(config_file=args.config_file).filter_hosts(
-            args.device_list_file
+        nr = (
+            NornirRunner(config_file=args.config_file)
+            .filter_hosts(args.device_list_file)
+            .shard(args.shard, napalm_apply_config_to_devices, args.shard_history)
         )
         nr.print_affect_hosts()
-        print_result(nr.apply_to(dry_run=args.dry_run))
+        # prechecks of all hosts share the reserved test machines
+        with TestbedPool(shard=args.shard):
+            result = nr.apply_to(
+                dry_run=args.dry_run, mode=args.mode, base_rev=args.base_rev
+            )
+        if args.summary:
+            groups = summarize_results(aggregated_result_to_dict(result))
+            print(format_diff_summary(groups, result.name))
+        else:
+            print_result(result)
+        if args.result_json:
+            write_result_json(result, args.result_json, args.shard)
@@ -0,0 +1,156 @@
+import contextlib
+import os
+import shutil
+import tempfile
+import time
+
+import device_sim
+from device_sim import profiles as sim_profiles
+
+from ..task_runners import NornirRunner
+from ..testbed import cache as precheck_cache
+from ..testbed import execute
+from ..testbed import pool as testbed_pool
+from ..testbed.client import TestbedClient
+
+
+class BenchCommand:
+    def __init__(self, subparsers):
+        # bench command
+        bench_parser = subparsers.add_parser(
+            "bench",
+            help="Benchmark sync, apply or pre-check against simulated devices",
+        )
+        bench_parser.set_defaults(func=self.bench)
+        bench_parser.add_argument(
+            "task",
+            choices=["sync", "apply", "precheck"],
+            help="The operation to benchmark",
+        )
+        bench_parser.add_argument(
+            "--devices", type=int, default=1000, help="Number of simulated devices"
+        )
+        bench_parser.add_argument(
+            "--platforms",
+            type=str,
+            help="Comma separated platforms of the devices "
+            "(default: ios,nxos_ssh,iosxr, nxos_ssh for precheck)",
+        )
+        bench_parser.add_argument(
+            "--runner",
+            type=str,
+            default="threaded",
+            help="Nornir runner plugin (e.g. threaded, hybrid, throttled)",
+        )
+        bench_parser.add_argument(
+            "--num-workers", type=int, default=100, help="Runner num_workers"
+        )
+        bench_parser.add_argument(
+            "--time-scale",
+            type=float,
+            default=1.0,
+            help="Multiplier of the simulated device delays, e.g. 0.01",
+        )
+        bench_parser.add_argument(
+            "--testbed-machines",
+            type=int,
+            default=testbed_pool.default_max_machines,
+            help="Simulated test machines per platform, for precheck",
+        )
+        bench_parser.add_argument(
+            "--workdir",
+            type=str,
+            help="Directory to generate the lab in, kept after the run "
+            "(default: a temporary directory)",
+        )
+        bench_parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Show the output of the tasks",
+        )
+
+    def _testbed_machines(self, platforms, per_platform):
+        machines = []
+        for platform in platforms:
+            vendor, model = execute.platform_to_vendor_model(platform)
+            for i in range(per_platform):
+                machines.append(
+                    {
+                        "serial": f"SIM-{model}-{i}",
+                        "vendor": vendor,
+                        "model": model,
+                        "version": device_sim.default_versions.get(platform, "1.0"),
+                        "platform": platform,
+                        "hostname": f"lab-{model}-{i}",
+                        "mgmt_ip": f"192.0.2.{len(machines) + 1}",
+                        "netmask": "255.255.255.0",
+                        "default_gateway": "192.0.2.254",
+                    }
+                )
+        return machines
+
+    def _run(self, task, args):
+        runner = NornirRunner(config_file="nornir.yaml")
+        if task == "sync":
+            return runner.sync_from()
+        if task == "apply":
+            return runner.apply_to()
+        with testbed_pool.TestbedPool(max_machines=args.testbed_machines):
+            return runner.nornir.run(task=execute.run_preconfig_check)
+
+    def bench(self, args):
+        if args.platforms:
+            platforms = args.platforms.split(",")
+        elif args.task == "precheck":
+            # the only platform filter_config sanitizes for the testbed
+            platforms = ["nxos_ssh"]
+        else:
+            platforms = ["ios", "nxos_ssh", "iosxr"]
+
+        device_sim.register_netmiko_driver()
+        sim_profiles.time_scale = args.time_scale
+        workdir = args.workdir or tempfile.mkdtemp(prefix="infra-auto-bench-")
+        print(f"Generating {args.devices} simulated devices in {workdir}")
+        device_sim.build_lab(
+            workdir,
+            args.devices,
+            platforms,
+            runner={
+                "plugin": args.runner,
+                "options": {"num_workers": args.num_workers},
+            },
+        )
+
+        server = device_sim.TestbedApiServer(
+            self._testbed_machines(platforms, args.testbed_machines),
+            token=execute.API_TOKEN,
+        ).start()
+        # prechecks reach the stand-in API, and don't reuse cached outcomes
+        client, cache_dir = execute.testbed_client, precheck_cache.default_cache_dir
+        execute.testbed_client = TestbedClient(server.url, execute.API_TOKEN)
+        precheck_cache.default_cache_dir = os.path.join(workdir, "precheck-cache")
+        cwd = os.getcwd()
+        try:
+            os.chdir(workdir)
+            with contextlib.ExitStack() as stack:
+                if not args.verbose:
+                    devnull = stack.enter_context(open(os.devnull, "w"))
+                    stack.enter_context(contextlib.redirect_stdout(devnull))
+                start = time.monotonic()
+                result = self._run(args.task, args)
+                elapsed = time.monotonic() - start
+        finally:
+            os.chdir(cwd)
+            execute.testbed_client.close()
+            execute.testbed_client = client
+            precheck_cache.default_cache_dir = cache_dir
+            server.stop()
+            device_sim.get_store().clear()
+            if not args.workdir:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+        print(
+            f"{args.task}: {len(result)} devices in {elapsed:.1f}s "
+            f"({len(result) / elapsed:.1f} devices/s), "
+            f"{len(result.failed_hosts)} failed"
+        )
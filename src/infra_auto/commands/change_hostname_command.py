@@ -22,8 +22,17 @@ class ChangeHostnameCommand:
             help="Path to the task file containing hostname mappings",
             default="task.yaml",
         )
+        change_hostname_parser.add_argument(
+            "--rollback",
+            action="store_true",
+            help="Roll back local file changes left by an interrupted run",
+        )
 
     def change_hostname(self, args):
+        if args.rollback:
+            ChangeHostnameTaskRunner.rollback_journal()
+            return
+
         print("Starting hostname change process...")
 
         # Load task configuration
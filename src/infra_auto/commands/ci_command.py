@@ -3,10 +3,12 @@ import sys
 
 from ..ci_utils.tasks import (
     detect_cfg_changes,
+    merge_shard_results,
     report_changes_to_mr_comment,
     run_specific_configs,
     trigger_post_deploy_pipeline,
 )
+from ..report.mr_report import default_artifact_path, default_max_note_size
 
 
 class CiCommand:
@@ -23,6 +25,14 @@ class CiCommand:
             "detect-changes", help="Detect changes in the repository"
         )
         ci_detect_change_parser.set_defaults(func=self.ci_detect_changes)
+        ci_detect_change_parser.add_argument(
+            "--config-file",
+            "-c",
+            type=str,
+            help="Nornir config file, used to find the devices affected by "
+            "inventory, vars and template changes",
+            default="nornir.yaml",
+        )
 
         # CI: report command
         ci_report_to_mr_comment_parser = ci_subparsers.add_parser(
@@ -34,6 +44,26 @@ class CiCommand:
         ci_report_to_mr_comment_parser.add_argument(
             "--report-file", type=str, help="Path to the report file"
         )
+        ci_report_to_mr_comment_parser.add_argument(
+            "--artifact-path",
+            type=str,
+            default=default_artifact_path,
+            help="Where to write the gzip compressed report when it is too large "
+            "to post, declare it as a job artifact to link it from the note",
+        )
+        ci_report_to_mr_comment_parser.add_argument(
+            "--max-note-size",
+            type=int,
+            default=default_max_note_size,
+            help="Split the report into notes of at most this many characters",
+        )
+        ci_report_to_mr_comment_parser.add_argument(
+            "--result-json",
+            type=str,
+            nargs="+",
+            help="Post the diffs of these --result-json files grouped across "
+            "devices instead of the report file",
+        )
 
         # CI: trigger sync command
         ci_trigger_parser = ci_subparsers.add_parser(
@@ -56,11 +86,34 @@ class CiCommand:
             "--device-list-file", type=str, help="Path to the device list file"
         )
 
+        # CI: merge-shard-results command
+        ci_merge_shard_results_parser = ci_subparsers.add_parser(
+            "merge-shard-results",
+            help="Merge the --result-json files of parallel shard jobs",
+        )
+        ci_merge_shard_results_parser.set_defaults(func=self.ci_merge_shard_results)
+        ci_merge_shard_results_parser.add_argument(
+            "result_files", nargs="+", help="Result JSON files of the shards"
+        )
+        ci_merge_shard_results_parser.add_argument(
+            "--output", type=str, help="Path to write the merged result JSON"
+        )
+        ci_merge_shard_results_parser.add_argument(
+            "--report-file",
+            type=str,
+            help="Path to write the merged text report (printed if omitted)",
+        )
+
     def ci_detect_changes(self, args):
-        detect_cfg_changes()
+        detect_cfg_changes(args.config_file)
 
     def ci_report_diff_to_mr_comment(self, args):
-        report_changes_to_mr_comment(args.report_file)
+        report_changes_to_mr_comment(
+            args.report_file, args.artifact_path, args.max_note_size, args.result_json
+        )
+
+    def ci_merge_shard_results(self, args):
+        merge_shard_results(args.result_files, args.output, args.report_file)
 
     def ci_trigger_sync_from_pipeline(self, args):
         trigger_post_deploy_pipeline(args.device_list_file)
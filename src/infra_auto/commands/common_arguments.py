@@ -0,0 +1,31 @@
+def add_shard_arguments(parser):
+    """
+    Add the arguments used to split a job across parallel CI jobs
+    """
+    parser.add_argument(
+        "--shard",
+        type=str,
+        help="Only run the i-th of N shards of the selected devices, e.g. 2/4",
+    )
+    parser.add_argument(
+        "--shard-history",
+        type=str,
+        help="Duration history file used to balance shards by run time",
+    )
+    parser.add_argument(
+        "--result-json",
+        type=str,
+        help="Write the results as JSON, to be merged with ci merge-shard-results",
+    )
+
+
+def add_summary_argument(parser):
+    """
+    Add the argument printing the diffs grouped across devices
+    """
+    parser.add_argument(
+        "--summary",
+        action="store_true",
+        help="Print each distinct diff once with the devices sharing it, "
+        "instead of the result of every device",
+    )
@@ -1,6 +1,8 @@
 
 from infra_auto.task_runners import ExecuteTaskModuleRunner
 
+from .common_arguments import add_shard_arguments
+
 
 class ExecuteCommand:
     def __init__(self, subparsers):
@@ -21,8 +23,15 @@ class ExecuteCommand:
         execute_parser.add_argument(
             "--device-list-file", type=str, help="Path to the device list file"
         )
+        add_shard_arguments(execute_parser)
         execute_parser.set_defaults(func=self.execute)
 
     def execute(self, args):
-        ExecuteTaskModuleRunner(args.command, args.device_list_file).run(dry_run=args.dry_run)
+        ExecuteTaskModuleRunner(
+            args.command,
+            args.device_list_file,
+            shard=args.shard,
+            shard_history=args.shard_history,
+            result_json=args.result_json,
+        ).run(dry_run=args.dry_run)
         pass
\ No newline at end of file
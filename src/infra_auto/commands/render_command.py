@@ -0,0 +1,31 @@
+from infra_auto.task_runners import ExecuteTaskModuleRunner
+
+
+class RenderCommand:
+    def __init__(self, subparsers):
+        # Render command parser
+        render_parser = subparsers.add_parser(
+            "render",
+            help="Render the desired config of a task module for all devices, offline",
+        )
+        render_parser.add_argument(
+            "command",
+            type=str,
+            help="The command module name to render (e.g., baseline_snmp)",
+        )
+        render_parser.add_argument(
+            "--output-dir",
+            "-o",
+            type=str,
+            help="Directory to write the <host>.cfg snippets to",
+            default="rendered",
+        )
+        render_parser.add_argument(
+            "--device-list-file", type=str, help="Path to the device list file"
+        )
+        render_parser.set_defaults(func=self.render)
+
+    def render(self, args):
+        ExecuteTaskModuleRunner(args.command, args.device_list_file).render(
+            args.output_dir
+        )
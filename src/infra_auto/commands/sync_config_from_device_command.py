@@ -1,6 +1,20 @@
+import importlib
+
 from nornir_utils.plugins.functions import print_result
 
+from nornir_tasks import (
+    napalm_sync_config_from_devices,
+    napalm_sync_sections_from_devices,
+)
+
+from ..report import (
+    aggregated_result_to_dict,
+    format_diff_summary,
+    summarize_results,
+    write_result_json,
+)
 from ..task_runners import NornirRunner
+from .common_arguments import add_shard_arguments, add_summary_argument
 
 
 class SyncConfigFromDeviceCommand:
@@ -25,11 +39,46 @@ class SyncConfigFromDeviceCommand:
             help="Path to the config file",
             default="nornir.yaml",
         )
+        sync_from_parser.add_argument(
+            "--module",
+            type=str,
+            help="Only refresh the config sections owned by this baseline module "
+            "(e.g. baseline_snmp) in cfg/",
+        )
+        add_summary_argument(sync_from_parser)
+        add_shard_arguments(sync_from_parser)
 
     def sync_config_from_device(self, args):
+        baseline = None
+        if args.module:
+            baseline = getattr(importlib.import_module(args.module), "baseline", None)
+            if baseline is None or not baseline.sync_sections:
+                print(f"Module {args.module} doesn't declare sections to sync")
+                return
+
         print("Syncing data from remote to local...")
-        nr = NornirRunner(config_file=args.config_file).filter_hosts(
-            args.device_list_file
+        if baseline:
+            task = napalm_sync_sections_from_devices
+        else:
+            task = napalm_sync_config_from_devices
+        nr = (
+            NornirRunner(config_file=args.config_file)
+            .filter_hosts(args.device_list_file)
+            .shard(args.shard, task, args.shard_history)
         )
         nr.print_affect_hosts()
-        print_result(nr.sync_from(dry_run=args.dry_run))
+        if baseline:
+            result = nr.sync_sections_from(
+                baseline.sync_sections,
+                baseline.section_selectors,
+                dry_run=args.dry_run,
+            )
+        else:
+            result = nr.sync_from(dry_run=args.dry_run)
+        if args.summary:
+            groups = summarize_results(aggregated_result_to_dict(result))
+            print(format_diff_summary(groups, result.name))
+        else:
+            print_result(result)
+        if args.result_json:
+            write_result_json(result, args.result_json, args.shard)
@@ -0,0 +1,142 @@
+from collections import Counter
+
+from nornir_tasks import napalm_apply_config_to_devices
+
+from ..task_runners import ExecuteTaskModuleRunner, NornirRunner
+from ..testbed import lease
+from ..testbed.cache import PrecheckCache
+from ..testbed.pool import TestbedPool
+
+
+class TestbedCommand:
+    def __init__(self, subparsers):
+        # Testbed Subparser
+        testbed_parser = subparsers.add_parser(
+            "testbed", help="Commands related to the pre-check testbed"
+        )
+        testbed_subparsers = testbed_parser.add_subparsers(
+            dest="command", required=True
+        )
+
+        # Testbed: clear-cache command
+        testbed_clear_cache_parser = testbed_subparsers.add_parser(
+            "clear-cache", help="Remove cached pre-check results"
+        )
+        testbed_clear_cache_parser.set_defaults(func=self.testbed_clear_cache)
+        testbed_clear_cache_parser.add_argument(
+            "--platform",
+            type=str,
+            help="Only remove the cached results of this platform",
+        )
+
+        # Testbed: warm command
+        testbed_warm_parser = testbed_subparsers.add_parser(
+            "warm",
+            help="Reserve and log into the test machines the pre-checks of the "
+            "changed devices need, ahead of the dry run",
+        )
+        testbed_warm_parser.set_defaults(func=self.testbed_warm)
+        testbed_warm_parser.add_argument(
+            "--device-list-file",
+            type=str,
+            help="Path to the device list file (output of ci detect-changes)",
+        )
+        testbed_warm_parser.add_argument(
+            "--config-file",
+            "-c",
+            type=str,
+            help="Path to the config file",
+            default="nornir.yaml",
+        )
+        testbed_warm_parser.add_argument(
+            "--lease-file",
+            type=str,
+            help="File listing the reserved machines, used by the later jobs",
+            default=lease.default_lease_file,
+        )
+        testbed_warm_parser.add_argument(
+            "--shards",
+            type=int,
+            help="Number of parallel jobs (their --shard i/N), each job only uses "
+            "the machines warmed for its own devices",
+        )
+        testbed_warm_parser.add_argument(
+            "--shard-history",
+            type=str,
+            help="Duration history file of the jobs' --shard-history, to split "
+            "the devices across the shards like they do",
+        )
+        testbed_warm_parser.add_argument(
+            "--module",
+            type=str,
+            help="Task module of the pre-checking jobs (infra-auto execute), "
+            "apply-cfg-to-device when not set",
+        )
+
+        # Testbed: release command
+        testbed_release_parser = testbed_subparsers.add_parser(
+            "release", help="Release the pre-warmed machines no pre-check used"
+        )
+        testbed_release_parser.set_defaults(func=self.testbed_release)
+        testbed_release_parser.add_argument(
+            "--lease-file",
+            type=str,
+            help="File listing the reserved machines",
+            default=lease.default_lease_file,
+        )
+
+    def testbed_clear_cache(self, args):
+        cache = PrecheckCache()
+        removed = cache.clear(args.platform)
+        print(f"Removed {removed} cached pre-check results from {cache.cache_dir}")
+
+    def _precheck_hosts(self, args, shard=None):
+        """
+        Hosts the pre-checking job of ``shard`` runs on, selected the way
+        that job selects them
+        """
+        if args.module:
+            hosts = ExecuteTaskModuleRunner(
+                args.module,
+                args.device_list_file,
+                shard=shard,
+                shard_history=args.shard_history,
+            ).selected_hosts()
+        else:
+            nr = (
+                NornirRunner(config_file=args.config_file)
+                .filter_hosts(args.device_list_file)
+                .shard(shard, napalm_apply_config_to_devices, args.shard_history)
+            )
+            hosts = nr.nornir.inventory.hosts.values()
+        return [host for host in hosts if "version" in host.data]
+
+    def testbed_warm(self, args):
+        if args.shards:
+            shards = [f"{index}/{args.shards}" for index in range(1, args.shards + 1)]
+        else:
+            shards = [None]
+
+        pool = TestbedPool(lease_file=args.lease_file)
+        warmed = []
+        for shard in shards:
+            requirements = Counter(
+                (host.platform, host.data["version"])
+                for host in self._precheck_hosts(args, shard)
+            )
+            if requirements:
+                warmed.extend(pool.warm(requirements, shard=shard))
+        if not warmed:
+            print("No machine was warmed")
+            return
+
+        for leased in warmed:
+            print(
+                f"Reserved {leased['machine'].get('serial')} for "
+                f"{leased['platform']} {leased['version']}"
+            )
+        print(f"Wrote {len(warmed)} pre-warmed machines to {args.lease_file}")
+
+    def testbed_release(self, args):
+        released = lease.release_leases(args.lease_file)
+        print(f"Released {released} pre-warmed machines")
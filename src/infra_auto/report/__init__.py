@@ -0,0 +1,28 @@
+"""Helpers to export, merge and format the results of Nornir runs."""
+
+from .diff_summary import format_diff_summary, summarize_results
+from .mr_report import (
+    build_report_notes,
+    build_summary_notes,
+    plan_report_notes,
+    split_host_sections,
+)
+from .results import (
+    aggregated_result_to_dict,
+    format_result_report,
+    merge_result_files,
+    write_result_json,
+)
+
+__all__ = [
+    "format_diff_summary",
+    "summarize_results",
+    "build_report_notes",
+    "build_summary_notes",
+    "plan_report_notes",
+    "split_host_sections",
+    "aggregated_result_to_dict",
+    "format_result_report",
+    "merge_result_files",
+    "write_result_json",
+]
@@ -0,0 +1,158 @@
+import hashlib
+import ipaddress
+import re
+from typing import Dict, Iterable, List, Optional
+
+from nornir.core.inventory import Host
+
+host_placeholder = "<host>"
+ip_placeholder = "<ip>"
+
+# line numbers of unified diff hunks differ with the size of each config
+hunk_header_regex = re.compile(r"^@@ .* @@", re.MULTILINE)
+ip_like_regex = re.compile(r"[0-9A-Fa-f:.]*[.:][0-9A-Fa-f:.]+")
+
+
+def _ip_addresses(value) -> Iterable[str]:
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _ip_addresses(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _ip_addresses(item)
+    elif isinstance(value, str):
+        for candidate in ip_like_regex.findall(value):
+            try:
+                yield str(ipaddress.ip_address(candidate))
+            except ValueError:
+                pass
+
+
+def host_tokens(host: Host) -> List[str]:
+    """
+    Strings specific to a host, replaced by placeholders before the diffs of
+    several hosts are compared: its names, its management address and the
+    addresses of its own inventory data (not the inherited group data, which
+    hosts share)
+    """
+    tokens = {host.name, host.name.split(".")[0]}
+    if host.hostname:
+        tokens.add(host.hostname)
+    tokens.update(_ip_addresses(host.data))
+    return sorted(tokens)
+
+
+def normalize_text(text: str, tokens: Iterable[str]) -> str:
+    """
+    Replace the host specific tokens of a diff with placeholders
+    """
+    text = hunk_header_regex.sub("@@", text)
+    # longest first, so a FQDN is replaced before its short name
+    for token in sorted(set(tokens), key=len, reverse=True):
+        if not token:
+            continue
+        try:
+            ipaddress.ip_address(token)
+            placeholder = ip_placeholder
+        except ValueError:
+            placeholder = host_placeholder
+        text = re.sub(rf"(?<![\w.-]){re.escape(token)}(?![\w-])", placeholder, text)
+    return text
+
+
+def host_text(host_data: dict) -> str:
+    """
+    The diff of the task of a host followed by the errors of its failed
+    tasks, as laid out in ``aggregated_result_to_dict``
+    """
+    results = host_data["results"]
+    parts = []
+    if results and results[0]["diff"]:
+        parts.append(results[0]["diff"].strip("\n"))
+    for result in results:
+        if result["failed"]:
+            error = result["exception"] or result["result"]
+            parts.append(f"{result['name']} failed: {error}")
+    return "\n".join(parts)
+
+
+class DiffGroup:
+    """
+    Hosts whose diffs are identical once normalized
+    """
+
+    def __init__(self, text: str, failed: bool, example: str):
+        self.key = hashlib.sha256(text.encode()).hexdigest()
+        self.text = text
+        self.failed = failed
+        # the text of the first host before normalization, shown for outliers
+        self.example = example
+        self.hosts: List[str] = []
+
+    @property
+    def changed(self) -> bool:
+        # the text of failed hosts holds their errors
+        return bool(self.text) and not self.failed
+
+
+def summarize_results(
+    data: dict, tokens: Optional[Dict[str, List[str]]] = None
+) -> List[DiffGroup]:
+    """
+    Group the hosts of a result (``aggregated_result_to_dict`` or merged
+    shard results) by normalized diff, largest groups first.
+
+    Host tokens come from ``tokens`` or the ``host_tokens`` saved with each
+    host, the host name alone otherwise.
+    """
+    groups: Dict[str, DiffGroup] = {}
+    for host, host_data in data["hosts"].items():
+        text = host_text(host_data)
+        names = (tokens or {}).get(host) or host_data.get("host_tokens")
+        normalized = normalize_text(text, names or [host])
+        failed = host_data["failed"]
+
+        group_id = f"{failed}:{normalized}"
+        if group_id not in groups:
+            groups[group_id] = DiffGroup(normalized, failed, text)
+        groups[group_id].hosts.append(host)
+
+    return sorted(groups.values(), key=lambda group: (-len(group.hosts), group.key))
+
+
+def summary_title(group: DiffGroup) -> str:
+    count = len(group.hosts)
+    if group.failed:
+        return f"{count} devices failed with this error"
+    if not group.changed:
+        return f"{count} devices without changes"
+    return f"{count} devices share this diff"
+
+
+def format_diff_summary(groups: List[DiffGroup], task: str = "") -> str:
+    """
+    Render grouped diffs as text: the groups shared by several hosts, then
+    the outliers with their own diff
+    """
+    hosts = sum(len(group.hosts) for group in groups)
+    failed = sum(len(group.hosts) for group in groups if group.failed)
+    shared = [group for group in groups if len(group.hosts) > 1]
+    outliers = [group for group in groups if len(group.hosts) == 1]
+
+    lines = [
+        f"{task + ': ' if task else ''}{hosts} devices, "
+        f"{sum(1 for group in groups if group.changed)} distinct diffs, "
+        f"{failed} failed"
+    ]
+    for group in shared:
+        lines.append(f"==== {summary_title(group)} ({group.key[:8]}) ====")
+        lines.append(", ".join(group.hosts))
+        if group.text:
+            lines.append(group.text)
+    if outliers:
+        lines.append("==== Outliers ====")
+    for group in outliers:
+        host = group.hosts[0]
+        lines.append(f"* {host}{' (failed)' if group.failed else ''}")
+        lines.append(group.example or "No changes")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,246 @@
+import gzip
+import html
+import os
+import re
+from typing import Iterable, List, Optional, Tuple
+
+from .diff_summary import DiffGroup, host_placeholder, ip_placeholder, summary_title
+
+# GitLab rejects notes above 1,000,000 characters, smaller notes also render
+# faster in the merge request
+default_max_note_size = 200_000
+# above this size the report is attached as a compressed artifact
+default_artifact_threshold = 2_000_000
+# notes posted before the rest of a large report goes to the artifact
+default_max_notes = 5
+# the artifact of the compressed report, relative to the job's directory
+default_artifact_path = "nornir-report.txt.gz"
+
+ansi_escape_regex = re.compile(r"\x1b\[[0-9;]*m")
+host_header_regex = re.compile(r"^\* (\S+) \*\* changed : (True|False) \*+")
+failed_line_regex = re.compile(r" ERROR$")
+
+
+def split_host_sections(report: str) -> Tuple[str, List[Tuple[str, bool, str]]]:
+    """
+    Split a report laid out like Nornir's print_result into the lines
+    before the first host and the (host, failed, section) of each host
+    """
+    header = []
+    sections: List[Tuple[str, bool, str]] = []
+    host = None
+    failed = False
+    lines: List[str] = []
+
+    for line in ansi_escape_regex.sub("", report).splitlines():
+        match = host_header_regex.match(line)
+        if match:
+            if host is not None:
+                sections.append((host, failed, "\n".join(lines)))
+            host, failed, lines = match.group(1), False, [line]
+            continue
+        if host is None:
+            header.append(line)
+        else:
+            failed = failed or bool(failed_line_regex.search(line))
+            lines.append(line)
+
+    if host is not None:
+        sections.append((host, failed, "\n".join(lines)))
+    return "\n".join(header), sections
+
+
+def _fence(text: str) -> str:
+    # a fence longer than any backtick run of the text
+    longest = max((len(run) for run in re.findall(r"`+", text)), default=0)
+    fence = "`" * max(3, longest + 1)
+    return f"{fence}\n{text}\n{fence}"
+
+
+def _details(summary: str, body: str) -> str:
+    return (
+        f"<details><summary>{html.escape(summary)}</summary>\n\n{body}\n\n</details>\n"
+    )
+
+
+def _split_notes(
+    title: str,
+    intro: str,
+    blocks: Iterable[Tuple[str, str, str]],
+    max_note_size: int,
+) -> List[str]:
+    """
+    Notes made of the intro followed by a collapsed block for each
+    (summary, text, fenced text), split so no note exceeds
+    ``max_note_size`` characters
+    """
+    # room for the part counter of the next notes, and for a block next to
+    # the intro
+    counter_size = len(title) + 20
+    block_size = max_note_size - max(len(intro), counter_size) - 200
+    notes = []
+    current = intro
+    has_block = False
+    for summary, text, fenced in blocks:
+        if len(text) > block_size // 4:
+            text = text[: block_size // 4] + " ... (truncated)\n\n"
+        fenced_size = block_size - len(summary) - len(text)
+        if len(fenced) > fenced_size:
+            fenced = fenced[:fenced_size] + "\n... (truncated, see the job log)"
+        block = _details(summary, text + _fence(fenced))
+        if has_block and len(current) + len(block) + counter_size > max_note_size:
+            notes.append(current)
+            current = ""
+        current += block
+        has_block = True
+    notes.append(current)
+    return notes
+
+
+def _number_notes(title: str, notes: List[str]) -> List[str]:
+    # the first note starts with the title, the next ones with a part counter
+    return [
+        note if i == 0 else f"{title} ({i + 1}/{len(notes)})\n\n{note}"
+        for i, note in enumerate(notes)
+    ]
+
+
+def _intro(title: str, hosts: int, failed: List[str]) -> str:
+    intro = f"{title}\n\n{hosts} devices"
+    if failed:
+        intro += f", {len(failed)} failed: {', '.join(failed[:50])}"
+        if len(failed) > 50:
+            intro += f" and {len(failed) - 50} more"
+    return intro + "\n\n"
+
+
+def build_report_notes(
+    report: str,
+    title: str = "### Nornir Dry Run Output",
+    max_note_size: int = default_max_note_size,
+    numbered: bool = True,
+) -> List[str]:
+    """
+    Markdown notes of a report, each device in a collapsed block, split so
+    no note exceeds ``max_note_size`` characters. The notes after the first
+    one start with a part counter unless ``numbered`` is False.
+    """
+    header, sections = split_host_sections(report)
+    if not sections:
+        return [f"{title}\n{_fence(report)}\n"]
+
+    failed = [host for host, host_failed, _ in sections if host_failed]
+    intro = _intro(title, len(sections), failed)
+    if header.strip():
+        intro += _fence(header) + "\n\n"
+
+    blocks = (
+        (f"{host}{' (failed)' if host_failed else ''}", "", section)
+        for host, host_failed, section in sections
+    )
+    notes = _split_notes(title, intro, blocks, max_note_size)
+    return _number_notes(title, notes) if numbered else notes
+
+
+def build_summary_notes(
+    groups: List[DiffGroup],
+    title: str = "### Nornir Dry Run Output",
+    max_note_size: int = default_max_note_size,
+    numbered: bool = True,
+) -> List[str]:
+    """
+    Markdown notes of the diffs grouped by ``summarize_results``: a
+    collapsed block for each diff shared by several devices, listing them,
+    then one for each outlier
+    """
+    failed = [host for group in groups if group.failed for host in group.hosts]
+    intro = _intro(title, sum(len(group.hosts) for group in groups), failed)
+    intro += (
+        f"{sum(1 for group in groups if group.changed)} distinct diffs, "
+        f"`{host_placeholder}` and `{ip_placeholder}` stand for the name and "
+        "the addresses of each device\n\n"
+    )
+
+    shared = [group for group in groups if len(group.hosts) > 1]
+    outliers = [group for group in groups if len(group.hosts) == 1]
+    blocks = [
+        (
+            summary_title(group),
+            ", ".join(group.hosts) + "\n\n",
+            group.text or "No changes",
+        )
+        for group in shared
+    ] + [
+        (
+            f"{group.hosts[0]}{' (failed)' if group.failed else ''}",
+            "",
+            group.example or "No changes",
+        )
+        for group in outliers
+    ]
+    notes = _split_notes(title, intro, blocks, max_note_size)
+    return _number_notes(title, notes) if numbered else notes
+
+
+def write_report_artifact(report: str, path: str) -> str:
+    """
+    Write the report gzip compressed, returns the URL of the artifact of
+    the current CI job when known, the path otherwise
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(path, "wt") as f:
+        f.write(ansi_escape_regex.sub("", report))
+
+    job_url = os.environ.get("CI_JOB_URL")
+    if job_url:
+        return f"{job_url}/artifacts/raw/{path}"
+    return path
+
+
+def plan_report_notes(
+    report: str,
+    title: str = "### Nornir Dry Run Output",
+    max_note_size: int = default_max_note_size,
+    artifact_threshold: int = default_artifact_threshold,
+    max_notes: int = default_max_notes,
+    artifact_path: Optional[str] = None,
+    groups: Optional[List[DiffGroup]] = None,
+) -> List[str]:
+    """
+    Notes to post for a report. A report above ``artifact_threshold``
+    characters, or needing more than ``max_notes`` notes, is written to
+    ``artifact_path`` and only its first notes are posted with a link to it.
+    Without ``artifact_path`` the same notes are posted, pointing to the job
+    log instead.
+
+    With the ``groups`` of ``summarize_results`` the grouped diffs are posted
+    instead of the report, which is only written to the artifact when they
+    need more than ``max_notes`` notes.
+    """
+    if groups is not None:
+        notes = build_summary_notes(groups, title, max_note_size, numbered=False)
+        too_large = len(notes) > max_notes
+    else:
+        notes = build_report_notes(report, title, max_note_size, numbered=False)
+        too_large = len(report) > artifact_threshold or len(notes) > max_notes
+    if not too_large:
+        return _number_notes(title, notes)
+
+    _, sections = split_host_sections(report)
+    notice = (
+        f"{title}\n\nThe report of {len(sections)} devices is "
+        f"{len(report) // 1000} kB"
+    )
+    kept = notes[: max_notes - 1]
+    if artifact_path:
+        link = write_report_artifact(report, artifact_path)
+        name = os.path.basename(artifact_path)
+        notice += f", the full report is in [{name}]({link}).\n"
+    else:
+        notice += (
+            f", only the first {len(kept)} of its {len(notes)} notes are "
+            "posted, the full report is in the job log.\n"
+        )
+    return _number_notes(title, [notice] + kept)
@@ -0,0 +1,94 @@
+import json
+from typing import Dict, List, Optional
+
+from nornir.core.task import AggregatedResult, Result
+
+from .diff_summary import host_tokens
+
+
+def _result_to_dict(result: Result) -> dict:
+    exception = result.exception
+    return {
+        "name": result.name,
+        "changed": result.changed,
+        "failed": result.failed,
+        "diff": result.diff or "",
+        "result": "" if result.result is None else str(result.result),
+        "exception": None if exception is None else repr(exception),
+    }
+
+
+def aggregated_result_to_dict(result: AggregatedResult) -> dict:
+    """
+    Convert the result of a Nornir run into plain JSON serializable data
+    """
+    hosts = {}
+    for host, multi_result in result.items():
+        hosts[host] = {
+            "changed": multi_result.changed,
+            "failed": multi_result.failed,
+            "results": [_result_to_dict(r) for r in multi_result],
+        }
+        if multi_result and multi_result[0].host is not None:
+            # to compare the diffs of several hosts, see diff_summary
+            hosts[host]["host_tokens"] = host_tokens(multi_result[0].host)
+    return {"task": result.name, "hosts": hosts}
+
+
+def write_result_json(
+    result: AggregatedResult, path: str, shard: Optional[str] = None
+) -> None:
+    data = aggregated_result_to_dict(result)
+    data["shards"] = [shard] if shard else []
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def merge_result_files(paths: List[str]) -> dict:
+    """
+    Merge the JSON results written by the shards of one job into one result.
+    A host present in several files keeps the result of the last file.
+    """
+    merged: Dict = {"task": None, "shards": [], "hosts": {}}
+    for path in paths:
+        with open(path, "r") as f:
+            data = json.load(f)
+
+        if merged["task"] is None:
+            merged["task"] = data["task"]
+        elif data["task"] != merged["task"]:
+            raise ValueError(
+                f"Cannot merge results of task {data['task']} from {path} "
+                f"into results of task {merged['task']}"
+            )
+
+        merged["shards"].extend(data.get("shards", []))
+        merged["hosts"].update(data["hosts"])
+
+    merged["hosts"] = dict(sorted(merged["hosts"].items()))
+    return merged
+
+
+def _title(msg: str, fill: str) -> str:
+    return msg + fill * (80 - len(msg))
+
+
+def format_result_report(data: dict) -> str:
+    """
+    Render merged result data as text, laid out like Nornir's print_result
+    so it can be posted with ``ci report-diff-to-mr``.
+    """
+    lines = [_title(str(data["task"]), "*")]
+    for host, host_data in data["hosts"].items():
+        lines.append(_title(f"* {host} ** changed : {host_data['changed']} ", "*"))
+        for index, result in enumerate(host_data["results"]):
+            symbol = "v" if index == 0 else "-"
+            level = "ERROR" if result["failed"] else "INFO"
+            msg = f"{symbol * 4} {result['name']} ** changed : {result['changed']} "
+            lines.append(f"{_title(msg, symbol)} {level}")
+            for attribute in ["diff", "result"]:
+                if result[attribute]:
+                    lines.append(result[attribute])
+        if host_data["results"]:
+            lines.append(_title(f"^^^^ END {host_data['results'][0]['name']} ", "^"))
+    return "\n".join(lines) + "\n"
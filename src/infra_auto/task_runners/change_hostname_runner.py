@@ -1,6 +1,4 @@
-import difflib
 import os
-import re
 from typing import Dict, List
 
 from nornir import InitNornir
@@ -11,6 +9,9 @@ from nornir_utils.plugins.functions import print_result
 from nornir_tasks.napalm_sync_config_from_devices import (
     napalm_sync_config_from_devices,
 )
+from nornir_tasks.netmiko_bulk_push import bulk_push, select_push_mode
+
+from .hostname_rename_engine import HostnameRenameEngine, RenameJournal
 
 
 class ChangeHostnameTaskRunner:
@@ -21,8 +22,6 @@ class ChangeHostnameTaskRunner:
         # build old/new hostname mapping
         self._mapping = {}
 
-        self.hosts_yaml_backup = None
-
         for host in hosts:
             self._mapping[host["host"]] = host["new"]
 
@@ -42,71 +41,49 @@ class ChangeHostnameTaskRunner:
 
         return True
 
-    def _change_hosts_yaml(self, dry_run: bool = False):
-        with open("./inventory/hosts.yaml", "r") as hosts_file:
-            hosts_content = hosts_file.read()
-
-        old_content = hosts_content
-        self.hosts_yaml_backup = old_content
-
-        for old_host, new_host in self._mapping.items():
-            # use regex to replace host
-            # the pattern is ^${host}:$
-            hosts_content = re.sub(
-                f"^{re.escape(old_host)}:$",
-                f"{new_host}:",
-                hosts_content,
-                flags=re.MULTILINE,
-            )
-
-        if dry_run:
-            d = difflib.Differ()
-            diff = d.compare(
-                old_content.splitlines(keepends=True),
-                hosts_content.splitlines(keepends=True),
-            )
-
-            # filter diff to only show changes
-            diff = [
-                line for line in diff if line.startswith("+ ") or line.startswith("- ")
-            ]
-
-            print("changes of hosts.yaml:")
-            print("".join(diff))
-            return
-
-        with open("./inventory/hosts.yaml", "w") as hosts_file:
-            hosts_file.write(hosts_content)
-
-    def _rollback_hosts_yaml(self):
-        if self.hosts_yaml_backup is not None:
-            with open("./inventory/hosts.yaml", "w") as hosts_file:
-                hosts_file.write(self.hosts_yaml_backup)
+    def check_new_host(self, host: str):
+        # the new name must be free: cfg files are renamed in parallel, so a
+        # name being renamed away (swaps, chains) isn't accepted either
+        if host in self._mapping:
+            return False
+        if self._nornir.inventory.hosts.get(host) is not None:
+            return False
+        if os.path.exists(f"./cfg/{host}.cfg"):
+            return False
 
-    def _change_cfg_filename(self, dry_run: bool = False):
-        for old_host, new_host in self._mapping.items():
-            if dry_run:
-                print(f"rename {old_host}.cfg to {new_host}.cfg")
-            else:
-                os.rename(f"./cfg/{old_host}.cfg", f"./cfg/{new_host}.cfg")
+        return True
 
-    def _rollback_cfg_filename(self):
-        for old_host, new_host in self._mapping.items():
-            os.rename(f"./cfg/{new_host}.cfg", f"./cfg/{old_host}.cfg")
+    def _build_engine(self) -> HostnameRenameEngine:
+        platforms = {
+            host: self._nornir.inventory.hosts[host].platform
+            for host in self._old_hosts
+        }
+        return HostnameRenameEngine(self._mapping, platforms)
 
     def _run_change_hostname_task(self):
         mapping = self._mapping
 
         def change_hostname(task: Task, dry_run: bool = False) -> Result:
             new_hostname = mapping[task.host.name]
+            result = ""
             if task.host.platform in ["ios", "nxos_ssh", "iosxr", "hp_comware"]:
                 if not task.is_dry_run(dry_run):
                     conn = task.host.get_connection("netmiko", task.nornir.config)
-                    result = conn.send_config_set(
-                        [
-                            f"hostname {new_hostname}",
-                        ]
+                    commands = [f"hostname {new_hostname}"]
+                    report = bulk_push(
+                        conn,
+                        task.host.platform,
+                        commands,
+                        mode=select_push_mode(task.host),
                     )
+                    result = f"{report.summary(len(commands))}\n{report.output}"
+                    if not report.verified:
+                        return Result(
+                            host=task.host,
+                            result=f"{result}\nhostname not applied",
+                            changed=True,
+                            failed=True,
+                        )
             return Result(host=task.host, result=result, changed=True)
 
         result = self._nornir.filter(
@@ -129,23 +106,55 @@ class ChangeHostnameTaskRunner:
             if not self.check_host(host):
                 print(f"check failed: {host}")
                 all_ok = False
+        for host in self._mapping.values():
+            if not self.check_new_host(host):
+                print(f"check failed: new hostname {host} already in use")
+                all_ok = False
 
         if all_ok:
+            engine = self._build_engine()
+
+            if dry_run:
+                engine.preview()
+                return
+
+            if engine.journal.exists():
+                print(
+                    f"Journal {engine.journal.path} from an interrupted run exists, "
+                    "run with --rollback first"
+                )
+                return
+
             # do task
-            # 1. change hosts.yaml
-            self._change_hosts_yaml(dry_run)
-            # 2. change cfg/ filename
-            self._change_cfg_filename(dry_run)
-
-            if not dry_run:
-                # 3. change all config,
-                result = self._run_change_hostname_task()
-                # if result has any failed, restore hosts.yaml
-                if result.failed:
-                    print("Some tasks failed, rolling back changes...")
-                    self._rollback_hosts_yaml()
-                    self._rollback_cfg_filename()
-                    print("Rollback completed.")
-                    return
-                # 4. use new config to run sync from change devices
-                self._run_sync_from_task()
+            # 1. change hosts.yaml and cfg/ files (filename and hostname line)
+            try:
+                engine.apply()
+            except Exception as e:
+                print(f"Failed to change local files ({e}), rolling back changes...")
+                engine.rollback()
+                print("Rollback completed.")
+                return
+
+            # 2. change all config,
+            result = self._run_change_hostname_task()
+            # if result has any failed, replay the journal to restore files
+            if result.failed:
+                print("Some tasks failed, rolling back changes...")
+                engine.rollback()
+                print("Rollback completed.")
+                return
+            engine.commit()
+            # 3. use new config to run sync from change devices
+            self._run_sync_from_task()
+
+    @staticmethod
+    def rollback_journal():
+        """
+        Roll back the local file changes recorded by an interrupted run
+        """
+        journal = RenameJournal()
+        if not journal.exists():
+            print("No hostname change journal found, nothing to roll back.")
+            return
+        count = journal.replay_rollback()
+        print(f"Rolled back {count} journaled changes.")
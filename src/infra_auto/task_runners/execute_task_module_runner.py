@@ -1,20 +1,42 @@
 import importlib
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 from nornir_utils.plugins.functions import print_result
 
+from infra_auto.report import write_result_json
+from infra_auto.testbed.pool import TestbedPool
+
 
 class ExecuteTaskModuleRunner:
-    def __init__(self, task_module_name: str, device_list_file: str = None):
+    def __init__(
+        self,
+        task_module_name: str,
+        device_list_file: str = None,
+        shard: str = None,
+        shard_history: str = None,
+        result_json: str = None,
+    ):
         self.device_list_file = device_list_file
+        self.shard = shard
+        self.shard_history = shard_history
+        self.result_json = result_json
         self.module_name = task_module_name
         # dynamic import of the command module
         importlib.import_module(task_module_name)
 
+        # modules declaring a BaselineModule get its task, filter and render,
+        # others provide their own functions
+        task_module = getattr(sys.modules[task_module_name], "baseline", None)
+        if task_module is None:
+            task_module = sys.modules[task_module_name]
+
         # get filter function in the command module
-        self.filter_func = getattr(sys.modules[task_module_name], "filter_hosts", None)
-        self.task_func = getattr(sys.modules[task_module_name], "task", None)
+        self.filter_func = getattr(task_module, "filter_hosts", None)
+        self.task_func = getattr(task_module, "task", None)
+        self.render_func = getattr(task_module, "render_hosts", None)
+        self.clear_cache_func = getattr(task_module, "clear_render_cache", None)
 
         # get module path
         module_path = os.path.dirname(sys.modules[task_module_name].__file__)
@@ -22,7 +44,7 @@ class ExecuteTaskModuleRunner:
         self.group_vars_path = os.path.join(module_path, "vars/groups.yaml")
         self.host_vars_path = os.path.join(module_path, "vars/hosts.yaml")
 
-    def run(self, dry_run: bool = False):
+    def _build_nornir_runner(self):
         task_runner = importlib.import_module('infra_auto.task_runners')
         nr_runner = task_runner.NornirRunner()
         # load group vars and host vars
@@ -30,9 +52,51 @@ class ExecuteTaskModuleRunner:
         nr_runner.load_host_vars(self.module_name, self.host_vars_path)
 
         if self.device_list_file:
-            nr_runner.filter_hosts(self.device_list_file)
+            nr_runner = nr_runner.filter_hosts(self.device_list_file)
         nr_runner.nornir = nr_runner.nornir.filter(filter_func=self.filter_func)
+        nr_runner = nr_runner.shard(self.shard, self.task_func, self.shard_history)
         nr_runner.print_affect_hosts()
+        return nr_runner
+
+    def selected_hosts(self):
+        """
+        Hosts a run of the module would run on (and precheck)
+        """
+        return list(self._build_nornir_runner().nornir.inventory.hosts.values())
+
+    def render(self, output_dir: str, num_workers: int = 16):
+        """
+        Render the desired config snippet of every selected host into
+        ``<output_dir>/<host>.cfg`` without connecting to any device
+        """
+        if self.render_func is None:
+            raise ValueError(f"Module {self.module_name} has no render_hosts function")
+
+        nr_runner = self._build_nornir_runner()
+        rendered = self.render_func(nr_runner.nornir.inventory.hosts.values())
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        def write_snippet(item):
+            host_name, config = item
+            with open(os.path.join(output_dir, f"{host_name}.cfg"), "w") as f:
+                f.write("\n".join(config) + "\n")
+
+        with ThreadPoolExecutor(num_workers) as pool:
+            list(pool.map(write_snippet, rendered.items()))
+
+        print(f"Rendered {len(rendered)} hosts into {output_dir}")
+        return rendered
+
+    def run(self, dry_run: bool = False):
+        nr_runner = self._build_nornir_runner()
+        if self.clear_cache_func:
+            # vars or templates may have changed since a previous run
+            self.clear_cache_func()
 
-        result = nr_runner.nornir.run(task=self.task_func, dry_run=dry_run)
-        print_result(result)
\ No newline at end of file
+        # prechecks of all hosts share the reserved test machines
+        with TestbedPool(shard=self.shard):
+            result = nr_runner.nornir.run(task=self.task_func, dry_run=dry_run)
+        print_result(result)
+        if self.result_json:
+            write_result_json(result, self.result_json, self.shard)
\ No newline at end of file
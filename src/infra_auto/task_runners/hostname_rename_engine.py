@@ -0,0 +1,193 @@
+import difflib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from config_utils import replace_config_hostname
+
+HOSTS_YAML_PATH = "./inventory/hosts.yaml"
+CFG_DIR = "./cfg"
+JOURNAL_PATH = "./.change_hostname_journal.jsonl"
+
+
+def rename_hosts_yaml_content(content: str, mapping: Dict[str, str]) -> str:
+    """
+    Rename every top level host key of a hosts.yaml content in a single pass.
+
+    Only lines that are exactly ``<old_host>:`` are renamed, the same rule
+    the previous per-host ``^old:$`` regex applied.
+    """
+    renamed_lines = []
+    for line in content.splitlines(keepends=True):
+        stripped = line.rstrip("\r\n")
+        if stripped.endswith(":") and stripped[:-1] in mapping:
+            line_ending = line[len(stripped) :]
+            line = f"{mapping[stripped[:-1]]}:{line_ending}"
+        renamed_lines.append(line)
+    return "".join(renamed_lines)
+
+
+class RenameJournal:
+    """
+    Append-only journal of the filesystem changes made by a bulk rename.
+
+    Every change is flushed to disk as one JSON line before the next one is
+    made, so an interrupted run can still be rolled back by replaying the
+    journal in reverse.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def record(self, entry: dict):
+        with self._lock:
+            with open(self.path, "a") as journal_file:
+                journal_file.write(json.dumps(entry) + "\n")
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+
+    def entries(self) -> List[dict]:
+        if not self.exists():
+            return []
+        with open(self.path, "r") as journal_file:
+            return [json.loads(line) for line in journal_file if line.strip()]
+
+    def discard(self):
+        if self.exists():
+            os.remove(self.path)
+
+    def replay_rollback(self) -> int:
+        """
+        Undo every journaled change, newest first, and remove the journal.
+        Returns the number of entries rolled back.
+        """
+        entries = self.entries()
+        for entry in reversed(entries):
+            if entry["op"] == "write_file":
+                with open(entry["path"], "w") as f:
+                    f.write(entry["backup"])
+            elif entry["op"] == "rename_cfg":
+                self._rollback_rename_cfg(entry)
+            else:
+                raise ValueError(f"Unknown journal operation: {entry['op']}")
+        self.discard()
+        return len(entries)
+
+    def _rollback_rename_cfg(self, entry: dict):
+        if not os.path.exists(entry["dst"]):
+            # the rename itself never happened
+            return
+
+        if entry["replaced_lines"]:
+            with open(entry["dst"], "r") as f:
+                lines = f.read().split("\n")
+            for index, original_line in entry["replaced_lines"]:
+                lines[index] = original_line
+            with open(entry["dst"], "w") as f:
+                f.write("\n".join(lines))
+
+        os.rename(entry["dst"], entry["src"])
+
+
+class HostnameRenameEngine:
+    """
+    Apply a whole old/new hostname mapping to the repository at once:
+    ``inventory/hosts.yaml`` is rewritten in one pass and the ``cfg/`` files
+    are renamed and get their hostname/sysname lines rewritten in parallel.
+    """
+
+    def __init__(
+        self,
+        mapping: Dict[str, str],
+        platforms: Dict[str, str],
+        journal: Optional[RenameJournal] = None,
+        num_workers: int = 16,
+    ):
+        self._mapping = mapping
+        self._platforms = platforms
+        self.journal = journal or RenameJournal()
+        self.num_workers = num_workers
+
+    def preview(self):
+        with open(HOSTS_YAML_PATH, "r") as hosts_file:
+            old_content = hosts_file.read()
+        new_content = rename_hosts_yaml_content(old_content, self._mapping)
+
+        diff = difflib.Differ().compare(
+            old_content.splitlines(keepends=True),
+            new_content.splitlines(keepends=True),
+        )
+        # filter diff to only show changes
+        diff = [line for line in diff if line.startswith("+ ") or line.startswith("- ")]
+
+        print("changes of hosts.yaml:")
+        print("".join(diff))
+
+        for old_host, new_host in self._mapping.items():
+            print(f"rename {old_host}.cfg to {new_host}.cfg")
+
+    def apply(self):
+        if self.journal.exists():
+            raise RuntimeError(
+                f"Journal {self.journal.path} from a previous run exists, "
+                "roll it back before starting a new rename"
+            )
+
+        self._apply_hosts_yaml()
+
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            # list() re-raises the first exception of any worker
+            list(pool.map(self._apply_cfg, self._mapping.items()))
+
+    def rollback(self) -> int:
+        return self.journal.replay_rollback()
+
+    def commit(self):
+        self.journal.discard()
+
+    def _apply_hosts_yaml(self):
+        with open(HOSTS_YAML_PATH, "r") as hosts_file:
+            old_content = hosts_file.read()
+
+        new_content = rename_hosts_yaml_content(old_content, self._mapping)
+
+        self.journal.record(
+            {"op": "write_file", "path": HOSTS_YAML_PATH, "backup": old_content}
+        )
+        with open(HOSTS_YAML_PATH, "w") as hosts_file:
+            hosts_file.write(new_content)
+
+    def _apply_cfg(self, hosts: Tuple[str, str]):
+        old_host, new_host = hosts
+        src = os.path.join(CFG_DIR, f"{old_host}.cfg")
+        dst = os.path.join(CFG_DIR, f"{new_host}.cfg")
+
+        with open(src, "r") as f:
+            lines = f.read().split("\n")
+        new_lines = replace_config_hostname(
+            self._platforms.get(old_host, ""), lines, new_host
+        )
+        replaced_lines = [
+            (index, old_line)
+            for index, (old_line, new_line) in enumerate(zip(lines, new_lines))
+            if old_line != new_line
+        ]
+
+        self.journal.record(
+            {
+                "op": "rename_cfg",
+                "src": src,
+                "dst": dst,
+                "replaced_lines": replaced_lines,
+            }
+        )
+        os.rename(src, dst)
+        if replaced_lines:
+            with open(dst, "w") as f:
+                f.write("\n".join(new_lines))
@@ -1,11 +1,18 @@
 import os
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 
 import yaml
 from nornir import InitNornir
 from nornir.core.filter import F
 
-from nornir_tasks import napalm_apply_config_to_devices, napalm_sync_config_from_devices
+from nornir_runners import DurationHistory
+from nornir_tasks import (
+    napalm_apply_config_to_devices,
+    napalm_sync_config_from_devices,
+    napalm_sync_sections_from_devices,
+)
+
+from .shard import select_shard
 
 
 class NornirRunner:
@@ -73,6 +80,30 @@ class NornirRunner:
 
         return NornirRunner(nornir=filtered_nr)
 
+    def shard(
+        self,
+        shard: Optional[str],
+        task: Callable,
+        history_file: Optional[str] = None,
+    ):
+        """
+        Keep only the hosts of shard ``i/N``. With a duration history file the
+        shards are balanced by the recorded durations of ``task``.
+        """
+        if not shard:
+            return self
+
+        hosts = list(self.nornir.inventory.hosts.values())
+        durations = None
+        if history_file:
+            durations = DurationHistory(history_file).estimates(task.__name__, hosts)
+
+        selected = select_shard([host.name for host in hosts], shard, durations)
+        print(f"Shard {shard}: {len(selected)} of {len(hosts)} devices")
+        filtered_nr = self.nornir.filter(F(name__in=set(selected)))
+
+        return NornirRunner(nornir=filtered_nr)
+
     def print_affect_hosts(self):
         """
         Print all affected hosts
@@ -83,5 +114,28 @@ class NornirRunner:
     def sync_from(self, dry_run: Optional[bool] = False):
         return self.nornir.run(task=napalm_sync_config_from_devices, dry_run=dry_run)
 
-    def apply_to(self, dry_run: Optional[bool] = False):
-        return self.nornir.run(task=napalm_apply_config_to_devices, dry_run=dry_run)
+    def sync_sections_from(
+        self,
+        sections: Dict[str, List[str]],
+        selectors: Dict[str, List[str]],
+        dry_run: Optional[bool] = False,
+    ):
+        return self.nornir.run(
+            task=napalm_sync_sections_from_devices,
+            sections=sections,
+            selectors=selectors,
+            dry_run=dry_run,
+        )
+
+    def apply_to(
+        self,
+        dry_run: Optional[bool] = False,
+        mode: str = "replace",
+        base_rev: str = "HEAD^1",
+    ):
+        return self.nornir.run(
+            task=napalm_apply_config_to_devices,
+            dry_run=dry_run,
+            mode=mode,
+            base_rev=base_rev,
+        )
@@ -0,0 +1,68 @@
+import hashlib
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_shard(shard: str) -> Tuple[int, int]:
+    """
+    Parse a ``i/N`` shard specification, ``i`` counting from 1 like GitLab's
+    ``CI_NODE_INDEX``/``CI_NODE_TOTAL``.
+    """
+    try:
+        index, total = (int(part) for part in shard.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{shard}', expected the form i/N")
+
+    if total < 1 or index < 1 or index > total:
+        raise ValueError(f"Invalid shard '{shard}', i must be between 1 and N")
+
+    return index, total
+
+
+def _rendezvous_score(host_name: str, shard: int) -> int:
+    digest = hashlib.sha256(f"{host_name}/{shard}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def assign_shards(
+    host_names: List[str], total: int, durations: Optional[Dict[str, float]] = None
+) -> Dict[str, int]:
+    """
+    Deterministically assign every host to a shard between 1 and ``total``.
+
+    Without durations hosts are placed by rendezvous hashing, so a host stays
+    on the same shard whatever other hosts are selected, and changing the
+    number of shards only moves the hosts that have to move.
+
+    With durations hosts are spread longest first onto the least loaded
+    shard, which balances the wall time of the shards instead of the host
+    count. Every shard must then be given the same durations.
+    """
+    if durations is None:
+        return {
+            host_name: max(
+                range(1, total + 1),
+                key=lambda shard: _rendezvous_score(host_name, shard),
+            )
+            for host_name in host_names
+        }
+
+    loads = [0.0] * total
+    assignment = {}
+    for host_name in sorted(host_names, key=lambda name: (-durations[name], name)):
+        shard = min(range(total), key=lambda s: (loads[s], s))
+        loads[shard] += durations[host_name]
+        assignment[host_name] = shard + 1
+    return assignment
+
+
+def select_shard(
+    host_names: List[str],
+    shard: str,
+    durations: Optional[Dict[str, float]] = None,
+) -> List[str]:
+    """
+    Return the hosts of ``host_names`` that belong to shard ``i/N``
+    """
+    index, total = parse_shard(shard)
+    assignment = assign_shards(host_names, total, durations)
+    return [host_name for host_name in host_names if assignment[host_name] == index]
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+# testbed data used to sanitize configs for the cache key, so the key doesn't
+# depend on which test machine ran the precheck
+canonical_testbed_data = {
+    "hostname": "testbed",
+    "mgmt_ip": "192.0.2.1",
+    "netmask": "255.255.255.0",
+    "default_gateway": "192.0.2.254",
+}
+
+default_cache_dir = os.environ.get(
+    "INFRA_AUTO_PRECHECK_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "infra-auto", "precheck"),
+)
+
+# seconds a cached outcome stays valid, 0 disables the cache
+default_ttl = float(os.environ.get("INFRA_AUTO_PRECHECK_CACHE_TTL", 7 * 24 * 3600))
+
+
+def precheck_cache_key(
+    platform: str,
+    image_version: str,
+    sanitized_config: List[str],
+    extra_commands: List[str],
+) -> str:
+    serialized = json.dumps(
+        {
+            "platform": platform,
+            "image_version": image_version,
+            "config": sanitized_config,
+            "extra_commands": extra_commands,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class PrecheckCache:
+    """
+    Outcomes of prechecks (result text with the diff and rollback log, diff,
+    pass/fail) stored as one JSON file per key, valid for ``ttl`` seconds
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl: Optional[float] = None):
+        self.cache_dir = cache_dir or default_cache_dir
+        self.ttl = default_ttl if ttl is None else ttl
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(key), "r") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self.invalidate(key)
+            return None
+        return entry
+
+    def put(
+        self,
+        key: str,
+        platform: str,
+        result: str,
+        diff: str,
+        failed: bool,
+    ):
+        if not self.enabled:
+            return
+        entry = {
+            "platform": platform,
+            "result": result,
+            "diff": diff,
+            "failed": failed,
+            "created": time.time(),
+        }
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # write then rename, concurrent prechecks never read half an entry
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, self._path(key))
+
+    def invalidate(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self, platform: Optional[str] = None) -> int:
+        """
+        Remove every cached outcome, or only those of ``platform``.
+        Returns the number of removed entries.
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+
+        removed = 0
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, file_name)
+            if platform:
+                try:
+                    with open(path, "r") as f:
+                        if json.load(f).get("platform") != platform:
+                            continue
+                except (OSError, json.JSONDecodeError):
+                    pass
+            os.remove(path)
+            removed += 1
+        return removed
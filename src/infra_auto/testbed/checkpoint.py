@@ -0,0 +1,106 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Type
+
+checkpoint_name = "infra_auto_baseline"
+
+
+class CheckpointError(Exception):
+    """
+    A checkpoint could not be taken or restored
+    """
+
+
+def _check_output(output: str, command: str):
+    # Cisco CLI errors start with '%', IOS-XR also reports 'failed'
+    for line in output.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("%") or "failed" in stripped.lower():
+            raise CheckpointError(f"{command}: {stripped}")
+
+
+class Checkpoint(ABC):
+    """
+    Known state of a test machine taken right after its reservation, restored
+    between prechecks instead of starting from what the last test left behind
+    """
+
+    @abstractmethod
+    def create(self, netmiko_con):
+        """Take the checkpoint of the running config"""
+
+    @abstractmethod
+    def restore(self, netmiko_con):
+        """Roll the running config back to the checkpoint"""
+
+
+class NxosCheckpoint(Checkpoint):
+    def create(self, netmiko_con):
+        # a checkpoint of a previous run may still exist
+        netmiko_con.send_command(f"no checkpoint {checkpoint_name}")
+        command = f"checkpoint {checkpoint_name}"
+        output = netmiko_con.send_command(command, read_timeout=120)
+        _check_output(output, command)
+
+    def restore(self, netmiko_con):
+        command = f"rollback running-config checkpoint {checkpoint_name}"
+        output = netmiko_con.send_command(command, read_timeout=300)
+        _check_output(output, command)
+
+
+class IosCheckpoint(Checkpoint):
+    path = f"bootflash:{checkpoint_name}.cfg"
+
+    def create(self, netmiko_con):
+        command = f"copy running-config {self.path}"
+        output = netmiko_con.send_command_timing(command)
+        # destination filename and overwrite confirmations
+        for _ in range(3):
+            if not output.rstrip().endswith(("?", "]")):
+                break
+            output = netmiko_con.send_command_timing("\n")
+        _check_output(output, command)
+
+    def restore(self, netmiko_con):
+        command = f"configure replace {self.path} force"
+        output = netmiko_con.send_command(command, read_timeout=300)
+        _check_output(output, command)
+
+
+class IosxrCheckpoint(Checkpoint):
+    commit_id_regex = re.compile(r"^\s*1\s+(\d+)\s", re.MULTILINE)
+
+    def __init__(self):
+        self.commit_id: Optional[str] = None
+
+    def create(self, netmiko_con):
+        # the latest commit is the checkpoint, later commits are rolled back
+        output = netmiko_con.send_command("show configuration commit list 1")
+        match = self.commit_id_regex.search(output)
+        if not match:
+            raise CheckpointError(f"No commit found in: {output.strip()}")
+        self.commit_id = match.group(1)
+
+    def restore(self, netmiko_con):
+        command = f"rollback configuration to {self.commit_id}"
+        output = netmiko_con.send_command(command, read_timeout=300)
+        _check_output(output, command)
+
+
+checkpoint_classes: Dict[str, Type[Checkpoint]] = {
+    "nxos_ssh": NxosCheckpoint,
+    "ios": IosCheckpoint,
+    "iosxr": IosxrCheckpoint,
+}
+
+
+def create_checkpoint(netmiko_con, platform: str) -> Optional[Checkpoint]:
+    """
+    Take a checkpoint of the running config, None on platforms without
+    checkpoint support
+    """
+    if platform not in checkpoint_classes:
+        return None
+    checkpoint = checkpoint_classes[platform]()
+    checkpoint.create(netmiko_con)
+    return checkpoint
@@ -0,0 +1,191 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds
+default_timeout = (5, 30)
+default_retries = 3
+default_backoff_factor = 0.5
+# seconds the machine list is reused before it is fetched again
+default_machines_ttl = 5
+
+
+class TestbedClient:
+    """
+    Client of the testbed inventory API.
+
+    Requests share a pooled session with ``timeout`` on every request. GET
+    requests are retried with exponential backoff on connection errors,
+    429 and 5xx. Reservations and releases are only retried when the
+    connection failed, so a machine is never reserved twice.
+
+    The machine list is cached for ``machines_ttl`` seconds and indexed by
+    (vendor, model, version). Concurrent callers share one fetch, and a
+    reservation or release refreshes it.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        token: str,
+        timeout: Union[float, Tuple[float, float]] = default_timeout,
+        retries: int = default_retries,
+        backoff_factor: float = default_backoff_factor,
+        pool_size: int = 32,
+        machines_ttl: float = default_machines_ttl,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.machines_ttl = machines_ttl
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}"})
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._machines: Optional[List[Dict]] = None
+        self._fetched_at = 0.0
+        self._index: Dict[Tuple[str, str, str], List[Dict]] = {}
+
+    def _request(self, method: str, path: str) -> requests.Response:
+        response = self.session.request(
+            method, f"{self.base_url}{path}", timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response
+
+    # --- Machines ---
+
+    def invalidate(self):
+        with self._lock:
+            self._machines = None
+
+    def get_available_machines(self) -> List[Dict]:
+        """
+        Get list of available machines from the API, an empty list when the
+        API can't be reached
+        """
+        with self._lock:
+            if (
+                self._machines is not None
+                and time.monotonic() - self._fetched_at < self.machines_ttl
+            ):
+                return self._machines
+            try:
+                machines = self._request("GET", "/machines").json()
+            except requests.RequestException as e:
+                print(f"Error fetching machines: {e}")
+                self._index = {}
+                return []
+            self._machines = machines.get("machines", [])
+            self._fetched_at = time.monotonic()
+            self._index = {}
+            for machine in self._machines:
+                key = (
+                    machine.get("vendor"),
+                    machine.get("model"),
+                    machine.get("version"),
+                )
+                self._index.setdefault(key, []).append(machine)
+            return self._machines
+
+    def find_machines(
+        self, vendor: str, model: str, version: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Machines of a vendor/model, of every version unless ``version`` is given
+        """
+        self.get_available_machines()
+        with self._lock:
+            if version is not None:
+                return list(self._index.get((vendor, model, version), []))
+            return [
+                machine
+                for key, machines in self._index.items()
+                if key[:2] == (vendor, model)
+                for machine in machines
+            ]
+
+    def reserve_machine(self, vendor: str, model: str, version: str) -> Optional[Dict]:
+        """
+        Reserve a machine with specified vendor, model, and version
+        Returns the reserved machine details or None if reservation fails
+        """
+        try:
+            machine = self._request(
+                "POST", f"/reserve/{vendor}/{model}/{version}"
+            ).json()
+            print(f"Reserved machine: {machine.get('serial')} ({machine.get('ip')})")
+            return machine
+        except requests.RequestException as e:
+            print(f"Error reserving machine: {e}")
+            return None
+        finally:
+            self.invalidate()
+
+    def release_machine(self, serial: str) -> bool:
+        """
+        Release a machine by its serial number
+        Returns True if release was successful, False otherwise
+        """
+        try:
+            self._request("POST", f"/release/{serial}")
+            print(f"Released machine: {serial}")
+            return True
+        except requests.RequestException as e:
+            print(f"Error releasing machine {serial}: {e}")
+            return False
+        finally:
+            self.invalidate()
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncTestbedClient:
+    """
+    asyncio variant of ``TestbedClient``, the requests of the pooled client
+    run in worker threads
+    """
+
+    def __init__(self, client: TestbedClient):
+        self.client = client
+
+    async def get_available_machines(self) -> List[Dict]:
+        return await asyncio.to_thread(self.client.get_available_machines)
+
+    async def find_machines(
+        self, vendor: str, model: str, version: Optional[str] = None
+    ) -> List[Dict]:
+        return await asyncio.to_thread(
+            self.client.find_machines, vendor, model, version
+        )
+
+    async def reserve_machine(
+        self, vendor: str, model: str, version: str
+    ) -> Optional[Dict]:
+        return await asyncio.to_thread(
+            self.client.reserve_machine, vendor, model, version
+        )
+
+    async def release_machine(self, serial: str) -> bool:
+        return await asyncio.to_thread(self.client.release_machine, serial)
+
+    async def release_machines(self, serials: List[str]) -> List[bool]:
+        return await asyncio.gather(*(self.release_machine(s) for s in serials))
@@ -1,15 +1,15 @@
 import os
 import difflib
-import requests
-from typing import List, Dict, Optional
-from pprint import pprint
+from typing import List, Dict, Optional, Tuple
 
-from nornir import InitNornir
 from nornir.core.task import Result, Task
-from nornir_napalm.plugins.connections import CONNECTION_NAME as NAPALM_CONNECTION_NAME
-from nornir_netmiko import CONNECTION_NAME as NETMIKO_CONNECTION_NAME
 
 from config_utils import filter_config
+from nornir_runners import run_cpu_bound
+
+from . import pool as testbed_pool
+from .client import TestbedClient
+from .cache import PrecheckCache, canonical_testbed_data, precheck_cache_key
 
 # API Configuration
 API_BASE_URL = os.environ.get("TESTBED_INVENTORY_API")
@@ -18,8 +18,7 @@ API_TOKEN = os.environ.get("TESTBED_API_TOKEN")
 if API_BASE_URL is None or API_TOKEN is None:
     raise ValueError("TESTBED_INVENTORY_API and TESTBED_API_TOKEN must be set in environment variables")
 
-testbed_api = requests.session()
-testbed_api.headers.update({"Authorization": f"Bearer {API_TOKEN}"})
+testbed_client = TestbedClient(API_BASE_URL, API_TOKEN)
 
 def ignore_config_diff_line(line: str) -> bool:
     """
@@ -36,14 +35,14 @@ def get_available_machines() -> List[Dict]:
     """
     Get list of available machines from the API
     """
-    try:
-        response = testbed_api.get(f"{API_BASE_URL}/machines")
-        response.raise_for_status()
-        data = response.json()
-        return data.get("machines", [])
-    except requests.RequestException as e:
-        print(f"Error fetching machines: {e}")
-        return []
+    return testbed_client.get_available_machines()
+
+
+def find_machines(vendor: str, model: str) -> List[Dict]:
+    """
+    Machines of a vendor and model, from the cached machine list
+    """
+    return testbed_client.find_machines(vendor, model)
 
 
 def reserve_machine(vendor: str, model: str, version: str) -> Optional[Dict]:
@@ -51,16 +50,7 @@ def reserve_machine(vendor: str, model: str, version: str) -> Optional[Dict]:
     Reserve a machine with specified vendor, model, and version
     Returns the reserved machine details or None if reservation fails
     """
-    try:
-        url = f"{API_BASE_URL}/reserve/{vendor}/{model}/{version}"
-        response = testbed_api.post(url)
-        response.raise_for_status()
-        machine = response.json()
-        print(f"Reserved machine: {machine.get('serial')} ({machine.get('ip')})")
-        return machine
-    except requests.RequestException as e:
-        print(f"Error reserving machine: {e}")
-        return None
+    return testbed_client.reserve_machine(vendor, model, version)
 
 
 def release_machine(serial: str) -> bool:
@@ -68,16 +58,7 @@ def release_machine(serial: str) -> bool:
     Release a machine by its serial number
     Returns True if release was successful, False otherwise
     """
-    try:
-        url = f"{API_BASE_URL}/release/{serial}"
-        response = testbed_api.post(url)
-        response.raise_for_status()
-        result = response.json()
-        print(f"Released machine: {serial}")
-        return True
-    except requests.RequestException as e:
-        print(f"Error releasing machine {serial}: {e}")
-        return False
+    return testbed_client.release_machine(serial)
 
 
 def platform_to_vendor_model(platform: str) -> tuple:
@@ -115,7 +96,6 @@ def diff_cfg(old_cfg: str, new_cfg: str) -> str:
 
 
 def run_preconfig_check(task: Task, extra_commands: List[str] = []) -> Result:
-    config_result = ""
     print("Running pre-configuration check...")
     target_host = task.host
     print("Target host:", target_host.name)
@@ -126,156 +106,130 @@ def run_preconfig_check(task: Task, extra_commands: List[str] = []) -> Result:
     version = target_host.data["version"]
     print("Version:", version)
 
-    # 2. Reserve a test device from the API
-    vendor, model = platform_to_vendor_model(platform)
-
-    # Get available machines to find a matching version
-    machines = get_available_machines()
-    available_machine = None
-    for machine in machines:
-        if (
-            machine.get("vendor") == vendor
-            and machine.get("model") == model
-            and machine.get("status") == "available"
-        ):
-            available_machine = machine
-            break
-
-    if not available_machine:
-        return Result(
-            host=task.host,
-            result=f"No available test machine found for platform {platform} (vendor: {vendor}, model: {model})",
-            changed=False,
-            failed=True,
-        )
-
-    # Reserve the machine
-    reserved_machine = reserve_machine(
-        available_machine["vendor"],
-        available_machine["model"],
-        available_machine["version"],
-    )
-
-    pprint(reserved_machine)
-
-    if not reserved_machine:
-        return Result(
-            host=task.host,
-            result=f"Failed to reserve test machine for platform {platform}",
-            changed=False,
-            failed=True,
-        )
-
-    machine_serial = reserved_machine.get("serial")
-    machine_hostname = reserved_machine.get("hostname")
-    machine_mgmt_ip = reserved_machine.get("mgmt_ip")
-    machine_mgmt_netmask = reserved_machine.get("netmask")
-    machine_mgmt_gateway = reserved_machine.get("default_gateway")
-
-    print("Reserved machine serial:", machine_serial)
-
-    # write reserved machine to hosts.yaml
-    random_host_filename = "/tmp/hosts_{}.yaml".format(machine_serial)
-    with open(random_host_filename, "w") as f:
-        f.write(f"""
-{machine_hostname}:
-  hostname: {machine_mgmt_ip}
-  platform: {platform}
-  groups:
-    - {model}
-        """)
-
     target_cfg_file = "cfg/{}.cfg".format(target_host.name)
     with open(target_cfg_file, "r") as f:
         target_config_lines = f.readlines()
         # remove \n from each line
         target_config_lines = [line.rstrip("\n") for line in target_config_lines]
 
-    # 1. generate sanitized config
-    sanitized_config = filter_config(
-        platform,
-        target_config_lines,
-        {
-            "hostname": machine_hostname,
-            "mgmt_ip": machine_mgmt_ip,
-            "netmask": machine_mgmt_netmask,
-            "default_gateway": machine_mgmt_gateway,
-        },
-    )
-
-    print("Sanitized config: ", "\n".join(sanitized_config))
-
-    try:
-        # 3. Create a dynamic Nornir inventory with the reserved machine
-        # test_inventory_config = "testbed/nornir.yaml"
-        # test_nr = InitNornir(config_file=test_inventory_config)
-
-        test_nr = InitNornir(
-            inventory={
-                "plugin": "SimpleInventory",
-                "options": {
-                    "defaults_file": "inventory/defaults.yaml",
-                    "group_file": "inventory/groups.yaml",
-                    "host_file": random_host_filename,
-                },
-            }
+    # identical inputs on the same image give the same outcome, the config is
+    # sanitized with canonical testbed data so any test machine matches
+    cache = PrecheckCache()
+    cache_key = None
+    if cache.enabled:
+        canonical_config = run_cpu_bound(
+            filter_config, platform, target_config_lines, canonical_testbed_data
         )
-
-        print(test_nr.inventory.hosts)
-
-        # Find or create a test device entry
-        # Try to find existing device with matching platform
-        test_device = test_nr.inventory.hosts["tndo-n9k-2"]
-
-        if not test_device:
+        cache_key = precheck_cache_key(
+            platform, version, canonical_config, extra_commands
+        )
+        cached = cache.get(cache_key)
+        if cached:
             return Result(
                 host=task.host,
-                result=f"No test device configuration found for platform {platform} in testbed inventory",
-                changed=False,
-                failed=True,
+                result="Cached pre-check result:\n" + cached["result"],
+                diff=cached["diff"],
+                failed=cached["failed"],
+                changed=True,
             )
 
-        print(
-            "Test config on {} (Reserved: {})".format(test_device.name, machine_serial)
+    pool = testbed_pool.get_active_pool()
+    if pool is None:
+        # outside of a pooled run, reserve and release a machine for this host
+        with testbed_pool.TestbedPool() as pool:
+            result, image_version = _run_pooled_preconfig_check(
+                pool, task, platform, version, target_config_lines
+            )
+    else:
+        result, image_version = _run_pooled_preconfig_check(
+            pool, task, platform, version, target_config_lines
         )
 
-        # 5. use NAPALM to load init config and sanitize config
-        test_con = test_device.get_connection(NAPALM_CONNECTION_NAME, test_nr.config)
-        netmiko_test_con = test_device.get_connection(
-            NETMIKO_CONNECTION_NAME, test_nr.config
-        )
+    # only a passed precheck on the target image: a fallback image or a lab
+    # error says nothing about the next run
+    if cache_key and image_version == version and not result.failed:
+        cache.put(cache_key, platform, result.result, result.diff, result.failed)
+    return result
 
-        try:
-            test_con.load_replace_candidate(config="\n".join(sanitized_config))
-            diff = test_con.compare_config()
-            config_result += "Configuration diff:\n"
-            config_result += diff + "\n"
-            print(diff)
-            test_con.commit_config()
-            rollback_log_verify = netmiko_test_con.send_command(
-                "show rollback log verify"
-            )
-            config_result += "Rollback log verify:\n"
-            config_result += rollback_log_verify + "\n"
-        except Exception:
-            rollback_log_verify = netmiko_test_con.send_command(
-                "show rollback log verify"
-            )
-            rollback_log_exec = netmiko_test_con.send_command("show rollback log exec")
-            config_result += "Rollback log verify:\n"
-            config_result += rollback_log_verify + "\n"
-            config_result += "Rollback log exec:\n"
-            config_result += rollback_log_exec + "\n"
 
-        return Result(
+def _run_pooled_preconfig_check(
+    pool, task: Task, platform: str, version: str, target_config_lines: List[str]
+) -> Tuple[Result, Optional[str]]:
+    """
+    Returns the precheck result and the image version of the test machine,
+    None when no machine could be used
+    """
+    try:
+        machine = pool.acquire(platform, version)
+    except testbed_pool.TestbedError as e:
+        result = Result(
             host=task.host,
-            result=config_result,
-            # diff=config_diff,
-            changed=True,
+            result=str(e),
+            changed=False,
+            failed=True,
         )
+        return result, None
 
+    try:
+        result = _check_config_on_machine(task, machine, target_config_lines)
+        return result, machine.version
     finally:
-        # 8. Always release the machine after testing
-        if machine_serial:
-            print("Releasing machine:", machine_serial)
-            release_machine(machine_serial)
+        pool.release(machine)
+
+
+def _check_config_on_machine(
+    task: Task, machine, target_config_lines: List[str]
+) -> Result:
+    config_result = ""
+    failed = False
+    print(
+        "Test config on {} (Reserved: {})".format(machine.hostname, machine.serial)
+    )
+
+    # 1. generate sanitized config
+    sanitized_config = run_cpu_bound(
+        filter_config,
+        task.host.platform,
+        target_config_lines,
+        machine.testbed_data,
+    )
+
+    print("Sanitized config: ", "\n".join(sanitized_config))
+
+    # 2. use NAPALM to load init config and sanitize config, the connections
+    # stay open for the next precheck on this machine
+    test_con = machine.napalm()
+    netmiko_test_con = machine.netmiko()
+
+    try:
+        if machine.at_checkpoint:
+            # the machine is back to its known state, merging the config
+            # spares the full replace
+            test_con.load_merge_candidate(config="\n".join(sanitized_config))
+        else:
+            test_con.load_replace_candidate(config="\n".join(sanitized_config))
+        diff = test_con.compare_config()
+        config_result += "Configuration diff:\n"
+        config_result += diff + "\n"
+        print(diff)
+        test_con.commit_config()
+        rollback_log_verify = netmiko_test_con.send_command("show rollback log verify")
+        config_result += "Rollback log verify:\n"
+        config_result += rollback_log_verify + "\n"
+    except Exception as e:
+        failed = True
+        config_result += f"Pre-check failed: {e}\n"
+        rollback_log_verify = netmiko_test_con.send_command("show rollback log verify")
+        rollback_log_exec = netmiko_test_con.send_command("show rollback log exec")
+        config_result += "Rollback log verify:\n"
+        config_result += rollback_log_verify + "\n"
+        config_result += "Rollback log exec:\n"
+        config_result += rollback_log_exec + "\n"
+
+    return Result(
+        host=task.host,
+        result=config_result,
+        # diff=config_diff,
+        changed=True,
+        failed=failed,
+    )
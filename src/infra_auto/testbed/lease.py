@@ -0,0 +1,85 @@
+import glob
+import json
+import os
+from typing import List, Optional, Set
+
+from . import execute
+
+default_lease_file = ".testbed_lease.json"
+
+
+def read_leases(path: str) -> List[dict]:
+    """
+    Machines reserved ahead of time by ``testbed warm`` and not used yet,
+    each a dict with the ``platform`` and ``version`` it was reserved for
+    and the ``machine`` returned by the reservation
+    """
+    try:
+        with open(path, "r") as f:
+            return json.load(f).get("machines", [])
+    except FileNotFoundError:
+        return []
+
+
+def write_leases(path: str, leases: List[dict]):
+    if not leases:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    with open(path, "w") as f:
+        json.dump({"machines": leases}, f, indent=2)
+
+
+def used_file(path: str, shard: Optional[str] = None) -> str:
+    """
+    File listing the leased machines a job took over (and releases itself),
+    one per shard since every job only has its own copy of the lease file
+    """
+    root, ext = os.path.splitext(path)
+    suffix = "-" + shard.replace("/", "-of-") if shard else ""
+    return f"{root}.used{suffix}{ext}"
+
+
+def record_used(path: str, shard: Optional[str], serial: str):
+    used_path = used_file(path, shard)
+    serials = read_used(used_path)
+    serials.add(serial)
+    with open(used_path, "w") as f:
+        json.dump({"serials": sorted(serials)}, f, indent=2)
+
+
+def read_used(used_path: str) -> Set[str]:
+    try:
+        with open(used_path, "r") as f:
+            return set(json.load(f).get("serials", []))
+    except FileNotFoundError:
+        return set()
+
+
+def release_leases(path: str) -> int:
+    """
+    Release the machines of a lease file that no run used. The machines
+    listed in the used files of the jobs were released by those jobs, and
+    may since have been reserved by another pipeline.
+    Returns the number of released machines.
+    """
+    root, ext = os.path.splitext(path)
+    used_paths = glob.glob(glob.escape(root) + ".used*" + glob.escape(ext))
+    used = set()
+    for used_path in used_paths:
+        used |= read_used(used_path)
+
+    leases = read_leases(path)
+    remaining = []
+    released = 0
+    for lease in leases:
+        if lease["machine"]["serial"] in used:
+            continue
+        if execute.release_machine(lease["machine"]["serial"]):
+            released += 1
+        else:
+            remaining.append(lease)
+    write_leases(path, remaining)
+    for used_path in used_paths:
+        os.remove(used_path)
+    return released
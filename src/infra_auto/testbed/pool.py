@@ -0,0 +1,440 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from nornir import InitNornir
+from nornir.core import Nornir
+from nornir.core.inventory import Host, ParentGroups
+from nornir_napalm.plugins.connections import CONNECTION_NAME as NAPALM_CONNECTION_NAME
+from nornir_netmiko import CONNECTION_NAME as NETMIKO_CONNECTION_NAME
+
+from . import execute, lease
+from .checkpoint import Checkpoint, create_checkpoint
+
+# machines reserved per platform/version
+default_max_machines = 4
+# seconds a precheck waits for a machine before failing
+default_wait_timeout = 1800
+# seconds between two reservation attempts while waiting
+default_poll_interval = 15
+
+
+class TestbedError(Exception):
+    """
+    No test machine could be provided for a precheck
+    """
+
+
+class TestbedMachine:
+    """
+    A reserved test machine, its entry in the in-memory test inventory and
+    the connections to it, kept open across prechecks
+    """
+
+    def __init__(self, machine: dict, platform: str, nornir: Nornir, host: Host):
+        self.reservation = machine
+        self.serial = machine.get("serial")
+        self.hostname = machine.get("hostname")
+        self.mgmt_ip = machine.get("mgmt_ip")
+        self.netmask = machine.get("netmask")
+        self.default_gateway = machine.get("default_gateway")
+        self.version = machine.get("version")
+        self.platform = platform
+        self.nornir = nornir
+        self.host = host
+        # (vendor, model, version) queue of the pool holding the machine
+        self.key: Optional[Tuple[str, str, str]] = None
+        self.checkpoint: Optional[Checkpoint] = None
+
+    @property
+    def testbed_data(self) -> dict:
+        # management settings kept by filter_config in the sanitized config
+        return {
+            "hostname": self.hostname,
+            "mgmt_ip": self.mgmt_ip,
+            "netmask": self.netmask,
+            "default_gateway": self.default_gateway,
+        }
+
+    def napalm(self):
+        return self.host.get_connection(NAPALM_CONNECTION_NAME, self.nornir.config)
+
+    def netmiko(self):
+        return self.host.get_connection(NETMIKO_CONNECTION_NAME, self.nornir.config)
+
+    def take_checkpoint(self):
+        try:
+            self.checkpoint = create_checkpoint(self.netmiko(), self.platform)
+        except Exception as e:
+            # prechecks still replace the whole config, only the reset is lost
+            print(f"Failed to take a checkpoint on {self.hostname}: {e}")
+            self.checkpoint = None
+
+    @property
+    def at_checkpoint(self) -> bool:
+        """
+        Whether the running config is the checkpoint: a failed checkpoint or
+        restore drops it, and every precheck gives the machine back through
+        ``reset``
+        """
+        return self.checkpoint is not None
+
+    def reset(self):
+        """
+        Restore the checkpoint taken after the reservation
+        """
+        if self.checkpoint is None:
+            return
+        try:
+            self.checkpoint.restore(self.netmiko())
+        except Exception as e:
+            print(f"Failed to restore the checkpoint on {self.hostname}: {e}")
+            self.checkpoint = None
+
+    def close(self):
+        self.host.close_connections()
+
+
+class _MachineQueue:
+    """
+    Machines reserved for one (vendor, model, version) and the idle ones
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.machines: List[TestbedMachine] = []
+        self.idle: "queue.Queue[TestbedMachine]" = queue.Queue()
+        # monotonic time of the last reservation attempt that found no machine
+        self.busy_since: Optional[float] = None
+
+
+class TestbedPool:
+    """
+    Test machines shared by the prechecks of a run.
+
+    Up to ``max_machines`` machines are reserved per platform/version as the
+    prechecks need them, their inventory entries are added to an in-memory
+    test inventory loaded once, and they are handed out to the prechecks
+    through a queue. When every machine is busy and no more can be reserved,
+    a precheck waits for one, polling the lab every ``poll_interval`` seconds,
+    and only fails after ``wait_timeout`` seconds. Every machine is released
+    when the pool is closed.
+
+    Machines reserved ahead of time by ``warm`` are listed in a lease file
+    (``TESTBED_LEASE_FILE``, .testbed_lease.json by default) and used before
+    new ones are reserved. Parallel jobs each get a copy of the lease file,
+    so a job run with ``shard`` (``i/N``) only uses the leases warmed for
+    that shard, and a job without ``shard`` only the untagged ones. The
+    leases a job takes over are listed in its used file (see
+    ``lease.used_file``) so that ``testbed release`` leaves them alone.
+
+    Use as a context manager to make it the active pool used by
+    ``run_preconfig_check``.
+    """
+
+    def __init__(
+        self,
+        inventory_dir: str = "inventory",
+        max_machines: Optional[int] = None,
+        wait_timeout: Optional[float] = None,
+        poll_interval: Optional[float] = None,
+        lease_file: Optional[str] = None,
+        shard: Optional[str] = None,
+    ):
+        self.inventory_dir = inventory_dir
+        self.max_machines = max_machines or int(
+            os.environ.get("TESTBED_MAX_MACHINES", default_max_machines)
+        )
+        self.wait_timeout = (
+            wait_timeout
+            if wait_timeout is not None
+            else float(os.environ.get("TESTBED_WAIT_TIMEOUT", default_wait_timeout))
+        )
+        self.poll_interval = poll_interval or default_poll_interval
+        self.lease_file = lease_file or os.environ.get(
+            "TESTBED_LEASE_FILE", lease.default_lease_file
+        )
+        self.shard = shard
+        self._leases = lease.read_leases(self.lease_file)
+        self._queues: Dict[Tuple[str, str, str], _MachineQueue] = {}
+        self._lock = threading.Lock()
+        self._nornir: Optional[Nornir] = None
+        self._previous_pool: Optional["TestbedPool"] = None
+
+    # --- Test inventory ---
+
+    def _test_nornir(self) -> Nornir:
+        with self._lock:
+            if self._nornir is None:
+                # groups and defaults hold the credentials, the hosts are the
+                # reserved machines added below
+                self._nornir = InitNornir(
+                    inventory={
+                        "plugin": "SimpleInventory",
+                        "options": {
+                            "host_file": os.devnull,
+                            "group_file": os.path.join(
+                                self.inventory_dir, "groups.yaml"
+                            ),
+                            "defaults_file": os.path.join(
+                                self.inventory_dir, "defaults.yaml"
+                            ),
+                        },
+                    },
+                    logging={"enabled": False},
+                )
+            return self._nornir
+
+    def _add_test_host(
+        self, machine: dict, platform: str, model: str
+    ) -> TestbedMachine:
+        nornir = self._test_nornir()
+        inventory = nornir.inventory
+        groups = [inventory.groups[model]] if model in inventory.groups else []
+        host = Host(
+            name=machine.get("hostname"),
+            hostname=machine.get("mgmt_ip"),
+            platform=platform,
+            groups=ParentGroups(groups),
+            defaults=inventory.defaults,
+        )
+        with self._lock:
+            inventory.hosts[host.name] = host
+        return TestbedMachine(machine, platform, nornir, host)
+
+    # --- Reservation ---
+
+    def _find_available(self, vendor: str, model: str, version: str) -> Optional[dict]:
+        """
+        An available machine of the model, preferring the image of the target.
+
+        Raises:
+            TestbedError: when the lab has no machine of the model at all
+        """
+        models = execute.find_machines(vendor, model)
+        if not models:
+            raise TestbedError(
+                f"No test machine found for vendor: {vendor}, model: {model}"
+            )
+
+        candidates = [m for m in models if m.get("status") == "available"]
+        for machine in candidates:
+            if machine.get("version") == version:
+                return machine
+        return candidates[0] if candidates else None
+
+    def _reserve(self, platform: str, version: str) -> Optional[TestbedMachine]:
+        """
+        Reserve one more machine, None when all of them are busy
+        """
+        vendor, model = execute.platform_to_vendor_model(platform)
+
+        available_machine = self._find_available(vendor, model, version)
+        if not available_machine:
+            return None
+
+        reserved_machine = execute.reserve_machine(
+            available_machine["vendor"],
+            available_machine["model"],
+            available_machine["version"],
+        )
+        if not reserved_machine:
+            # taken by another run in the meantime
+            return None
+
+        return self._add_test_host(reserved_machine, platform, model)
+
+    def _adopt(self, platform: str, version: str) -> Optional[TestbedMachine]:
+        """
+        Take over a machine of the lease file, None when none is left
+        """
+        with self._lock:
+            for i, leased in enumerate(self._leases):
+                if (
+                    leased["platform"] == platform
+                    and leased["version"] == version
+                    # claimed by the job of the shard it was warmed for
+                    and leased.get("shard") == self.shard
+                ):
+                    del self._leases[i]
+                    lease.write_leases(self.lease_file, self._leases)
+                    # the pool releases it, not the final testbed release
+                    lease.record_used(
+                        self.lease_file, self.shard, leased["machine"]["serial"]
+                    )
+                    break
+            else:
+                return None
+
+        print("Using pre-warmed machine:", leased["machine"].get("serial"))
+        _, model = execute.platform_to_vendor_model(platform)
+        return self._add_test_host(leased["machine"], platform, model)
+
+    def _queue_key(self, platform: str, version: str) -> Tuple[str, str, str]:
+        vendor, model = execute.platform_to_vendor_model(platform)
+        return vendor, model, version
+
+    # --- Checkout ---
+
+    def acquire(self, platform: str, version: str) -> TestbedMachine:
+        """
+        Take a machine for a precheck: an idle one, a newly reserved one while
+        fewer than ``max_machines`` are reserved, or the first one given back
+        or reserved before ``wait_timeout``
+        """
+        key = self._queue_key(platform, version)
+        with self._lock:
+            machine_queue = self._queues.setdefault(key, _MachineQueue())
+
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            try:
+                return machine_queue.idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with machine_queue.lock:
+                # waiting prechecks share one lab query per poll interval
+                polled_recently = (
+                    machine_queue.busy_since is not None
+                    and time.monotonic() - machine_queue.busy_since < self.poll_interval
+                )
+                if (
+                    len(machine_queue.machines) < self.max_machines
+                    and not polled_recently
+                ):
+                    machine = self._adopt(platform, version) or self._reserve(
+                        platform, version
+                    )
+                    if machine is not None:
+                        machine.take_checkpoint()
+                        machine_queue.busy_since = None
+                        machine.key = key
+                        machine_queue.machines.append(machine)
+                        return machine
+                    machine_queue.busy_since = time.monotonic()
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TestbedError(
+                    f"No test machine for platform {platform} became available "
+                    f"within {self.wait_timeout:.0f}s"
+                )
+            try:
+                return machine_queue.idle.get(
+                    timeout=min(self.poll_interval, remaining)
+                )
+            except queue.Empty:
+                continue
+
+    def release(self, machine: TestbedMachine):
+        """
+        Reset a machine to its checkpoint and give it back to the pool for
+        the next precheck
+        """
+        machine.reset()
+        with self._lock:
+            machine_queue = self._queues[machine.key]
+        machine_queue.idle.put(machine)
+
+    @contextmanager
+    def lease(self, platform: str, version: str) -> Iterator[TestbedMachine]:
+        machine = self.acquire(platform, version)
+        try:
+            yield machine
+        finally:
+            self.release(machine)
+
+    # --- Pre-warming ---
+
+    def warm(
+        self, requirements: Dict[Tuple[str, str], int], shard: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Reserve machines ahead of the prechecks and check they can be logged
+        into: for each (platform, version), as many as the prechecks need, up
+        to ``max_machines``. A machine that can't be logged into is replaced,
+        and released once the others are reserved. The machines are added to
+        the lease file instead of being released, and the new leases are
+        returned. With ``shard`` the leases are only used by the job of that
+        shard.
+        """
+        warmed = []
+        unreachable = []
+        for (platform, version), count in sorted(requirements.items()):
+            needed = min(count, self.max_machines)
+            attempts = 2 * needed
+            reserved = 0
+            while reserved < needed and attempts > 0:
+                attempts -= 1
+                try:
+                    machine = self._reserve(platform, version)
+                except TestbedError as e:
+                    print(e)
+                    break
+                if machine is None:
+                    print(f"No more machines available for {platform} {version}")
+                    break
+                try:
+                    machine.napalm()
+                    machine.netmiko()
+                except Exception as e:
+                    print(f"Failed to log into {machine.hostname}: {e}")
+                    # kept until the end, so it isn't reserved again
+                    unreachable.append(machine)
+                    continue
+                finally:
+                    machine.close()
+
+                reserved += 1
+                leased = {
+                    "platform": platform,
+                    "version": version,
+                    "machine": machine.reservation,
+                }
+                if shard:
+                    leased["shard"] = shard
+                warmed.append(leased)
+
+        for machine in unreachable:
+            execute.release_machine(machine.serial)
+
+        with self._lock:
+            self._leases.extend(warmed)
+            lease.write_leases(self.lease_file, self._leases)
+        return warmed
+
+    def close(self):
+        """
+        Close the connections to every reserved machine and release them
+        """
+        with self._lock:
+            machines = [m for q in self._queues.values() for m in q.machines]
+            self._queues = {}
+        for machine in machines:
+            try:
+                machine.close()
+            finally:
+                print("Releasing machine:", machine.serial)
+                execute.release_machine(machine.serial)
+
+    def __enter__(self) -> "TestbedPool":
+        global _active_pool
+        self._previous_pool = _active_pool
+        _active_pool = self
+        return self
+
+    def __exit__(self, *exc_info):
+        global _active_pool
+        _active_pool = self._previous_pool
+        self.close()
+
+
+_active_pool: Optional[TestbedPool] = None
+
+
+def get_active_pool() -> Optional[TestbedPool]:
+    return _active_pool
@@ -0,0 +1,138 @@
+import pickle
+from unittest import mock
+
+import pytest
+
+from ..baseline import BaselineModule
+
+
+class MockHost:
+    def __init__(self, name, platform, data):
+        self.name = name
+        self.platform = platform
+        self._data = data
+
+    def get(self, key, default=None):
+        return self._data.get(key, default)
+
+    def keys(self):
+        return self._data.keys()
+
+
+def prepare_ntp_vars(ntp_vars: dict) -> dict:
+    return {**ntp_vars, "_servers": sorted(ntp_vars["servers"])}
+
+
+@pytest.fixture
+def ntp_baseline(tmp_path):
+    template_dir = tmp_path / "templates"
+    template_dir.mkdir()
+    (template_dir / "ios_ntp.j2").write_text(
+        "! ntp\n{% for server in _servers %}\nntp server {{ server }}\n{% endfor %}\n"
+    )
+    return BaselineModule(
+        name="baseline_ntp",
+        template_dir=str(template_dir),
+        templates={"ios": "ios_ntp.j2"},
+        section_selectors={"ios": [r"^ntp "]},
+        vars_schema={"servers": list},
+        required_vars=["servers"],
+        prepare_vars=prepare_ntp_vars,
+        cfg_dir=str(tmp_path),
+    )
+
+
+def test_render_uses_prepared_vars(ntp_baseline):
+    host = MockHost(
+        "rtr-1", "ios", {"baseline_ntp": {"servers": ["10.0.0.2", "10.0.0.1"]}}
+    )
+    assert ntp_baseline.filter_hosts(host)
+    assert ntp_baseline.render_for_host(host) == [
+        "ntp server 10.0.0.1",
+        "ntp server 10.0.0.2",
+    ]
+
+
+def test_vars_are_validated(ntp_baseline):
+    with pytest.raises(ValueError, match="Missing baseline_ntp vars: servers"):
+        ntp_baseline.validate_vars({})
+    with pytest.raises(ValueError, match="must be of type list"):
+        ntp_baseline.validate_vars({"servers": "10.0.0.1"})
+
+
+def test_offline_delta_against_cfg(ntp_baseline, tmp_path):
+    (tmp_path / "rtr-1.cfg").write_text("hostname rtr-1\nntp server 10.0.0.1\n")
+    assert ntp_baseline.offline_delta(
+        "rtr-1", "ios", ["ntp server 10.0.0.1", "ntp server 10.0.0.2"]
+    ) == ["ntp server 10.0.0.2"]
+    assert ntp_baseline.offline_delta("rtr-2", "ios", ["ntp server 10.0.0.1"]) is None
+
+
+@pytest.mark.parametrize(
+    "platform,committed,saved",
+    [("iosxr", True, False), ("ios", False, True), ("nxos_ssh", False, True)],
+)
+def test_push_commits_or_saves_per_platform(ntp_baseline, platform, committed, saved):
+    netmiko_con = mock.Mock()
+    netmiko_con.send_config_set.return_value = ""
+    ntp_baseline.push(netmiko_con, platform, ["ntp server 10.0.0.1"], mode="verified")
+    netmiko_con.send_config_set.assert_called_once_with(["ntp server 10.0.0.1"])
+    assert netmiko_con.commit.called == committed
+    assert netmiko_con.save_config.called == saved
+
+
+def test_bulk_push_is_verified_against_the_rendered_config(ntp_baseline):
+    netmiko_con = mock.Mock()
+    for method in ("config_mode", "exit_config_mode", "save_config"):
+        getattr(netmiko_con, method).return_value = ""
+    netmiko_con.send_config_set.return_value = ""
+    netmiko_con.send_command.return_value = "ntp server 10.0.0.1\nntp server 10.0.0.2"
+
+    # only the delta is pushed, the check still covers the whole section
+    report = ntp_baseline.push(
+        netmiko_con,
+        "ios",
+        ["ntp server 10.0.0.2"],
+        desired_commands=["ntp server 10.0.0.1", "ntp server 10.0.0.2"],
+    )
+    assert report.mode == "bulk"
+    assert report.verified
+
+    netmiko_con.send_command.return_value = "ntp server 10.0.0.1"
+    report = ntp_baseline.push(
+        netmiko_con,
+        "ios",
+        ["ntp server 10.0.0.2"],
+        desired_commands=["ntp server 10.0.0.1", "ntp server 10.0.0.2"],
+    )
+    assert report.missing == ["ntp server 10.0.0.2"]
+
+
+def test_module_survives_pickling(ntp_baseline):
+    ntp_baseline.render("ios", {"_servers": ["10.0.0.1"]})
+    restored = pickle.loads(pickle.dumps(ntp_baseline))
+    assert restored.render("ios", {"_servers": ["10.0.0.1"]}) == ["ntp server 10.0.0.1"]
+    # unpickled copies reuse the environment, and the templates compiled in it
+    assert restored.get_environment() is ntp_baseline.get_environment()
+    assert pickle.loads(pickle.dumps(ntp_baseline)).get_template(
+        "ios"
+    ) is ntp_baseline.get_template("ios")
+
+
+def test_failed_render_is_not_cached(ntp_baseline, tmp_path):
+    host = MockHost("rtr-1", "ios", {"baseline_ntp": {"servers": ["10.0.0.1"]}})
+    template = tmp_path / "templates" / "ios_ntp.j2"
+    good_template = template.read_text()
+    template.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        ntp_baseline.render_for_host(host)
+    assert ntp_baseline._render_cache == {}
+
+    # fixed without restarting the process
+    template.write_text(good_template)
+    assert ntp_baseline.render_for_host(host) == ["ntp server 10.0.0.1"]
+    assert len(ntp_baseline._render_cache) == 1
+
+    ntp_baseline.clear_render_cache()
+    assert ntp_baseline._render_cache == {}
@@ -0,0 +1,87 @@
+import subprocess
+from unittest import mock
+
+from ..ci_utils.gitlab_api import GitLabClient
+from ..ci_utils.tasks.detect_cfg_changes import (
+    devices_from_changes,
+    get_merged_mr_changes,
+)
+
+
+def page_response(items, headers):
+    resp = mock.Mock(status_code=200, headers=headers)
+    resp.json.return_value = items
+    return resp
+
+
+def test_diffs_pages_are_fetched_concurrently():
+    client = GitLabClient("https://gitlab.example.com/api/v4", "token")
+    pages = {
+        1: page_response([{"new_path": "cfg/r1.cfg"}], {"X-Total-Pages": "3"}),
+        2: page_response([{"new_path": "cfg/r2.cfg"}], {"X-Total-Pages": "3"}),
+        3: page_response([{"new_path": "cfg/r3.cfg"}], {"X-Total-Pages": "3"}),
+    }
+    client.session.request = mock.Mock(
+        side_effect=lambda method, url, params, **kwargs: pages[params["page"]]
+    )
+
+    diffs = client.get_mr_diffs("1", "7")
+
+    assert [d["new_path"] for d in diffs] == ["cfg/r1.cfg", "cfg/r2.cfg", "cfg/r3.cfg"]
+    assert (
+        client.session.request.call_args_list[0]
+        .args[1]
+        .endswith("/projects/1/merge_requests/7/diffs")
+    )
+
+
+def test_pages_without_total_are_followed():
+    client = GitLabClient("https://gitlab.example.com/api/v4", "token")
+    pages = {
+        1: page_response([{"id": 1}], {"X-Next-Page": "2"}),
+        2: page_response([{"id": 2}], {"X-Next-Page": ""}),
+    }
+    client.session.request = mock.Mock(
+        side_effect=lambda method, url, params, **kwargs: pages[params["page"]]
+    )
+
+    assert client.get_all_pages("https://gitlab.example.com/api/v4/x") == [
+        {"id": 1},
+        {"id": 2},
+    ]
+
+
+def test_devices_from_renames_and_deletions():
+    changes = [
+        {"old_path": "cfg/r1.cfg", "new_path": "cfg/r1.cfg"},
+        {"old_path": "cfg/old.cfg", "new_path": "cfg/new.cfg", "renamed_file": True},
+        {"old_path": "cfg/gone.cfg", "new_path": "cfg/gone.cfg", "deleted_file": True},
+        {"old_path": "README.md", "new_path": "README.md"},
+        {"old_path": "cfg/r1.cfg", "new_path": "cfg/r1.cfg"},
+    ]
+
+    assert devices_from_changes(changes) == ["r1", "new"]
+
+
+def test_merged_changes_from_git(tmp_path, monkeypatch):
+    def git(*args):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+
+    git("init", "-q")
+    git("config", "user.email", "ci@example.com")
+    git("config", "user.name", "ci")
+    (tmp_path / "cfg").mkdir()
+    for name in ("r1", "old", "gone"):
+        (tmp_path / "cfg" / f"{name}.cfg").write_text(f"hostname {name}\n" * 20)
+    git("add", "-A")
+    git("commit", "-q", "-m", "base")
+
+    (tmp_path / "cfg" / "r1.cfg").write_text("hostname r1\n")
+    (tmp_path / "cfg" / "old.cfg").rename(tmp_path / "cfg" / "new.cfg")
+    (tmp_path / "cfg" / "gone.cfg").unlink()
+    (tmp_path / "cfg" / "added.cfg").write_text("hostname added\n")
+    git("add", "-A")
+    git("commit", "-q", "-m", "change")
+
+    monkeypatch.chdir(tmp_path)
+    assert sorted(get_merged_mr_changes()) == ["added", "new", "r1"]
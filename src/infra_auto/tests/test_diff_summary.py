@@ -0,0 +1,99 @@
+from nornir.core.inventory import Host
+
+from ..report import build_summary_notes, format_diff_summary, summarize_results
+from ..report.diff_summary import host_tokens, normalize_text
+from ..report.mr_report import plan_report_notes
+
+
+def host_result(diff, failed=False, tokens=None, error=None):
+    data = {
+        "changed": bool(diff),
+        "failed": failed,
+        "results": [
+            {
+                "name": "napalm_apply_config_to_devices",
+                "changed": bool(diff),
+                "failed": failed,
+                "diff": diff,
+                "result": "",
+                "exception": error,
+            }
+        ],
+    }
+    if tokens:
+        data["host_tokens"] = tokens
+    return data
+
+
+def fleet(count):
+    hosts = {}
+    for i in range(count):
+        name = f"sw{i:04d}"
+        hosts[name] = host_result(
+            f"+snmp-server location {name}\n+ntp server 192.0.2.10",
+            tokens=[name, f"10.0.0.{i}"],
+        )
+    return {"task": "napalm_apply_config_to_devices", "hosts": hosts}
+
+
+def test_host_tokens_skip_inherited_data():
+    host = Host(
+        name="sw01.example.com",
+        hostname="10.0.0.1",
+        data={"loopback": "10.255.0.1/32", "site": "tpe"},
+    )
+    assert host_tokens(host) == ["10.0.0.1", "10.255.0.1", "sw01", "sw01.example.com"]
+
+
+def test_normalize_text():
+    text = (
+        "@@ -10,3 +10,4 @@\n"
+        "+hostname sw01.example.com\n"
+        "+logging source-interface 10.0.0.1\n"
+        "+ntp server 10.0.0.10\n"
+        "+description uplink to sw011"
+    )
+    assert normalize_text(text, ["sw01", "sw01.example.com", "10.0.0.1"]) == (
+        "@@\n"
+        "+hostname <host>\n"
+        "+logging source-interface <ip>\n"
+        "+ntp server 10.0.0.10\n"
+        "+description uplink to sw011"
+    )
+
+
+def test_identical_diffs_are_grouped():
+    data = fleet(800)
+    data["hosts"]["sw0005"] = host_result("+ntp server 192.0.2.99", tokens=["sw0005"])
+    data["hosts"]["sw0006"] = host_result("")
+    data["hosts"]["sw0007"] = host_result(
+        "", failed=True, error="ConnectionException('sw0007 timed out')"
+    )
+
+    groups = summarize_results(data)
+
+    assert [len(group.hosts) for group in groups] == [797, 1, 1, 1]
+    assert groups[0].text == "+snmp-server location <host>\n+ntp server 192.0.2.10"
+
+    summary = format_diff_summary(groups, data["task"])
+    assert summary.startswith(
+        "napalm_apply_config_to_devices: 800 devices, 2 distinct diffs, 1 failed\n"
+        "==== 797 devices share this diff"
+    )
+    assert summary.count("+snmp-server location") == 1
+    # outliers keep their own names
+    assert "* sw0007 (failed)\n" in summary
+    assert "sw0007 timed out" in summary
+
+
+def test_summary_notes_replace_the_report():
+    data = fleet(800)
+    report = "x" * 3_000_000
+
+    notes = plan_report_notes(
+        report, groups=summarize_results(data), artifact_path="report.txt.gz"
+    )
+
+    assert len(notes) == 1
+    assert "800 devices share this diff" in notes[0]
+    assert notes == build_summary_notes(summarize_results(data))
@@ -0,0 +1,118 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from ..ci_utils import gitlab_api
+from ..ci_utils.gitlab_api import AsyncGitLabCiApiClient, GitLabApiError, GitLabClient
+
+api = "https://gitlab.example.com/api/v4"
+
+
+def response(status_code, body=None, headers=None):
+    resp = mock.Mock(status_code=status_code, headers=headers or {}, text="error")
+    resp.json.return_value = body
+    return resp
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(gitlab_api.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_rate_limited_get_is_retried_after_retry_after(sleeps):
+    client = GitLabClient(api, "token")
+    client.session.request = mock.Mock(
+        side_effect=[
+            response(429, headers={"Retry-After": "7"}),
+            response(502),
+            response(200, {"changes": []}),
+        ]
+    )
+
+    assert client.get_mr_change_files("1", "7") == {"changes": []}
+    # Retry-After, then exponential backoff
+    assert sleeps == [7.0, 2.0]
+    assert client.session.request.call_args.kwargs["timeout"] == (5, 30)
+
+
+def test_post_is_only_retried_when_rate_limited(sleeps):
+    client = GitLabClient(api, "token")
+    client.session.request = mock.Mock(
+        side_effect=[response(429), response(500), response(201, {"id": 1})]
+    )
+
+    with pytest.raises(GitLabApiError, match="Failed to post note"):
+        client.post_mr_note("1", "7", "report")
+    assert client.session.request.call_count == 2
+
+
+def test_exhausted_rate_limit_waits_for_reset(sleeps, monkeypatch):
+    monkeypatch.setattr(gitlab_api.time, "time", lambda: 1000.0)
+    client = GitLabClient(api, "token")
+    client.session.request = mock.Mock(
+        return_value=response(
+            200, [], {"RateLimit-Remaining": "0", "RateLimit-Reset": "1012"}
+        )
+    )
+
+    client.get_all_pages(f"{api}/x")
+    assert sleeps == []
+    client.get_all_pages(f"{api}/x")
+    assert sleeps == [12.0]
+
+
+def test_repeated_get_is_revalidated_with_etag(sleeps):
+    client = GitLabClient(api, "token")
+    client.session.request = mock.Mock(
+        side_effect=[
+            response(200, [{"id": 1}], {"ETag": 'W/"abc"', "X-Total-Pages": "1"}),
+            response(304),
+        ]
+    )
+
+    assert client.get_all_pages(f"{api}/x") == [{"id": 1}]
+    assert client.get_all_pages(f"{api}/x") == [{"id": 1}]
+    assert client.session.request.call_args.kwargs["headers"] == {
+        "If-None-Match": 'W/"abc"'
+    }
+
+
+def test_trigger_pipeline_variables(sleeps):
+    client = GitLabClient(api, "token")
+    client.session.request = mock.Mock(return_value=response(201, {"id": 42}))
+
+    assert client.trigger_pipeline(
+        "1", "main", [{"key": "CI_PIPELINE_SOURCE", "value": "web"}]
+    ) == {"id": 42}
+    assert client.session.request.call_args.kwargs["json"] == {
+        "ref": "main",
+        "variables": [{"key": "CI_PIPELINE_SOURCE", "value": "web"}],
+    }
+
+    client.trigger_pipeline("1", "main", [{"key": "CHANGE_DEVICE_LIST", "value": ""}])
+    assert client.session.request.call_args.kwargs["json"]["variables"] == [
+        {"key": "CI_PIPELINE_SOURCE", "value": "api"},
+        {"key": "CHANGE_DEVICE_LIST", "value": ""},
+    ]
+
+
+def test_async_client_posts_concurrently(monkeypatch):
+    monkeypatch.setenv("CI_API_V4_URL", api)
+    monkeypatch.setenv("CI_PROJECT_ID", "1")
+    monkeypatch.setenv("CI_MERGE_REQUEST_IID", "7")
+    client = gitlab_api.GitLabCiApiClient()
+    client.session.request = mock.Mock(return_value=response(201, {"id": 1}))
+    async_client = AsyncGitLabCiApiClient(client)
+
+    async def post_all():
+        return await asyncio.gather(
+            *(async_client.post_mr_note(f"note {i}") for i in range(4))
+        )
+
+    assert asyncio.run(post_all()) == [{"id": 1}] * 4
+    assert client.session.request.call_args.args[1].endswith(
+        "/projects/1/merge_requests/7/notes"
+    )
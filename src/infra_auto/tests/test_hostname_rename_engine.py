@@ -0,0 +1,117 @@
+import json
+
+import pytest
+
+from ..task_runners.hostname_rename_engine import (
+    HostnameRenameEngine,
+    RenameJournal,
+    rename_hosts_yaml_content,
+)
+
+hosts_yaml = """---
+r1:
+  hostname: 10.0.0.1
+  platform: ios
+r10:
+  hostname: 10.0.0.10
+  platform: nxos_ssh
+r1-mgmt:
+  hostname: 10.0.1.1
+  data:
+    peer:
+      r1:
+        - uplink
+"""
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "inventory").mkdir()
+    (tmp_path / "inventory" / "hosts.yaml").write_text(hosts_yaml)
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "r1.cfg").write_text("!\nhostname r1\n!\nend\n")
+    (tmp_path / "cfg" / "r10.cfg").write_text("hostname r10\nvdc r10 id 1\n")
+    return tmp_path
+
+
+def test_rename_hosts_yaml_content_renames_only_top_level_keys():
+    renamed = rename_hosts_yaml_content(hosts_yaml, {"r1": "core-1", "r10": "core-10"})
+
+    assert renamed == (
+        hosts_yaml.replace("\nr1:\n", "\ncore-1:\n").replace("\nr10:\n", "\ncore-10:\n")
+    )
+    # keys sharing a prefix and nested keys are left alone
+    assert "\nr1-mgmt:\n" in renamed
+    assert "      r1:\n" in renamed
+
+
+def test_rename_hosts_yaml_content_keeps_line_endings():
+    assert rename_hosts_yaml_content("r1:\r\n  platform: ios\r\n", {"r1": "a"}) == (
+        "a:\r\n  platform: ios\r\n"
+    )
+
+
+def test_engine_renames_hosts_yaml_and_cfg(repo):
+    engine = HostnameRenameEngine(
+        {"r1": "core-1", "r10": "core-10"},
+        {"r1": "ios", "r10": "nxos_ssh"},
+        journal=RenameJournal(str(repo / "journal.jsonl")),
+    )
+    engine.apply()
+
+    hosts = (repo / "inventory" / "hosts.yaml").read_text()
+    assert "\ncore-1:\n" in hosts and "\ncore-10:\n" in hosts
+    assert "\nr1-mgmt:\n" in hosts
+    assert sorted(path.name for path in (repo / "cfg").iterdir()) == [
+        "core-1.cfg",
+        "core-10.cfg",
+    ]
+    assert (repo / "cfg" / "core-1.cfg").read_text() == "!\nhostname core-1\n!\nend\n"
+    assert (repo / "cfg" / "core-10.cfg").read_text() == (
+        "hostname core-10\nvdc core-10 id 1\n"
+    )
+
+    engine.commit()
+    assert not engine.journal.exists()
+
+
+def test_interrupted_rename_is_rolled_back(repo):
+    journal = RenameJournal(str(repo / "journal.jsonl"))
+    # r2 has no cfg file, its worker fails after the others went through
+    engine = HostnameRenameEngine(
+        {"r1": "core-1", "r2": "core-2"}, {"r1": "ios"}, journal=journal
+    )
+    with pytest.raises(FileNotFoundError):
+        engine.apply()
+
+    assert journal.exists()
+    with pytest.raises(RuntimeError, match="roll it back"):
+        engine.apply()
+
+    # a crash between journaling and renaming leaves an entry to skip
+    journal.record(
+        {
+            "op": "rename_cfg",
+            "src": "./cfg/r10.cfg",
+            "dst": "./cfg/core-10.cfg",
+            "replaced_lines": [[0, "hostname r10"]],
+        }
+    )
+
+    assert engine.rollback() == 3
+    assert not journal.exists()
+    assert (repo / "inventory" / "hosts.yaml").read_text() == hosts_yaml
+    assert (repo / "cfg" / "r1.cfg").read_text() == "!\nhostname r1\n!\nend\n"
+    assert (repo / "cfg" / "r10.cfg").read_text() == "hostname r10\nvdc r10 id 1\n"
+    assert not (repo / "cfg" / "core-1.cfg").exists()
+
+
+def test_journal_entries_are_flushed_one_per_line(tmp_path):
+    journal = RenameJournal(str(tmp_path / "journal.jsonl"))
+    journal.record({"op": "write_file", "path": "a", "backup": "x\n"})
+    journal.record({"op": "write_file", "path": "b", "backup": ""})
+
+    lines = (tmp_path / "journal.jsonl").read_text().splitlines()
+    assert [json.loads(line)["path"] for line in lines] == ["a", "b"]
+    assert journal.entries()[0]["backup"] == "x\n"
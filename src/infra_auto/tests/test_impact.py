@@ -0,0 +1,140 @@
+import subprocess
+import sys
+
+import pytest
+import yaml
+
+from ..ci_utils.impact import ImpactIndex
+from ..task_runners import NornirRunner
+
+module_source = """
+import os
+
+from infra_auto.baseline import BaselineModule
+
+baseline = BaselineModule(
+    name="baseline_impact_demo",
+    template_dir=os.path.join(os.path.dirname(__file__), "templates"),
+    templates={"ios": "ios.j2", "nxos_ssh": "nxos.j2"},
+)
+"""
+
+
+def write_yaml(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(yaml.safe_dump(content))
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    hosts = {
+        "r1": {"platform": "ios", "groups": ["site_a"]},
+        "r2": {"platform": "ios", "groups": ["site_b"]},
+        "n1": {"platform": "nxos_ssh", "groups": ["site_a"]},
+        "x1": {"platform": "ios", "groups": ["site_c"]},
+    }
+    write_yaml(tmp_path / "inventory" / "hosts.yaml", hosts)
+    write_yaml(
+        tmp_path / "inventory" / "groups.yaml",
+        {"site_a": {}, "site_b": {}, "site_c": {"data": {"dns": "192.0.2.53"}}},
+    )
+    write_yaml(tmp_path / "inventory" / "defaults.yaml", {"username": "admin"})
+    write_yaml(
+        tmp_path / "nornir.yaml",
+        {
+            "inventory": {
+                "plugin": "SimpleInventory",
+                "options": {
+                    "host_file": "inventory/hosts.yaml",
+                    "group_file": "inventory/groups.yaml",
+                    "defaults_file": "inventory/defaults.yaml",
+                },
+            },
+            "logging": {"enabled": False},
+        },
+    )
+
+    module = tmp_path / "baseline_impact_demo"
+    (module / "templates").mkdir(parents=True)
+    (module / "__init__.py").write_text(module_source)
+    (module / "templates" / "ios.j2").write_text('{% include "common.j2" %}\n')
+    (module / "templates" / "nxos.j2").write_text("feature snmp\n")
+    (module / "templates" / "common.j2").write_text("snmp-server contact noc\n")
+    (module / "templates" / "unused.j2").write_text("\n")
+    write_yaml(
+        module / "vars" / "groups.yaml",
+        {"site_a": {"contact": "noc-a"}, "site_b": {"contact": "noc-b"}},
+    )
+    write_yaml(module / "vars" / "hosts.yaml", {"r1": {"location": "rack 1"}})
+
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=tmp_path, check=True)
+    subprocess.run(
+        ["git", "-c", "user.email=ci@example.com", "-c", "user.name=ci"]
+        + ["commit", "-q", "-m", "base"],
+        cwd=tmp_path,
+        check=True,
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    # imported from the repo of a previous test
+    monkeypatch.delitem(sys.modules, "baseline_impact_demo", raising=False)
+    return tmp_path
+
+
+def affected(repo, path):
+    index = ImpactIndex(NornirRunner(config_file="nornir.yaml"))
+    return index.affected_hosts([path], "HEAD")
+
+
+def test_module_group_vars_change(repo):
+    write_yaml(
+        repo / "baseline_impact_demo" / "vars" / "groups.yaml",
+        {"site_a": {"contact": "noc-a"}, "site_b": {"contact": "noc"}},
+    )
+    assert affected(repo, "baseline_impact_demo/vars/groups.yaml") == ["r2"]
+
+
+def test_module_host_vars_change(repo):
+    write_yaml(
+        repo / "baseline_impact_demo" / "vars" / "hosts.yaml",
+        {"r1": {"location": "rack 2"}},
+    )
+    assert affected(repo, "baseline_impact_demo/vars/hosts.yaml") == ["r1"]
+
+
+def test_included_template_change(repo):
+    # common.j2 is only included by the ios template
+    assert affected(repo, "baseline_impact_demo/templates/common.j2") == ["r1", "r2"]
+    assert affected(repo, "baseline_impact_demo/templates/nxos.j2") == ["n1"]
+    assert affected(repo, "baseline_impact_demo/templates/unused.j2") == []
+
+
+def test_module_code_change(repo):
+    assert affected(repo, "baseline_impact_demo/__init__.py") == ["n1", "r1", "r2"]
+
+
+def test_inventory_changes(repo):
+    write_yaml(
+        repo / "inventory" / "groups.yaml",
+        {"site_a": {}, "site_b": {}, "site_c": {"data": {"dns": "192.0.2.54"}}},
+    )
+    assert affected(repo, "inventory/groups.yaml") == ["x1"]
+
+    hosts = yaml.safe_load((repo / "inventory" / "hosts.yaml").read_text())
+    hosts["n1"]["groups"] = ["site_b"]
+    write_yaml(repo / "inventory" / "hosts.yaml", hosts)
+    assert affected(repo, "inventory/hosts.yaml") == ["n1"]
+
+    assert affected(repo, "inventory/defaults.yaml") == ["n1", "r1", "r2", "x1"]
+    assert affected(repo, "README.md") == []
+
+
+def test_only_task_module_directories_are_imported(repo):
+    package = repo / "not_a_task_module"
+    package.mkdir()
+    (package / "__init__.py").write_text("raise SystemExit('imported')\n")
+    (package / "data.txt").write_text("\n")
+
+    assert affected(repo, "not_a_task_module/data.txt") == []
+    assert "not_a_task_module" not in sys.modules
@@ -0,0 +1,92 @@
+import gzip
+
+from ..report import build_report_notes, format_result_report, split_host_sections
+from ..report.mr_report import plan_report_notes
+
+
+def make_report(count, diff_lines=3, failed=()):
+    hosts = {}
+    for i in range(count):
+        name = f"sw{i:04d}"
+        hosts[name] = {
+            "changed": True,
+            "failed": name in failed,
+            "results": [
+                {
+                    "name": "napalm_apply_config_to_devices",
+                    "changed": True,
+                    "failed": name in failed,
+                    "diff": "\n".join(
+                        f"+ntp server 192.0.2.{n}" for n in range(diff_lines)
+                    ),
+                    "result": "",
+                    "exception": None,
+                }
+            ],
+        }
+    return format_result_report(
+        {"task": "napalm_apply_config_to_devices", "hosts": hosts}
+    )
+
+
+def test_split_host_sections_strips_colors():
+    report = "\x1b[1m\x1b[32m" + make_report(2, failed=("sw0001",))
+
+    header, sections = split_host_sections(report)
+
+    assert header.startswith("napalm_apply_config_to_devices")
+    assert [(host, failed) for host, failed, _ in sections] == [
+        ("sw0000", False),
+        ("sw0001", True),
+    ]
+    assert "+ntp server 192.0.2.2" in sections[0][2]
+    assert "\x1b" not in sections[0][2]
+
+
+def test_notes_fold_hosts_and_respect_size():
+    notes = build_report_notes(make_report(200), max_note_size=5000)
+
+    assert len(notes) > 1
+    assert all(len(note) <= 5000 for note in notes)
+    assert notes[0].startswith("### Nornir Dry Run Output\n\n200 devices")
+    assert notes[1].startswith(f"### Nornir Dry Run Output (2/{len(notes)})")
+    assert sum(note.count("<details><summary>") for note in notes) == 200
+
+
+def test_huge_section_is_truncated():
+    notes = build_report_notes(make_report(1, diff_lines=2000), max_note_size=5000)
+    assert len(notes) == 1
+    assert len(notes[0]) <= 5000
+    assert "truncated" in notes[0]
+
+
+def test_large_report_goes_to_artifact(tmp_path, monkeypatch):
+    monkeypatch.setenv("CI_JOB_URL", "https://gitlab.example.com/net/cfg/-/jobs/42")
+    report = make_report(300)
+    artifact = tmp_path / "report.txt.gz"
+
+    notes = plan_report_notes(
+        report, max_note_size=5000, max_notes=3, artifact_path=str(artifact)
+    )
+
+    assert len(notes) == 3
+    assert f"/-/jobs/42/artifacts/raw/{artifact}" in notes[0]
+    # the counters number the posted notes only
+    assert notes[2].startswith("### Nornir Dry Run Output (3/3)")
+    with gzip.open(artifact, "rt") as f:
+        assert f.read() == report
+
+
+def test_small_report_is_posted_as_is(tmp_path):
+    notes = plan_report_notes(make_report(3), artifact_path=str(tmp_path / "r.gz"))
+    assert len(notes) == 1
+    assert not (tmp_path / "r.gz").exists()
+
+
+def test_large_report_is_capped_without_artifact():
+    notes = plan_report_notes(make_report(300), max_note_size=5000, max_notes=3)
+
+    assert len(notes) == 3
+    assert "only the first 2 of its" in notes[0]
+    assert "job log" in notes[0]
+    assert notes[1].startswith("### Nornir Dry Run Output (2/3)")
@@ -0,0 +1,145 @@
+import os
+from unittest import mock
+
+import pytest
+from nornir.core.task import Result
+
+from ..testbed import execute
+from ..testbed.cache import PrecheckCache, precheck_cache_key
+
+
+def test_cache_key_depends_on_every_input():
+    key = precheck_cache_key("ios", "15.9", ["hostname testbed"], [])
+    assert key == precheck_cache_key("ios", "15.9", ["hostname testbed"], [])
+    assert key != precheck_cache_key("ios", "17.3", ["hostname testbed"], [])
+    assert key != precheck_cache_key("nxos_ssh", "15.9", ["hostname testbed"], [])
+    assert key != precheck_cache_key("ios", "15.9", ["hostname other"], [])
+    assert key != precheck_cache_key("ios", "15.9", ["hostname testbed"], ["wr"])
+
+
+def test_put_and_get(tmp_path):
+    cache = PrecheckCache(cache_dir=str(tmp_path), ttl=60)
+    assert cache.get("key") is None
+
+    cache.put("key", "ios", "Diff:\n+ snmp-server", "+ snmp-server", False)
+
+    entry = cache.get("key")
+    assert entry["result"] == "Diff:\n+ snmp-server"
+    assert entry["diff"] == "+ snmp-server"
+    assert entry["failed"] is False
+    assert os.listdir(tmp_path) == ["key.json"]
+
+
+def test_expired_entry_is_invalidated(tmp_path):
+    cache = PrecheckCache(cache_dir=str(tmp_path), ttl=60)
+    with mock.patch("time.time", return_value=1000):
+        cache.put("key", "ios", "result", "", True)
+
+    with mock.patch("time.time", return_value=1100):
+        assert cache.get("key") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = PrecheckCache(cache_dir=str(tmp_path), ttl=0)
+    cache.put("key", "ios", "result", "", False)
+
+    assert cache.get("key") is None
+    assert os.listdir(tmp_path) == []
+
+
+def test_clear_by_platform(tmp_path):
+    cache = PrecheckCache(cache_dir=str(tmp_path), ttl=60)
+    cache.put("a", "ios", "result", "", False)
+    cache.put("b", "nxos_ssh", "result", "", False)
+    cache.put("c", "ios", "result", "", False)
+
+    assert cache.clear("ios") == 2
+    assert cache.get("b") is not None
+    assert cache.clear() == 1
+    assert os.listdir(tmp_path) == []
+
+
+def test_clear_missing_cache_dir(tmp_path):
+    cache = PrecheckCache(cache_dir=str(tmp_path / "missing"), ttl=60)
+    assert cache.clear() == 0
+
+
+def test_precheck_outcome_is_reused(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "r1.cfg").write_text("hostname r1\n")
+    monkeypatch.setattr(
+        execute, "PrecheckCache", lambda: PrecheckCache(str(tmp_path / "cache"), 60)
+    )
+    monkeypatch.setattr(execute, "filter_config", lambda platform, lines, data: lines)
+
+    task = mock.Mock()
+    task.host.name = "r1"
+    task.host.platform = "ios"
+    task.host.data = {"version": "15.9"}
+
+    def precheck(pool, task, platform, version, target_config_lines):
+        return Result(host=task.host, result="Diff:", diff="", failed=False), version
+
+    pooled_check = mock.Mock(side_effect=precheck)
+    monkeypatch.setattr(execute, "_run_pooled_preconfig_check", pooled_check)
+    monkeypatch.setattr(execute.testbed_pool, "get_active_pool", lambda: object())
+
+    first = execute.run_preconfig_check(task)
+    second = execute.run_preconfig_check(task)
+
+    assert pooled_check.call_count == 1
+    assert first.result == "Diff:"
+    assert second.result == "Cached pre-check result:\nDiff:"
+    assert second.failed is False
+
+
+@pytest.fixture
+def precheck_task(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "r1.cfg").write_text("hostname r1\n")
+    monkeypatch.setattr(
+        execute, "PrecheckCache", lambda: PrecheckCache(str(tmp_path / "cache"), 60)
+    )
+    monkeypatch.setattr(execute, "filter_config", lambda platform, lines, data: lines)
+
+    task = mock.Mock()
+    task.host.name = "r1"
+    task.host.platform = "ios"
+    task.host.data = {"version": "15.9"}
+    return task
+
+
+def test_precheck_on_fallback_image_is_not_cached(precheck_task, monkeypatch):
+    def precheck(pool, task, platform, version, target_config_lines):
+        # no 15.9 machine in the lab, the test ran on 15.8
+        return Result(host=task.host, result="Diff:", diff="", failed=False), "15.8"
+
+    pooled_check = mock.Mock(side_effect=precheck)
+    monkeypatch.setattr(execute, "_run_pooled_preconfig_check", pooled_check)
+    monkeypatch.setattr(execute.testbed_pool, "get_active_pool", lambda: object())
+
+    execute.run_preconfig_check(precheck_task)
+    second = execute.run_preconfig_check(precheck_task)
+
+    assert pooled_check.call_count == 2
+    assert second.result == "Diff:"
+    assert not os.path.exists("cache")
+
+
+def test_lab_error_fails_the_precheck_and_is_not_cached(precheck_task, monkeypatch):
+    machine = mock.Mock(version="15.9", at_checkpoint=False)
+    machine.napalm().load_replace_candidate.side_effect = Exception("timed out")
+    machine.netmiko().send_command.return_value = ""
+    pool = mock.Mock()
+    pool.acquire.return_value = machine
+    monkeypatch.setattr(execute.testbed_pool, "get_active_pool", lambda: pool)
+
+    result = execute.run_preconfig_check(precheck_task)
+
+    assert result.failed
+    assert "Pre-check failed: timed out" in result.result
+    pool.release.assert_called_once_with(machine)
+    assert not os.path.exists("cache")
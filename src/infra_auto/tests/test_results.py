@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from ..ci_utils.tasks.merge_shard_results import merge_shard_results
+from ..report import format_result_report, merge_result_files
+
+
+def host_data(changed=True, failed=False, diff="+ntp server 192.0.2.1"):
+    return {
+        "changed": changed,
+        "failed": failed,
+        "results": [
+            {
+                "name": "napalm_sync_config_from_devices",
+                "changed": changed,
+                "failed": failed,
+                "diff": diff,
+                "result": "Config has changed",
+                "exception": "ConnectionException('timed out')" if failed else None,
+            }
+        ],
+    }
+
+
+def write_shard(tmp_path, index, hosts, task="napalm_sync_config_from_devices"):
+    path = tmp_path / f"result-{index}.json"
+    path.write_text(
+        json.dumps({"task": task, "shards": [f"{index}/2"], "hosts": hosts})
+    )
+    return str(path)
+
+
+def test_merge_shards_with_overlapping_and_failed_hosts(tmp_path):
+    first = write_shard(tmp_path, 1, {"r2": host_data(), "r1": host_data(failed=True)})
+    # r1 was retried by the second shard, the last file wins
+    second = write_shard(tmp_path, 2, {"r1": host_data(diff=""), "r3": host_data()})
+
+    merged = merge_result_files([first, second])
+
+    assert merged["task"] == "napalm_sync_config_from_devices"
+    assert merged["shards"] == ["1/2", "2/2"]
+    assert list(merged["hosts"]) == ["r1", "r2", "r3"]
+    assert not merged["hosts"]["r1"]["failed"]
+
+
+def test_merge_rejects_results_of_another_task(tmp_path):
+    first = write_shard(tmp_path, 1, {"r1": host_data()})
+    second = write_shard(tmp_path, 2, {"r2": host_data()}, task="other")
+
+    with pytest.raises(ValueError, match="Cannot merge"):
+        merge_result_files([first, second])
+
+
+def test_format_result_report():
+    report = format_result_report(
+        {
+            "task": "napalm_sync_config_from_devices",
+            "hosts": {"r1": host_data(failed=True), "r2": host_data(changed=False)},
+        }
+    )
+
+    lines = report.splitlines()
+    assert lines[0] == "napalm_sync_config_from_devices" + "*" * 49
+    assert lines[1] == "* r1 ** changed : True " + "*" * 57
+    assert lines[2].startswith(
+        "vvvv napalm_sync_config_from_devices ** changed : True v"
+    )
+    assert lines[2].endswith("v ERROR")
+    assert lines[3:5] == ["+ntp server 192.0.2.1", "Config has changed"]
+    assert lines[5] == "^^^^ END napalm_sync_config_from_devices " + "^" * 39
+    assert lines[7].endswith(" INFO")
+    assert all(len(line) == 80 for line in (lines[0], lines[1], lines[5]))
+
+
+def test_merge_shard_results_writes_json_and_report(tmp_path, capsys):
+    files = [
+        write_shard(tmp_path, 1, {"r1": host_data(failed=True)}),
+        write_shard(tmp_path, 2, {"r2": host_data(changed=False, diff="")}),
+    ]
+    output = tmp_path / "merged.json"
+    report = tmp_path / "report.txt"
+
+    merged = merge_shard_results(files, str(output), str(report))
+
+    assert json.loads(output.read_text()) == merged
+    assert report.read_text() == format_result_report(merged)
+    assert "2 devices, 1 changed, 1 failed" in capsys.readouterr().out
+
+    with pytest.raises(ValueError):
+        merge_shard_results([])
@@ -0,0 +1,39 @@
+import pytest
+
+from ..task_runners.shard import assign_shards, parse_shard, select_shard
+
+hosts = [f"sw-{i:03d}" for i in range(200)]
+
+
+def test_parse_shard():
+    assert parse_shard("2/4") == (2, 4)
+    with pytest.raises(ValueError):
+        parse_shard("0/4")
+    with pytest.raises(ValueError):
+        parse_shard("5/4")
+    with pytest.raises(ValueError):
+        parse_shard("two")
+
+
+def test_shards_partition_hosts():
+    selected = [select_shard(hosts, f"{i}/4") for i in range(1, 5)]
+    assert sorted(host for shard in selected for host in shard) == hosts
+    assert all(len(shard) > 0 for shard in selected)
+
+
+def test_shard_of_host_does_not_depend_on_other_hosts():
+    full = assign_shards(hosts, 4)
+    subset = assign_shards(hosts[::3], 4)
+    assert all(full[host] == shard for host, shard in subset.items())
+
+
+def test_weighted_shards_balance_durations():
+    durations = {host: 1.0 for host in hosts}
+    durations["sw-000"] = 100.0
+    assignment = assign_shards(hosts, 2, durations)
+
+    loads = {1: 0.0, 2: 0.0}
+    for host, shard in assignment.items():
+        loads[shard] += durations[host]
+    # the slow host is alone with as few others as possible
+    assert abs(loads[1] - loads[2]) <= 1.0
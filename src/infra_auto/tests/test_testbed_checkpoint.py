@@ -0,0 +1,75 @@
+from unittest import mock
+
+import pytest
+
+from ..testbed.checkpoint import Checkpoint, CheckpointError, create_checkpoint
+
+xr_commit_list = """
+SNo. Label/ID              User      Line                Client      Time Stamp
+~~~~ ~~~~~~~~              ~~~~      ~~~~                ~~~~~~      ~~~~~~~~~~
+1    1000000042            admin     vty0:node0_RP0_CPU0 CLI         Mon Oct  5 10:00:00 2026
+"""
+
+
+def test_nxos_checkpoint_and_rollback():
+    netmiko_con = mock.Mock()
+    netmiko_con.send_command.return_value = "Done"
+
+    checkpoint = create_checkpoint(netmiko_con, "nxos_ssh")
+    checkpoint.restore(netmiko_con)
+
+    commands = [call.args[0] for call in netmiko_con.send_command.call_args_list]
+    assert commands == [
+        "no checkpoint infra_auto_baseline",
+        "checkpoint infra_auto_baseline",
+        "rollback running-config checkpoint infra_auto_baseline",
+    ]
+
+
+def test_ios_checkpoint_confirms_copy_prompts():
+    netmiko_con = mock.Mock()
+    netmiko_con.send_command_timing.side_effect = [
+        "Destination filename [infra_auto_baseline.cfg]?",
+        "Do you want to over write? [confirm]",
+        "1234 bytes copied in 0.5 secs",
+    ]
+    netmiko_con.send_command.return_value = "Rollback Done"
+
+    checkpoint = create_checkpoint(netmiko_con, "ios")
+    checkpoint.restore(netmiko_con)
+
+    assert netmiko_con.send_command_timing.call_count == 3
+    netmiko_con.send_command.assert_called_once_with(
+        "configure replace bootflash:infra_auto_baseline.cfg force", read_timeout=300
+    )
+
+
+def test_iosxr_rolls_back_to_the_reservation_commit():
+    netmiko_con = mock.Mock()
+    netmiko_con.send_command.side_effect = [xr_commit_list, "Loading Rollback Changes."]
+
+    checkpoint = create_checkpoint(netmiko_con, "iosxr")
+    checkpoint.restore(netmiko_con)
+
+    assert netmiko_con.send_command.call_args.args[0] == (
+        "rollback configuration to 1000000042"
+    )
+
+
+def test_restore_error_is_raised():
+    netmiko_con = mock.Mock()
+    netmiko_con.send_command.return_value = "% Checkpoint infra_auto_baseline not found"
+    checkpoint = create_checkpoint(
+        mock.Mock(**{"send_command.return_value": ""}), "nxos_ssh"
+    )
+    with pytest.raises(CheckpointError):
+        checkpoint.restore(netmiko_con)
+
+
+def test_unsupported_platform_has_no_checkpoint():
+    assert create_checkpoint(mock.Mock(), "hp_comware") is None
+
+
+def test_checkpoint_is_abstract():
+    with pytest.raises(TypeError):
+        Checkpoint()
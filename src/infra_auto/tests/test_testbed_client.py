@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+import requests
+from device_sim import DeviceStore
+from device_sim import testbed_api as sim_testbed_api
+
+from ..testbed import client as testbed_client
+
+machines = [
+    {
+        "serial": f"SIM-n9k-{i}",
+        "vendor": "cisco",
+        "model": "n9k",
+        "version": version,
+        "platform": "nxos_ssh",
+        "hostname": f"lab-n9k-{i}",
+        "mgmt_ip": f"192.0.2.{i + 1}",
+    }
+    for i, version in enumerate(["9.3.8", "10.2.5"])
+]
+
+
+@pytest.fixture
+def api():
+    with sim_testbed_api.TestbedApiServer(
+        machines, token="token", store=DeviceStore()
+    ) as api:
+        yield api
+
+
+def test_machine_list_is_cached_and_indexed(api, monkeypatch):
+    client = testbed_client.TestbedClient(api.url, "token", machines_ttl=60)
+    fetches = []
+    request = client.session.request
+    monkeypatch.setattr(
+        client.session,
+        "request",
+        lambda method, url, **kwargs: fetches.append(url)
+        or request(method, url, **kwargs),
+    )
+
+    assert [m["serial"] for m in client.find_machines("cisco", "n9k")] == [
+        "SIM-n9k-0",
+        "SIM-n9k-1",
+    ]
+    assert [m["serial"] for m in client.find_machines("cisco", "n9k", "10.2.5")] == [
+        "SIM-n9k-1"
+    ]
+    assert client.find_machines("cisco", "xrv") == []
+    assert len(fetches) == 1
+
+    # a reservation changes the machine statuses
+    assert client.reserve_machine("cisco", "n9k", "9.3.8")["serial"] == "SIM-n9k-0"
+    statuses = [m["status"] for m in client.find_machines("cisco", "n9k")]
+    assert statuses == ["reserved", "available"]
+    assert client.release_machine("SIM-n9k-0")
+
+
+def test_failed_requests_return_nothing(api):
+    client = testbed_client.TestbedClient(api.url, "wrong-token", retries=0)
+    assert client.get_available_machines() == []
+    assert client.find_machines("cisco", "n9k") == []
+    assert client.reserve_machine("cisco", "n9k", "9.3.8") is None
+    assert client.release_machine("SIM-n9k-0") is False
+
+
+def test_requests_time_out():
+    client = testbed_client.TestbedClient(
+        "http://192.0.2.1:9", "token", timeout=0.01, retries=0
+    )
+    with pytest.raises(requests.RequestException):
+        client._request("GET", "/machines")
+
+
+def test_async_client(api):
+    client = testbed_client.AsyncTestbedClient(
+        testbed_client.TestbedClient(api.url, "token")
+    )
+
+    async def reserve_and_release():
+        reserved = await asyncio.gather(
+            client.reserve_machine("cisco", "n9k", "9.3.8"),
+            client.reserve_machine("cisco", "n9k", "10.2.5"),
+        )
+        released = await client.release_machines([m["serial"] for m in reserved])
+        return reserved, released
+
+    reserved, released = asyncio.run(reserve_and_release())
+    assert {m["serial"] for m in reserved} == {"SIM-n9k-0", "SIM-n9k-1"}
+    assert released == [True, True]
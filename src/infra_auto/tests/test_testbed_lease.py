@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+from unittest import mock
+
+import pytest
+import device_sim
+from device_sim import profiles as sim_profiles
+
+from ..commands import testbed_command
+from ..testbed import execute, lease
+from ..testbed import pool as testbed_pool
+from ..testbed import client as testbed_client
+
+
+@pytest.fixture
+def lab(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim_profiles, "time_scale", 0)
+    device_sim.register_netmiko_driver()
+    device_sim.build_lab(str(tmp_path), 1, ["nxos_ssh"])
+    monkeypatch.chdir(tmp_path)
+
+    machines = [
+        {
+            "serial": f"SIM-n9k-{i}",
+            "vendor": "cisco",
+            "model": "n9k",
+            "version": "9.3.8",
+            "platform": "nxos_ssh",
+            "hostname": f"lab-n9k-{i}",
+            "mgmt_ip": f"192.0.2.{i + 1}",
+            "netmask": "255.255.255.0",
+            "default_gateway": "192.0.2.254",
+        }
+        for i in range(2)
+    ]
+    with device_sim.TestbedApiServer(machines, token="token") as api:
+        monkeypatch.setattr(
+            execute, "testbed_client", testbed_client.TestbedClient(api.url, "token")
+        )
+        yield api
+    device_sim.get_store().clear()
+
+
+def test_warmed_machines_are_used_then_released(lab):
+    warmed = testbed_pool.TestbedPool(lease_file="lease.json").warm(
+        {("nxos_ssh", "9.3.8"): 3}
+    )
+    # only two machines in the lab
+    assert len(warmed) == 2
+    assert len(lease.read_leases("lease.json")) == 2
+
+    with testbed_pool.TestbedPool(lease_file="lease.json") as pool:
+        machine = pool.acquire("nxos_ssh", "9.3.8")
+        assert machine.serial == warmed[0]["machine"]["serial"]
+        assert machine.checkpoint is not None
+        pool.release(machine)
+    assert len(lease.read_leases("lease.json")) == 1
+
+    assert lease.release_leases("lease.json") == 1
+    assert not os.path.exists("lease.json")
+    assert {m["status"] for m in lab.list_machines()} == {"available"}
+
+
+def test_unreachable_machine_is_replaced(lab, monkeypatch):
+    # the first reserved machine doesn't answer
+    reserve = lab.reserve
+
+    def reserve_unreachable_first(*args):
+        machine = reserve(*args)
+        if machine["serial"] == "SIM-n9k-0":
+            lab.store.remove(machine["mgmt_ip"])
+        return machine
+
+    monkeypatch.setattr(lab, "reserve", reserve_unreachable_first)
+
+    warmed = testbed_pool.TestbedPool(lease_file="lease.json").warm(
+        {("nxos_ssh", "9.3.8"): 1}
+    )
+
+    assert [w["machine"]["serial"] for w in warmed] == ["SIM-n9k-1"]
+    statuses = {m["serial"]: m["status"] for m in lab.list_machines()}
+    assert statuses == {"SIM-n9k-0": "available", "SIM-n9k-1": "reserved"}
+
+
+def test_leases_are_claimed_by_their_shard(lab):
+    pool = testbed_pool.TestbedPool(lease_file="lease.json")
+    first = pool.warm({("nxos_ssh", "9.3.8"): 1}, shard="1/2")
+    second = pool.warm({("nxos_ssh", "9.3.8"): 1}, shard="2/2")
+
+    # every job gets its own copy of the lease file
+    for shard, warmed in (("2/2", second), ("1/2", first)):
+        with testbed_pool.TestbedPool(lease_file="lease.json", shard=shard) as pool:
+            assert pool._adopt("nxos_ssh", "9.3.8").serial == (
+                warmed[0]["machine"]["serial"]
+            )
+            assert pool._adopt("nxos_ssh", "9.3.8") is None
+        lease.write_leases("lease.json", first + second)
+
+    # untagged jobs leave the leases of the shards alone
+    assert (
+        testbed_pool.TestbedPool(lease_file="lease.json")._adopt("nxos_ssh", "9.3.8")
+        is None
+    )
+
+
+def test_machines_used_by_shards_are_released_once(lab, monkeypatch):
+    released = []
+    release_machine = execute.release_machine
+
+    def count_release(serial):
+        released.append(serial)
+        return release_machine(serial)
+
+    monkeypatch.setattr(execute, "release_machine", count_release)
+
+    pool = testbed_pool.TestbedPool(lease_file="lease.json")
+    warmed = pool.warm({("nxos_ssh", "9.3.8"): 1}, shard="1/2")
+    warmed += pool.warm({("nxos_ssh", "9.3.8"): 1}, shard="2/2")
+
+    # every job gets its own copy of the lease file, only the first shard
+    # uses its machine
+    with testbed_pool.TestbedPool(lease_file="lease.json", shard="1/2") as pool:
+        pool.release(pool.acquire("nxos_ssh", "9.3.8"))
+    assert os.path.exists("lease.used-1-of-2.json")
+    lease.write_leases("lease.json", warmed)
+    with testbed_pool.TestbedPool(lease_file="lease.json", shard="2/2"):
+        pass
+    lease.write_leases("lease.json", warmed)
+
+    assert lease.release_leases("lease.json") == 1
+    assert sorted(released) == ["SIM-n9k-0", "SIM-n9k-1"]
+    assert not os.path.exists("lease.json")
+    assert not os.path.exists("lease.used-1-of-2.json")
+
+
+def test_warm_splits_devices_like_the_jobs(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    hosts = {
+        f"r{i}": {"platform": "ios", "data": {"version": "15.9"}} for i in range(6)
+    }
+    (tmp_path / "hosts.yaml").write_text(json.dumps(hosts))
+    (tmp_path / "nornir.yaml").write_text(
+        json.dumps(
+            {
+                "inventory": {"options": {"host_file": "hosts.yaml"}},
+                "logging": {"enabled": False},
+            }
+        )
+    )
+    # r0 takes as long as all the others, it gets a shard of its own
+    durations = {f"r{i}": 1.0 for i in range(1, 6)}
+    (tmp_path / "durations.json").write_text(
+        json.dumps({"napalm_apply_config_to_devices": {"r0": 5.0, **durations}})
+    )
+    warm = mock.Mock(return_value=[])
+    monkeypatch.setattr(testbed_pool.TestbedPool, "warm", warm)
+
+    parser = argparse.ArgumentParser()
+    testbed_command.TestbedCommand(parser.add_subparsers())
+    args = parser.parse_args(
+        ["testbed", "warm", "--shards", "2", "--shard-history", "durations.json"]
+    )
+    args.func(args)
+
+    assert sorted(
+        (call.kwargs["shard"], dict(call.args[0])) for call in warm.call_args_list
+    ) == [("1/2", {("ios", "15.9"): 1}), ("2/2", {("ios", "15.9"): 5})]
@@ -0,0 +1,146 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+from ..testbed import execute
+from ..testbed import pool as testbed_pool
+
+machines = [
+    {"vendor": "cisco", "model": "n9k", "version": "9.3.8", "status": "available"},
+    {"vendor": "cisco", "model": "n9k", "version": "10.2.5", "status": "available"},
+]
+
+
+def reserved(vendor, model, version):
+    return {
+        "serial": f"{model}-{version}",
+        "hostname": f"lab-{model}",
+        "version": version,
+    }
+
+
+@pytest.fixture
+def testbed_api(monkeypatch):
+    api = mock.Mock()
+    api.find_machines.side_effect = lambda vendor, model: [
+        m for m in machines if m["vendor"] == vendor and m["model"] == model
+    ]
+    api.reserve_machine.side_effect = reserved
+    api.release_machine.return_value = True
+    for name in ("find_machines", "reserve_machine", "release_machine"):
+        monkeypatch.setattr(execute, name, getattr(api, name))
+    # no real inventory nor connections
+    monkeypatch.setattr(
+        testbed_pool.TestbedPool,
+        "_add_test_host",
+        lambda self, machine, platform, model: testbed_pool.TestbedMachine(
+            machine, platform, mock.Mock(), mock.Mock()
+        ),
+    )
+    api.checkpoint = mock.Mock()
+    monkeypatch.setattr(
+        testbed_pool, "create_checkpoint", lambda netmiko_con, platform: api.checkpoint
+    )
+    return api
+
+
+def test_machine_is_reserved_once_and_shared(testbed_api):
+    in_use = []
+    overlaps = []
+
+    def precheck(pool):
+        with pool.lease("nxos_ssh", "10.2.5") as machine:
+            if in_use:
+                overlaps.append(machine)
+            in_use.append(machine)
+            time.sleep(0.01)
+            in_use.remove(machine)
+
+    with testbed_pool.TestbedPool(max_machines=1) as pool:
+        assert testbed_pool.get_active_pool() is pool
+        threads = [threading.Thread(target=precheck, args=(pool,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert testbed_pool.get_active_pool() is None
+    assert overlaps == []
+    # the image of the target is preferred
+    testbed_api.reserve_machine.assert_called_once_with("cisco", "n9k", "10.2.5")
+    testbed_api.release_machine.assert_called_once_with("n9k-10.2.5")
+
+
+def test_prechecks_spread_over_several_machines(testbed_api):
+    with testbed_pool.TestbedPool(max_machines=2) as pool:
+        first = pool.acquire("nxos_ssh", "9.3.8")
+        second = pool.acquire("nxos_ssh", "9.3.8")
+        assert first is not second
+        pool.release(first)
+        assert pool.acquire("nxos_ssh", "9.3.8") is first
+
+    assert testbed_api.reserve_machine.call_count == 2
+    assert testbed_api.release_machine.call_count == 2
+
+
+def test_busy_lab_waits_for_a_machine(testbed_api):
+    with testbed_pool.TestbedPool(max_machines=1, poll_interval=0.01) as pool:
+        machine = pool.acquire("nxos_ssh", "9.3.8")
+        threading.Timer(0.05, pool.release, args=(machine,)).start()
+        assert pool.acquire("nxos_ssh", "9.3.8") is machine
+
+
+def test_busy_lab_times_out(testbed_api):
+    testbed_api.find_machines.side_effect = lambda vendor, model: [
+        {**machine, "status": "reserved"} for machine in machines
+    ]
+    with testbed_pool.TestbedPool(wait_timeout=0.05, poll_interval=0.01) as pool:
+        with pytest.raises(testbed_pool.TestbedError, match="within"):
+            pool.acquire("nxos_ssh", "9.3.8")
+    # polled while waiting instead of failing at once
+    assert testbed_api.find_machines.call_count > 1
+
+
+def test_unknown_model_fails_at_once(testbed_api):
+    with testbed_pool.TestbedPool() as pool:
+        with pytest.raises(testbed_pool.TestbedError):
+            pool.acquire("iosxr", "7.3.2")
+    testbed_api.reserve_machine.assert_not_called()
+
+
+def test_machine_is_reset_to_its_checkpoint_on_checkin(testbed_api):
+    with testbed_pool.TestbedPool(max_machines=1) as pool:
+        machine = pool.acquire("nxos_ssh", "9.3.8")
+        assert machine.checkpoint is testbed_api.checkpoint
+        testbed_api.checkpoint.restore.assert_not_called()
+        pool.release(machine)
+        testbed_api.checkpoint.restore.assert_called_once()
+
+        # a failed restore only drops the checkpoint
+        testbed_api.checkpoint.restore.side_effect = Exception("rollback failed")
+        pool.release(pool.acquire("nxos_ssh", "9.3.8"))
+        assert machine.checkpoint is None
+        assert not machine.at_checkpoint
+
+
+def test_precheck_merges_onto_the_checkpoint(testbed_api, monkeypatch):
+    monkeypatch.setattr(execute, "filter_config", lambda platform, lines, data: lines)
+    task = mock.Mock()
+    task.host.platform = "nxos_ssh"
+
+    with testbed_pool.TestbedPool(max_machines=1) as pool:
+        machine = pool.acquire("nxos_ssh", "9.3.8")
+        test_con = machine.napalm()
+        test_con.compare_config.return_value = "+hostname r1"
+        machine.netmiko().send_command.return_value = ""
+        execute._check_config_on_machine(task, machine, ["hostname r1"])
+        test_con.load_merge_candidate.assert_called_once_with(config="hostname r1")
+        test_con.load_replace_candidate.assert_not_called()
+
+        # without a checkpoint the machine state is unknown
+        machine.checkpoint = None
+        execute._check_config_on_machine(task, machine, ["hostname r1"])
+        test_con.load_replace_candidate.assert_called_once_with(config="hostname r1")
+        pool.release(machine)
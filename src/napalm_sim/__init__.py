@@ -0,0 +1,7 @@
+"""
+NAPALM driver ``sim``, the simulated devices of ``device_sim``
+"""
+
+from device_sim.napalm_driver import SimDriver
+
+__all__ = ["SimDriver"]
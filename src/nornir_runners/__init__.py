@@ -0,0 +1,13 @@
+from .duration_aware import DurationAwareRunner
+from .durations import DurationHistory
+from .hybrid import HybridRunner, run_cpu_bound
+from .throttled import ThrottledRunner, TokenBucket
+
+__all__ = [
+    "DurationAwareRunner",
+    "DurationHistory",
+    "HybridRunner",
+    "ThrottledRunner",
+    "TokenBucket",
+    "run_cpu_bound",
+]
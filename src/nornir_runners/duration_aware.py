@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+from .durations import DEFAULT_CFG_DIR, DEFAULT_HISTORY_FILE, DurationHistory
+
+
+class DurationAwareRunner:
+    """
+    DurationAwareRunner runs the task over each host using threads, starting
+    the hosts expected to take longest first (longest processing time first),
+    so a few slow core devices don't end up starting last and stretching the
+    wall time of the run.
+
+    Per host durations are recorded after every run. Hosts without history are
+    estimated from their platform and the size of their config in ``cfg/``.
+
+    Arguments:
+        num_workers: number of threads to use
+        history_file: JSON file the per host durations are kept in
+        cfg_dir: directory of the ``<host>.cfg`` files used for estimates
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 20,
+        history_file: str = DEFAULT_HISTORY_FILE,
+        cfg_dir: str = DEFAULT_CFG_DIR,
+    ) -> None:
+        self.num_workers = num_workers
+        self.history = DurationHistory(history_file, cfg_dir)
+
+    def schedule(self, task_name: str, hosts: List[Host]) -> List[Host]:
+        estimates = self.history.estimates(task_name, hosts)
+        # sorted() is stable, so equally expensive hosts keep inventory order
+        return sorted(hosts, key=lambda host: estimates[host.name], reverse=True)
+
+    def _timed_start(self, task: Task, host: Host) -> MultiResult:
+        started = time.monotonic()
+        try:
+            return task.start(host)
+        finally:
+            self.history.record(task.name, host.name, time.monotonic() - started)
+
+    def run(self, task: Task, hosts: List[Host]) -> AggregatedResult:
+        result = AggregatedResult(task.name)
+        futures = {}
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            for host in self.schedule(task.name, hosts):
+                futures[host.name] = pool.submit(self._timed_start, task.copy(), host)
+
+        self.history.save()
+
+        # report results in inventory order, not in scheduling order
+        for host in hosts:
+            worker_result = futures[host.name].result()
+            result[worker_result.host.name] = worker_result
+        return result
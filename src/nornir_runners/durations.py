@@ -0,0 +1,110 @@
+import json
+import os
+import statistics
+import threading
+from typing import Dict, Iterable, Optional
+
+from nornir.core.inventory import Host
+
+DEFAULT_HISTORY_FILE = ".nornir_durations.json"
+DEFAULT_CFG_DIR = "cfg"
+
+# weight of the latest run when updating a recorded duration
+SMOOTHING = 0.5
+
+
+class DurationHistory:
+    """
+    Per task and per host run durations (seconds) from previous runs, stored
+    as ``{task_name: {host_name: seconds}}`` in a JSON file.
+
+    Hosts without history are estimated from hosts of the same platform,
+    scaled by the size of their ``cfg/<host>.cfg`` file.
+    """
+
+    def __init__(
+        self, history_file: str = DEFAULT_HISTORY_FILE, cfg_dir: str = DEFAULT_CFG_DIR
+    ):
+        self.history_file = history_file
+        self.cfg_dir = cfg_dir
+        self._lock = threading.Lock()
+        self._durations: Dict[str, Dict[str, float]] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.history_file, "r") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError:
+            print(f"Ignoring unreadable duration history {self.history_file}")
+            return
+        if isinstance(data, dict):
+            self._durations = data
+
+    def save(self):
+        with self._lock:
+            tmp_file = f"{self.history_file}.tmp"
+            with open(tmp_file, "w") as f:
+                json.dump(self._durations, f, indent=2, sort_keys=True)
+            os.replace(tmp_file, self.history_file)
+
+    def get(self, task_name: str, host_name: str) -> Optional[float]:
+        return self._durations.get(task_name, {}).get(host_name)
+
+    def record(self, task_name: str, host_name: str, seconds: float):
+        with self._lock:
+            task_durations = self._durations.setdefault(task_name, {})
+            previous = task_durations.get(host_name)
+            if previous is not None:
+                seconds = SMOOTHING * seconds + (1 - SMOOTHING) * previous
+            task_durations[host_name] = round(seconds, 3)
+
+    def cfg_size(self, host_name: str) -> int:
+        try:
+            return os.path.getsize(os.path.join(self.cfg_dir, f"{host_name}.cfg"))
+        except OSError:
+            return 0
+
+    def estimates(self, task_name: str, hosts: Iterable[Host]) -> Dict[str, float]:
+        """
+        Expected duration of every host, from history when known, otherwise
+        from the seconds-per-byte of known hosts of the same platform (or of
+        all known hosts) times the host's cfg size.
+        """
+        hosts = list(hosts)
+        known = self._durations.get(task_name, {})
+
+        rates_by_platform: Dict[Optional[str], list] = {}
+        durations_by_platform: Dict[Optional[str], list] = {}
+        for host in hosts:
+            if host.name not in known:
+                continue
+            durations_by_platform.setdefault(host.platform, []).append(known[host.name])
+            size = self.cfg_size(host.name)
+            if size:
+                rates_by_platform.setdefault(host.platform, []).append(
+                    known[host.name] / size
+                )
+
+        all_rates = [rate for rates in rates_by_platform.values() for rate in rates]
+        all_durations = [d for ds in durations_by_platform.values() for d in ds]
+
+        estimates = {}
+        for host in hosts:
+            if host.name in known:
+                estimates[host.name] = known[host.name]
+                continue
+
+            size = self.cfg_size(host.name)
+            rates = rates_by_platform.get(host.platform) or all_rates
+            durations = durations_by_platform.get(host.platform) or all_durations
+            if size and rates:
+                estimates[host.name] = statistics.median(rates) * size
+            elif durations:
+                estimates[host.name] = statistics.median(durations)
+            else:
+                # nothing recorded yet, bigger configs are still slower to handle
+                estimates[host.name] = float(size)
+        return estimates
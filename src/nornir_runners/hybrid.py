@@ -0,0 +1,107 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, TypeVar
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, Task
+
+T = TypeVar("T")
+
+# process pool of the HybridRunner currently running, if any
+_cpu_pool: Optional["_LazyProcessPool"] = None
+_cpu_pool_lock = threading.Lock()
+
+
+class _LazyProcessPool:
+    """
+    Process pool that is only started on first use, so runs whose tasks never
+    offload anything don't pay for spawning worker processes.
+    """
+
+    def __init__(self, num_processes: int, start_method: str):
+        self.num_processes = num_processes
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., T], *args, **kwargs):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_processes,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                )
+        return self._executor.submit(func, *args, **kwargs)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def run_cpu_bound(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a CPU-bound function in the process pool of the active HybridRunner
+    and wait for its result, or call it inline when no HybridRunner is running.
+
+    ``func`` must be a module level function, and its arguments and return
+    value must be picklable.
+    """
+    pool = _cpu_pool
+    if pool is None:
+        return func(*args, **kwargs)
+    return pool.submit(func, *args, **kwargs).result()
+
+
+class HybridRunner:
+    """
+    HybridRunner runs the task over each host using threads, like Nornir's
+    ThreadedRunner, so device I/O overlaps. Work the tasks hand to
+    ``run_cpu_bound`` (template rendering, config filtering, diffs) is shipped
+    to a process pool instead of competing for the GIL.
+
+    Arguments:
+        num_workers: number of threads to use
+        num_processes: number of worker processes, defaults to the CPU count
+        start_method: multiprocessing start method of the worker processes
+    """
+
+    def __init__(
+        self,
+        num_workers: int = 20,
+        num_processes: Optional[int] = None,
+        start_method: str = "spawn",
+    ) -> None:
+        self.num_workers = num_workers
+        self.num_processes = num_processes or os.cpu_count() or 1
+        self.start_method = start_method
+
+    def run(self, task: Task, hosts: List[Host]) -> AggregatedResult:
+        global _cpu_pool
+
+        # a run started while another one is active shares its process pool
+        with _cpu_pool_lock:
+            owns_pool = _cpu_pool is None
+            if owns_pool:
+                _cpu_pool = _LazyProcessPool(self.num_processes, self.start_method)
+
+        try:
+            result = AggregatedResult(task.name)
+            futures = []
+            with ThreadPoolExecutor(self.num_workers) as pool:
+                for host in hosts:
+                    future = pool.submit(task.copy().start, host)
+                    futures.append(future)
+
+            for future in futures:
+                worker_result = future.result()
+                result[worker_result.host.name] = worker_result
+            return result
+        finally:
+            if owns_pool:
+                with _cpu_pool_lock:
+                    _cpu_pool.shutdown()
+                    _cpu_pool = None
@@ -0,0 +1 @@
+# This file marks the tests directory as a Python package.
@@ -0,0 +1,53 @@
+from nornir.core.inventory import Host
+
+from ..duration_aware import DurationAwareRunner
+from ..durations import DurationHistory
+
+
+def write_cfg(cfg_dir, host_name, size):
+    (cfg_dir / f"{host_name}.cfg").write_text("x" * size)
+
+
+def test_record_and_reload(tmp_path):
+    history_file = tmp_path / "durations.json"
+    history = DurationHistory(str(history_file), str(tmp_path))
+    history.record("sync", "r1", 10.0)
+    history.record("sync", "r1", 20.0)
+    history.save()
+
+    reloaded = DurationHistory(str(history_file), str(tmp_path))
+    assert reloaded.get("sync", "r1") == 15.0
+    assert reloaded.get("apply", "r1") is None
+
+
+def test_estimate_unknown_host_from_platform_and_cfg_size(tmp_path):
+    write_cfg(tmp_path, "core1", 1000)
+    write_cfg(tmp_path, "core2", 4000)
+    write_cfg(tmp_path, "edge1", 1000)
+    history = DurationHistory(str(tmp_path / "durations.json"), str(tmp_path))
+    history.record("sync", "core1", 5.0)
+    history.record("sync", "edge1", 50.0)
+
+    hosts = [
+        Host("core1", platform="nxos_ssh"),
+        Host("core2", platform="nxos_ssh"),
+        Host("edge1", platform="ios"),
+    ]
+    estimates = history.estimates("sync", hosts)
+
+    assert estimates["core1"] == 5.0
+    # same platform as core1, four times the config
+    assert estimates["core2"] == 20.0
+
+
+def test_schedule_longest_first(tmp_path):
+    runner = DurationAwareRunner(
+        history_file=str(tmp_path / "durations.json"), cfg_dir=str(tmp_path)
+    )
+    runner.history.record("sync", "small", 1.0)
+    runner.history.record("sync", "big", 30.0)
+    runner.history.record("sync", "medium", 5.0)
+
+    hosts = [Host("small"), Host("big"), Host("medium")]
+    scheduled = runner.schedule("sync", hosts)
+    assert [host.name for host in scheduled] == ["big", "medium", "small"]
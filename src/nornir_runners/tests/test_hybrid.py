@@ -0,0 +1,68 @@
+import os
+
+from nornir.core import Nornir
+from nornir.core.inventory import Host, Hosts, Inventory
+from nornir.core.task import Result, Task
+
+from .. import hybrid
+from ..hybrid import HybridRunner, run_cpu_bound
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def offload_getpid(task: Task) -> Result:
+    return Result(host=task.host, result=run_cpu_bound(os.getpid))
+
+
+def offload_failure(task: Task) -> Result:
+    return Result(host=task.host, result=run_cpu_bound(fail, task.host.name))
+
+
+def no_offload(task: Task) -> Result:
+    return Result(host=task.host, result=hybrid._cpu_pool._executor)
+
+
+def make_nornir(count=3):
+    hosts = Hosts({f"r{i}": Host(f"r{i}") for i in range(count)})
+    return Nornir(
+        inventory=Inventory(hosts=hosts),
+        runner=HybridRunner(num_workers=3, num_processes=2),
+    )
+
+
+def test_run_cpu_bound_runs_inline_without_runner():
+    assert hybrid._cpu_pool is None
+    assert run_cpu_bound(os.getpid) == os.getpid()
+
+
+def test_run_cpu_bound_uses_the_process_pool_of_the_runner():
+    result = make_nornir().run(task=offload_getpid)
+
+    assert not result.failed
+    pids = {multi_result[0].result for multi_result in result.values()}
+    assert os.getpid() not in pids
+    # the pool is shut down with the run
+    assert hybrid._cpu_pool is None
+
+
+def test_process_pool_is_started_lazily():
+    result = make_nornir().run(task=no_offload)
+    assert [multi_result[0].result for multi_result in result.values()] == [None] * 3
+
+    pool = hybrid._LazyProcessPool(1, "spawn")
+    assert pool._executor is None
+    assert pool.submit(os.getpid).result() != os.getpid()
+    assert pool._executor is not None
+    pool.shutdown()
+    assert pool._executor is None
+
+
+def test_worker_exception_reaches_the_task():
+    result = make_nornir(count=2).run(task=offload_failure)
+
+    assert result.failed
+    for host, multi_result in result.items():
+        assert isinstance(multi_result[0].exception, ValueError)
+        assert str(multi_result[0].exception) == host
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+from nornir.core import Nornir
+from nornir.core.inventory import Group, Host, Hosts, Inventory, ParentGroups
+from nornir.core.task import Result, Task
+
+from ..throttled import HostLimit, ThrottledRunner
+
+
+class ConcurrencyProbe:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.peak = {}
+
+    def task(self, task: Task) -> Result:
+        group = task.host.groups[0].name
+        with self.lock:
+            self.running[group] = self.running.get(group, 0) + 1
+            self.peak[group] = max(self.peak.get(group, 0), self.running[group])
+        time.sleep(0.02)
+        with self.lock:
+            self.running[group] -= 1
+        return Result(host=task.host)
+
+
+def test_group_concurrency_is_capped():
+    groups = {name: Group(name) for name in ("branch", "dc", "lab")}
+    hosts = Hosts(
+        {
+            f"{group}{i}": Host(f"{group}{i}", groups=ParentGroups([groups[group]]))
+            for group in groups
+            for i in range(6)
+        }
+    )
+    runner = ThrottledRunner(
+        num_workers=10,
+        limits=[
+            {
+                "key": "groups",
+                "max_concurrent": 2,
+                "values": {"lab": {"max_concurrent": 1}},
+            }
+        ],
+    )
+    probe = ConcurrencyProbe()
+
+    result = Nornir(inventory=Inventory(hosts=hosts), runner=runner).run(
+        task=probe.task
+    )
+
+    assert len(result) == 18 and not result.failed
+    assert probe.peak == {"branch": 2, "dc": 2, "lab": 1}
+
+
+@pytest.mark.parametrize(
+    "limit",
+    [
+        {"key": "site", "max_concurrent": 0},
+        {"key": "site", "max_concurrent": -1},
+        {"key": "groups", "values": {"branch": {"max_concurrent": 0}}},
+    ],
+)
+def test_limit_without_slots_is_rejected(limit):
+    with pytest.raises(ValueError, match="max_concurrent"):
+        ThrottledRunner(limits=[limit])
+    with pytest.raises(ValueError):
+        HostLimit(**limit)
@@ -0,0 +1,231 @@
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from nornir.core.inventory import Host
+from nornir.core.task import AggregatedResult, MultiResult, Task
+
+
+class TokenBucket:
+    """
+    Token bucket allowing ``rate`` starts per second with bursts of up to
+    ``burst`` starts. Not thread safe, callers hold the runner's lock.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("Token bucket rate must be positive")
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self, now: float):
+        self._refill(now)
+        self.tokens -= 1
+
+
+class _Slot:
+    """
+    Concurrency and rate limit of one value of a limit key, e.g. the hosts of
+    group ``branch`` or the hosts using TACACS server ``10.0.0.1``.
+    """
+
+    def __init__(self, max_concurrent: Optional[int], bucket: Optional[TokenBucket]):
+        self.max_concurrent = max_concurrent
+        self.bucket = bucket
+        self.in_use = 0
+
+    def wait_time(self, now: float) -> float:
+        if self.max_concurrent is not None and self.in_use >= self.max_concurrent:
+            # only a finishing host frees the slot
+            return math.inf
+        if self.bucket is not None:
+            return self.bucket.wait_time(now)
+        return 0.0
+
+    def take(self, now: float):
+        self.in_use += 1
+        if self.bucket is not None:
+            self.bucket.consume(now)
+
+    def give_back(self):
+        self.in_use -= 1
+
+
+class HostLimit:
+    """
+    Limit applied to every value of a host attribute.
+
+    ``key`` is ``groups`` (each group the host is a direct member of),
+    ``platform``, or any inventory data key. Data keys holding a list, for
+    example the TACACS servers of a site, limit each listed value.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        max_concurrent: Optional[int] = None,
+        rate: Optional[float] = None,
+        burst: int = 1,
+        values: Optional[Dict[str, dict]] = None,
+    ):
+        self.key = key
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        # per value overrides of max_concurrent/rate/burst
+        self.overrides = values or {}
+
+        # a host waiting for a slot that never frees would block the run
+        for value, options in [(None, {"max_concurrent": max_concurrent})] + list(
+            self.overrides.items()
+        ):
+            limit = options.get("max_concurrent")
+            if limit is not None and limit < 1:
+                name = key if value is None else f"{key} {value}"
+                raise ValueError(
+                    f"max_concurrent of limit {name} must be at least 1, got {limit}"
+                )
+
+    def host_values(self, host: Host) -> List[str]:
+        if self.key == "groups":
+            return [group.name for group in host.groups]
+        if self.key == "platform":
+            return [host.platform] if host.platform else []
+
+        value = host.get(self.key)
+        if value is None:
+            return []
+        if isinstance(value, (list, tuple, set)):
+            return [str(item) for item in value]
+        return [str(value)]
+
+    def new_slot(self, value: str) -> _Slot:
+        options = {
+            "max_concurrent": self.max_concurrent,
+            "rate": self.rate,
+            "burst": self.burst,
+            **self.overrides.get(value, {}),
+        }
+        bucket = None
+        if options["rate"]:
+            bucket = TokenBucket(options["rate"], options["burst"])
+        return _Slot(options["max_concurrent"], bucket)
+
+
+class ThrottledRunner:
+    """
+    ThrottledRunner runs the task over each host using threads, while keeping
+    the number of hosts running at once and the rate hosts are started at
+    under per group, per site or per data key limits, in addition to the
+    global ``num_workers``. Hosts held back by a limit don't occupy a worker,
+    so other sites keep running at full speed.
+
+    Arguments:
+        num_workers: number of threads to use
+        limits: list of limits, each with ``key`` and any of
+            ``max_concurrent``, ``rate`` (starts per second), ``burst`` and
+            ``values`` (per value overrides of the previous options)
+
+    Example::
+
+        runner:
+          plugin: throttled
+          options:
+            num_workers: 200
+            limits:
+              - key: site
+                max_concurrent: 20
+              - key: tacacs_servers
+                rate: 5
+                burst: 10
+              - key: groups
+                values:
+                  branch:
+                    max_concurrent: 4
+    """
+
+    def __init__(self, num_workers: int = 20, limits: Optional[List[dict]] = None):
+        self.num_workers = num_workers
+        self.limits = [HostLimit(**limit) for limit in (limits or [])]
+        self._slots: Dict[Tuple[str, str], _Slot] = {}
+
+    def _slot_keys(self, host: Host) -> Tuple[Tuple[str, str], ...]:
+        keys = []
+        for limit in self.limits:
+            for value in limit.host_values(host):
+                key = (limit.key, value)
+                if key not in self._slots:
+                    self._slots[key] = limit.new_slot(value)
+                keys.append(key)
+        return tuple(dict.fromkeys(keys))
+
+    def run(self, task: Task, hosts: List[Host]) -> AggregatedResult:
+        condition = threading.Condition()
+        state = {"running": 0}
+
+        # hosts sharing the same slots are interchangeable for scheduling, so
+        # each wake up only looks at the head of every queue
+        queues: Dict[Tuple[Tuple[str, str], ...], deque] = {}
+        for host in hosts:
+            queues.setdefault(self._slot_keys(host), deque()).append(host)
+
+        def start(task: Task, host: Host, slots: List[_Slot]) -> MultiResult:
+            try:
+                return task.start(host)
+            finally:
+                with condition:
+                    for slot in slots:
+                        slot.give_back()
+                    state["running"] -= 1
+                    condition.notify()
+
+        futures = {}
+        with ThreadPoolExecutor(self.num_workers) as pool:
+            with condition:
+                while queues:
+                    now = time.monotonic()
+                    next_wake = None
+                    for slot_keys in list(queues):
+                        queue = queues[slot_keys]
+                        slots = [self._slots[key] for key in slot_keys]
+                        while queue and state["running"] < self.num_workers:
+                            wait = max(
+                                (slot.wait_time(now) for slot in slots), default=0.0
+                            )
+                            if wait > 0:
+                                if wait != math.inf:
+                                    next_wake = min(next_wake or wait, wait)
+                                break
+                            host = queue.popleft()
+                            for slot in slots:
+                                slot.take(now)
+                            state["running"] += 1
+                            futures[host.name] = pool.submit(
+                                start, task.copy(), host, slots
+                            )
+                        if not queue:
+                            del queues[slot_keys]
+
+                    if queues:
+                        condition.wait(timeout=next_wake)
+
+        result = AggregatedResult(task.name)
+        for host in hosts:
+            worker_result = futures[host.name].result()
+            result[worker_result.host.name] = worker_result
+        return result
@@ -1,4 +1,13 @@
 from .napalm_apply_config_to_devices import napalm_apply_config_to_devices
 from .napalm_sync_config_from_devices import napalm_sync_config_from_devices
+from .napalm_sync_sections_from_devices import napalm_sync_sections_from_devices
+from .netmiko_bulk_push import PushReport, bulk_push, select_push_mode
 
-__all__ = ["napalm_apply_config_to_devices", "napalm_sync_config_from_devices"]
+__all__ = [
+    "napalm_apply_config_to_devices",
+    "napalm_sync_config_from_devices",
+    "napalm_sync_sections_from_devices",
+    "PushReport",
+    "bulk_push",
+    "select_push_mode",
+]
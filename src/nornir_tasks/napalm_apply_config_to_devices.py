@@ -1,9 +1,37 @@
-from typing import Optional
+import re
+import subprocess
+from typing import List, Optional, Tuple
 
 from nornir.core.task import Result, Task
 from nornir_napalm.plugins.connections import CONNECTION_NAME
 
+from config_utils import hierarchical_delta, parse_config_tree
 from infra_auto.testbed.execute import run_preconfig_check
+from nornir_runners import run_cpu_bound
+
+# platforms whose NAPALM driver merges CLI commands safely
+delta_platforms = ["ios", "nxos_ssh", "iosxr"]
+
+# lines that can't be negated/re-entered line by line
+unsafe_delta_regexes = [
+    re.compile(r"^\s*(no )?banner "),
+    re.compile(r"certificate"),
+    re.compile(r"^\s*(no )?crypto (pki|ca) "),
+    re.compile(r"^\s*(no )?(version|boot) "),
+]
+
+# ordered blocks, resent as a whole when any entry changes
+replace_block_regexes = [
+    r"^(ip|ipv4|ipv6) access-list ",
+    r"^object-group ",
+    r"^ip prefix-list ",
+    # the text lines of a banner aren't unique, nor commands
+    r"^banner ",
+]
+
+# above either limit a full replace is cheaper and safer than a merge
+max_delta_lines = 1000
+max_delta_ratio = 0.5
 
 
 def check_config_hostname(
@@ -43,9 +71,69 @@ def check_config_hostname(
     )
 
 
+def read_base_config(config_path: str, base_rev: str) -> Optional[str]:
+    """
+    Content of ``config_path`` at git revision ``base_rev``, None when the
+    file doesn't exist at that revision
+    """
+    process = subprocess.run(
+        ["git", "show", f"{base_rev}:{config_path}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        return None
+    return process.stdout
+
+
+def plan_delta(
+    platform: str, base_config: str, new_config: str
+) -> Tuple[Optional[List[str]], str]:
+    """
+    Compute the commands turning the last synced config into the new one.
+
+    Returns:
+        (commands, "") when the delta can be merged, or (None, reason) when
+        the config has to be replaced as a whole
+    """
+    if platform not in delta_platforms:
+        return None, f"delta mode isn't supported on {platform}"
+
+    new_lines = new_config.splitlines()
+    try:
+        commands = hierarchical_delta(
+            parse_config_tree(base_config.splitlines()),
+            parse_config_tree(new_lines),
+            replace_blocks=replace_block_regexes,
+        )
+    except ValueError as e:
+        return None, str(e)
+
+    for command in commands:
+        if any(regex.search(command) for regex in unsafe_delta_regexes):
+            return None, f"unsafe line in delta: {command.strip()}"
+
+    if len(commands) > max_delta_lines or len(commands) > max_delta_ratio * len(
+        new_lines
+    ):
+        return None, f"delta of {len(commands)} lines is too large"
+
+    return commands, ""
+
+
 def napalm_apply_config_to_devices(
-    task: Task, dry_run: Optional[bool] = None
+    task: Task,
+    dry_run: Optional[bool] = None,
+    mode: str = "replace",
+    base_rev: str = "HEAD^1",
 ) -> Result:
+    """
+    Apply cfg/<host>.cfg to the device.
+
+    In ``delta`` mode only the commands turning the config at ``base_rev``
+    (the last synced config) into the new one are merged, falling back to a
+    full replace when the delta is unsafe.
+    """
     diff = ""
     changed = False
     result = ""
@@ -57,11 +145,36 @@ def napalm_apply_config_to_devices(
     r = task.run(task=check_config_hostname, config_path=local_cfg_path)
     print(r.result)
 
+    delta_commands = None
+    if mode == "delta":
+        base_config = read_base_config(local_cfg_path, base_rev)
+        if base_config is None:
+            reason = f"no config at {base_rev}"
+        else:
+            with open(local_cfg_path, "r") as f:
+                new_config = f.read()
+            delta_commands, reason = run_cpu_bound(
+                plan_delta, task.host.platform, base_config, new_config
+            )
+        if delta_commands is None:
+            print(f"{task.host.name}: full replace, {reason}")
+        elif not delta_commands:
+            return Result(
+                host=task.host,
+                changed=False,
+                result=f"No config changes since {base_rev} for {task.host.name}",
+            )
+    elif mode != "replace":
+        raise ValueError(f"Unknown apply mode: {mode}")
+
     conn = task.host.get_connection(CONNECTION_NAME, task.nornir.config)
 
     try:
         conn.open()
-        conn.load_replace_candidate(filename=local_cfg_path)
+        if delta_commands is not None:
+            conn.load_merge_candidate(config="\n".join(delta_commands) + "\n")
+        else:
+            conn.load_replace_candidate(filename=local_cfg_path)
         diff = conn.compare_config()
 
         print("Diff:", diff)
@@ -69,6 +182,8 @@ def napalm_apply_config_to_devices(
         if diff:
             changed = True
             result = f"Config changes detected for {task.host.name}"
+            if delta_commands is not None:
+                result += f" (merging {len(delta_commands)} delta lines)"
         else:
             changed = False
             result = f"No config changes detected for {task.host.name}"
@@ -4,6 +4,8 @@ from typing import Optional
 from nornir.core.task import Result, Task
 from nornir_napalm.plugins.connections import CONNECTION_NAME
 
+from nornir_runners import run_cpu_bound
+
 
 def diff_cfg(old_cfg: str, new_cfg: str) -> str:
     """
@@ -53,7 +55,7 @@ def napalm_sync_config_from_devices(
     finally:
         conn.close()
 
-    diff = diff_cfg(local_cfg, cfg)
+    diff = run_cpu_bound(diff_cfg, local_cfg, cfg)
 
     if diff:
         changed = True
@@ -0,0 +1,165 @@
+import re
+from typing import Dict, List, Optional
+
+from nornir.core.task import Result, Task
+from nornir_napalm.plugins.connections import CONNECTION_NAME
+
+from config_utils import (
+    ConfigNode,
+    extract_sections,
+    parse_config_tree,
+    replace_sections,
+)
+from nornir_runners import run_cpu_bound
+
+from .napalm_sync_config_from_devices import diff_cfg
+
+# command showing only part of the running config, per platform
+section_commands = {
+    "ios": "show running-config | section {section}",
+    "nxos_ssh": "show running-config {section}",
+    "iosxr": "show running-config {section}",
+}
+
+# a rejected command: CLI errors start with '%', IOS-XR's empty section
+# ("% No such configuration item(s)") isn't one
+section_error_regex = re.compile(
+    r"^%(?!\s*No such configuration item)|Invalid input|Incomplete command"
+    r"|Ambiguous command|Authorization failed|not authorized",
+    re.IGNORECASE,
+)
+
+
+class SectionFetchError(Exception):
+    """
+    A section command was rejected by the device
+    """
+
+
+def _check_section_output(command: str, output: str):
+    for line in output.splitlines():
+        stripped = line.strip()
+        if section_error_regex.search(stripped):
+            raise SectionFetchError(f"{command}: {stripped}")
+
+
+def fetch_running_sections(
+    conn, platform: str, sections: List[str], selectors: List[str]
+) -> List[str]:
+    """
+    Fetch the parts of the running config holding ``sections`` (keywords of
+    the platform's section command) and keep the top level blocks matching
+    ``selectors``, as the device shows them
+
+    Raises:
+        SectionFetchError: when the device rejects a section command
+    """
+    if platform not in section_commands:
+        raise ValueError(f"Section fetch isn't supported on {platform}")
+
+    commands = [section_commands[platform].format(section=s) for s in sections]
+    outputs = conn.cli(commands)
+    for command in commands:
+        _check_section_output(command, outputs[command])
+
+    blocks = []
+    for command in commands:
+        block = []
+        for line in extract_sections(outputs[command].splitlines(), selectors):
+            if line[:1] not in " \t" and block:
+                blocks.append(tuple(block))
+                block = []
+            block.append(line)
+        if block:
+            blocks.append(tuple(block))
+
+    # several keywords may show the same block
+    return [line for block in dict.fromkeys(blocks) for line in block]
+
+
+def fetch_running_section_tree(
+    conn, platform: str, sections: List[str], selectors: List[str]
+) -> ConfigNode:
+    return parse_config_tree(
+        fetch_running_sections(conn, platform, sections, selectors)
+    )
+
+
+def napalm_sync_sections_from_devices(
+    task: Task,
+    sections: Dict[str, List[str]],
+    selectors: Dict[str, List[str]],
+    dry_run: Optional[bool] = False,
+) -> Result:
+    """
+    Refresh only some sections of cfg/<host>.cfg from the running config.
+
+    Arguments:
+        sections: section command keywords per platform
+        selectors: regexes of the top level lines to replace, per platform
+    """
+    platform = task.host.platform
+    if platform not in sections or platform not in selectors:
+        return Result(
+            host=task.host,
+            failed=True,
+            result=f"No sections to sync defined for {platform}",
+        )
+
+    local_cfg_path = f"cfg/{task.host.name}.cfg"
+    try:
+        with open(local_cfg_path, "r") as f:
+            local_cfg = f.read()
+    except FileNotFoundError:
+        return Result(
+            host=task.host,
+            failed=True,
+            result=f"{local_cfg_path} doesn't exist, run a full sync first",
+        )
+
+    conn = task.host.get_connection(CONNECTION_NAME, task.nornir.config)
+    try:
+        conn.open()
+        section_lines = fetch_running_sections(
+            conn, platform, sections[platform], selectors[platform]
+        )
+    except SectionFetchError as e:
+        return Result(host=task.host, failed=True, result=str(e))
+    finally:
+        conn.close()
+
+    if not section_lines and extract_sections(
+        local_cfg.splitlines(), selectors[platform]
+    ):
+        # more likely a filtered or truncated output than a device without
+        # any of the sections, a full sync confirms it
+        return Result(
+            host=task.host,
+            failed=True,
+            result=f"No section found on {task.host.name}, "
+            f"{local_cfg_path} is left untouched, run a full sync to remove them",
+        )
+
+    cfg_lines = replace_sections(
+        local_cfg.splitlines(), selectors[platform], section_lines
+    )
+    cfg = "\n".join(cfg_lines) + "\n"
+
+    diff = run_cpu_bound(diff_cfg, local_cfg, cfg)
+
+    if diff:
+        changed = True
+        result = f"Sections have changed for {task.host.name}"
+    else:
+        changed = False
+        result = f"Sections have not changed for {task.host.name}"
+
+    if task.is_dry_run(dry_run):
+        print("Dry run: No changes will be made")
+        return Result(host=task.host, changed=changed, diff=diff, result=result)
+
+    if diff:
+        with open(local_cfg_path, "w") as f:
+            f.write(cfg)
+
+    return Result(host=task.host, changed=changed, diff=diff, result=result)
@@ -0,0 +1,163 @@
+import time
+from typing import Callable, List, Optional
+
+# how the pushed config is persisted on each platform
+commit_platforms = ["iosxr"]
+save_platforms = ["ios", "nxos_ssh", "hp_comware", "hpe_comware"]
+
+# push mode per platform, platforms not listed use "bulk".
+#   bulk: stream the commands in chunks without waiting for the echo of each
+#         command, then check the config once before saving or committing it
+#   verified: netmiko's default per-command echo verification
+push_modes = {
+    "hp_comware": "verified",
+    "hpe_comware": "verified",
+}
+
+# commands per send_config_set call in bulk mode
+bulk_chunk_size = 100
+
+running_config_commands = {
+    "ios": "show running-config",
+    "nxos_ssh": "show running-config",
+}
+
+# the full candidate (running config with the uncommitted changes merged in)
+# checked from config mode before the commit
+candidate_config_commands = {
+    "iosxr": "show configuration merge",
+}
+
+
+def select_push_mode(host) -> str:
+    """
+    The ``push_mode`` inventory data of a host overrides the platform default
+    """
+    return host.get("push_mode") or push_modes.get(host.platform, "bulk")
+
+
+def missing_config_lines(
+    running_config: str,
+    commands: List[str],
+    normalize: Optional[Callable[[str], str]] = None,
+) -> List[str]:
+    """
+    Default follow-up check: every command that isn't a negation must show up
+    as a line of the running config. Lines are compared after ``normalize``,
+    e.g. to match the case a platform shows some keywords in.
+    """
+
+    def key(line: str) -> str:
+        line = " ".join(line.split())
+        return normalize(line) if normalize else line
+
+    running_lines = {key(line) for line in running_config.splitlines()}
+    return [
+        command
+        for command in commands
+        if not command.strip().startswith("no ") and key(command) not in running_lines
+    ]
+
+
+class PushReport:
+    """
+    Outcome of a config push on one host
+    """
+
+    def __init__(self, mode: str, output: str, elapsed: float, missing: List[str]):
+        self.mode = mode
+        self.output = output
+        self.elapsed = elapsed
+        # commands the follow-up check didn't find in the running or candidate
+        # config
+        self.missing = missing
+
+    @property
+    def verified(self) -> bool:
+        return not self.missing
+
+    def summary(self, command_count: int) -> str:
+        return (
+            f"Pushed {command_count} commands in {self.elapsed:.2f}s ({self.mode} mode)"
+        )
+
+
+def bulk_push(
+    netmiko_con,
+    platform: str,
+    commands: List[str],
+    mode: Optional[str] = None,
+    verify: Optional[Callable[[str, List[str]], List[str]]] = None,
+    chunk_size: int = bulk_chunk_size,
+) -> PushReport:
+    """
+    Push configuration commands with Netmiko and commit or save them.
+
+    In bulk mode the commands are sent in chunks within a single configuration
+    session with command verification relaxed, then the config is fetched once
+    and checked with ``verify`` (running config, commands) -> missing commands:
+    the candidate before the commit on commit platforms, the running config
+    before saving on the others. When commands are missing the candidate is
+    aborted or the config left unsaved. Platforms without a known config
+    command skip the follow-up check.
+    """
+    mode = mode or push_modes.get(platform, "bulk")
+    start = time.monotonic()
+    missing = []
+
+    if mode == "verified":
+        output = netmiko_con.send_config_set(commands)
+        if platform in commit_platforms:
+            netmiko_con.commit()
+        if platform in save_platforms:
+            netmiko_con.save_config()
+    elif mode == "bulk":
+        outputs = [netmiko_con.config_mode()]
+        for index in range(0, len(commands), chunk_size):
+            outputs.append(
+                netmiko_con.send_config_set(
+                    commands[index : index + chunk_size],
+                    cmd_verify=False,
+                    enter_config_mode=False,
+                    exit_config_mode=False,
+                )
+            )
+        check = verify or missing_config_lines
+
+        if platform in commit_platforms:
+            if platform in candidate_config_commands:
+                candidate_config = netmiko_con.send_command(
+                    candidate_config_commands[platform], read_timeout=120
+                )
+                missing = check(candidate_config, commands)
+            if missing:
+                # discards the candidate and leaves config mode
+                outputs.append(
+                    netmiko_con.send_config_set(
+                        ["abort"],
+                        cmd_verify=False,
+                        enter_config_mode=False,
+                        exit_config_mode=False,
+                    )
+                )
+                outputs.append("Commands missing from the candidate, not committed\n")
+            else:
+                # IOS-XR refuses to leave config mode with uncommitted changes
+                outputs.append(netmiko_con.commit())
+                outputs.append(netmiko_con.exit_config_mode())
+        else:
+            outputs.append(netmiko_con.exit_config_mode())
+            if platform in running_config_commands:
+                running_config = netmiko_con.send_command(
+                    running_config_commands[platform], read_timeout=120
+                )
+                missing = check(running_config, commands)
+            if missing:
+                outputs.append("Commands missing from the running config, not saved\n")
+            elif platform in save_platforms:
+                outputs.append(netmiko_con.save_config())
+        output = "".join(outputs)
+    else:
+        raise ValueError(f"Unknown push mode: {mode}")
+
+    return PushReport(mode, output, time.monotonic() - start, missing)
@@ -0,0 +1,121 @@
+from unittest import mock
+
+import pytest
+
+from ..netmiko_bulk_push import bulk_push, missing_config_lines
+
+
+def make_connection(running_config: str = "") -> mock.Mock:
+    netmiko_con = mock.Mock()
+    netmiko_con.config_mode.return_value = ""
+    netmiko_con.exit_config_mode.return_value = ""
+    netmiko_con.commit.return_value = ""
+    netmiko_con.save_config.return_value = ""
+    netmiko_con.send_config_set.return_value = "ok\n"
+    netmiko_con.send_command.return_value = running_config
+    return netmiko_con
+
+
+def test_bulk_mode_streams_chunks_in_one_session():
+    commands = [f"interface Loopback{i}" for i in range(250)]
+    netmiko_con = make_connection("\n".join(commands))
+
+    report = bulk_push(netmiko_con, "ios", commands, chunk_size=100)
+
+    assert report.mode == "bulk"
+    assert report.verified
+    assert netmiko_con.config_mode.call_count == 1
+    assert [len(c.args[0]) for c in netmiko_con.send_config_set.call_args_list] == [
+        100,
+        100,
+        50,
+    ]
+    for call in netmiko_con.send_config_set.call_args_list:
+        assert call.kwargs["cmd_verify"] is False
+        assert call.kwargs["enter_config_mode"] is False
+    netmiko_con.save_config.assert_called_once()
+    netmiko_con.commit.assert_not_called()
+    netmiko_con.send_command.assert_called_once()
+
+
+def test_bulk_mode_commits_iosxr_before_leaving_config_mode():
+    netmiko_con = make_connection("hostname xr-1")
+    bulk_push(netmiko_con, "iosxr", ["hostname xr-1"])
+
+    calls = [name for name, _, _ in netmiko_con.method_calls]
+    assert calls.index("send_command") < calls.index("commit")
+    assert calls.index("commit") < calls.index("exit_config_mode")
+    netmiko_con.send_command.assert_called_once_with(
+        "show configuration merge", read_timeout=120
+    )
+    netmiko_con.save_config.assert_not_called()
+
+
+def test_failed_verification_skips_save():
+    netmiko_con = make_connection("hostname rtr-1")
+    report = bulk_push(
+        netmiko_con, "ios", ["hostname rtr-1", "snmp-server contact noc"]
+    )
+
+    assert report.missing == ["snmp-server contact noc"]
+    assert "not saved" in report.output
+    calls = [name for name, _, _ in netmiko_con.method_calls]
+    assert calls.index("exit_config_mode") < calls.index("send_command")
+    netmiko_con.save_config.assert_not_called()
+
+
+def test_failed_verification_aborts_iosxr_candidate():
+    netmiko_con = make_connection("hostname xr-1")
+    report = bulk_push(netmiko_con, "iosxr", ["hostname xr-1", "logging console"])
+
+    assert report.missing == ["logging console"]
+    assert "not committed" in report.output
+    netmiko_con.commit.assert_not_called()
+    netmiko_con.save_config.assert_not_called()
+    assert netmiko_con.send_config_set.call_args_list[-1].args[0] == ["abort"]
+
+
+def test_bulk_mode_reports_missing_commands():
+    netmiko_con = make_connection("hostname rtr-1\nsnmp-server location DC1")
+    report = bulk_push(
+        netmiko_con,
+        "ios",
+        [
+            "no snmp-server location DC0",
+            "snmp-server location DC1",
+            "snmp-server contact noc",
+        ],
+    )
+    assert not report.verified
+    assert report.missing == ["snmp-server contact noc"]
+
+
+def test_verified_mode_uses_default_send_config_set():
+    netmiko_con = make_connection()
+    report = bulk_push(netmiko_con, "hp_comware", ["sysname sw-1"])
+
+    assert report.mode == "verified"
+    netmiko_con.send_config_set.assert_called_once_with(["sysname sw-1"])
+    netmiko_con.save_config.assert_called_once()
+    netmiko_con.send_command.assert_not_called()
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        bulk_push(make_connection(), "ios", ["hostname rtr-1"], mode="fast")
+
+
+def test_missing_config_lines_ignores_whitespace():
+    assert (
+        missing_config_lines(
+            "  permit ip 10.0.0.0/24  any", ["permit ip 10.0.0.0/24 any"]
+        )
+        == []
+    )
+
+
+def test_missing_config_lines_normalizes_both_sides():
+    running_config = "snmp-server community public RO snmp_acl"
+    commands = ["snmp-server community public ro snmp_acl"]
+    assert missing_config_lines(running_config, commands) == commands
+    assert missing_config_lines(running_config, commands, str.upper) == []
@@ -0,0 +1,58 @@
+from ..napalm_apply_config_to_devices import plan_delta
+
+base_config = "\n".join(
+    ["hostname rtr-1", "banner motd ^C hello ^C"]
+    + [f"interface Loopback{i}\n description loopback {i}" for i in range(20)]
+)
+
+
+def test_small_change_is_merged():
+    new_config = base_config.replace("loopback 3", "router id")
+    commands, reason = plan_delta("ios", base_config, new_config)
+    assert reason == ""
+    assert commands == [
+        "interface Loopback3",
+        " no description loopback 3",
+        " description router id",
+    ]
+
+
+def test_unsupported_platform_is_replaced():
+    commands, reason = plan_delta("hp_comware", base_config, base_config)
+    assert commands is None
+    assert "hp_comware" in reason
+
+
+def test_banner_change_is_replaced():
+    new_config = base_config.replace("hello", "welcome")
+    commands, reason = plan_delta("ios", base_config, new_config)
+    assert commands is None
+    assert "banner" in reason
+
+
+def test_large_delta_is_replaced():
+    new_config = base_config.replace("description loopback", "description lo")
+    commands, reason = plan_delta("ios", base_config, new_config)
+    assert commands is None
+    assert "too large" in reason
+
+
+def test_multi_line_banner_change_is_replaced():
+    banner = "banner motd ^C\n***\nAuthorized only\n  no access otherwise\n***\n^C"
+    config = base_config.replace("banner motd ^C hello ^C", banner)
+
+    commands, reason = plan_delta("ios", config, config)
+    assert (commands, reason) == ([], "")
+
+    new_config = config.replace("Authorized only", "Authorized users only")
+    commands, reason = plan_delta("ios", config, new_config)
+    assert commands is None
+    assert "banner" in reason
+
+
+def test_removed_negation_is_undone():
+    config = base_config + "\ninterface Ethernet1/3\n no shutdown"
+    new_config = base_config + "\ninterface Ethernet1/3\n shutdown"
+    commands, reason = plan_delta("ios", config, new_config)
+    assert reason == ""
+    assert commands == ["interface Ethernet1/3", " shutdown"]
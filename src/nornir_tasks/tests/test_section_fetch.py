@@ -0,0 +1,140 @@
+from unittest import mock
+
+import pytest
+from napalm import get_network_driver
+
+from device_sim import profiles as sim_profiles
+from device_sim.store import get_store
+
+from ..napalm_sync_sections_from_devices import (
+    SectionFetchError,
+    fetch_running_sections,
+    napalm_sync_sections_from_devices,
+)
+
+nxos_snmp_output = """!Command: show running-config snmp
+!Time: Mon Oct  5 10:00:00 2026
+
+version 9.3(8) Bios:version
+snmp-server contact netadmin@example.com
+snmp-server location DC1
+snmp-server community public group network-operator
+"""
+
+nxos_aclmgr_output = """!Command: show running-config aclmgr
+
+version 9.3(8) Bios:version
+ip access-list mgmt
+  10 permit ip any any
+ip access-list snmp_acl
+  10 permit ip 10.0.0.0/24 any
+"""
+
+selectors = [
+    r"^snmp-server (location|contact|community) ",
+    r"^ip access-list snmp_acl$",
+]
+
+
+def test_fetch_keeps_selected_blocks_of_every_command():
+    conn = mock.Mock()
+    conn.cli.return_value = {
+        "show running-config snmp": nxos_snmp_output,
+        "show running-config aclmgr": nxos_aclmgr_output,
+    }
+
+    lines = fetch_running_sections(conn, "nxos_ssh", ["snmp", "aclmgr"], selectors)
+
+    conn.cli.assert_called_once_with(
+        ["show running-config snmp", "show running-config aclmgr"]
+    )
+    assert lines == [
+        "snmp-server contact netadmin@example.com",
+        "snmp-server location DC1",
+        "snmp-server community public group network-operator",
+        "ip access-list snmp_acl",
+        "  10 permit ip 10.0.0.0/24 any",
+    ]
+
+
+def test_fetch_unsupported_platform():
+    with pytest.raises(ValueError):
+        fetch_running_sections(mock.Mock(), "hp_comware", ["snmp"], selectors)
+
+
+def test_rejected_section_command_raises():
+    conn = mock.Mock()
+    conn.cli.return_value = {
+        "show running-config snmp": nxos_snmp_output,
+        "show running-config aclmgr": "                      ^\n% Invalid command at '^' marker.\n",
+    }
+    with pytest.raises(SectionFetchError, match="aclmgr: % Invalid command"):
+        fetch_running_sections(conn, "nxos_ssh", ["snmp", "aclmgr"], selectors)
+
+    # IOS-XR shows an absent section this way
+    conn.cli.return_value = {
+        "show running-config snmp-server": "% No such configuration item(s)\n"
+    }
+    assert fetch_running_sections(conn, "iosxr", ["snmp-server"], selectors) == []
+
+
+@pytest.fixture
+def sim_task(tmp_path, monkeypatch):
+    monkeypatch.setattr(sim_profiles, "time_scale", 0)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "cfg").mkdir()
+    (tmp_path / "cfg" / "r1.cfg").write_text(
+        "hostname r1\nsnmp-server location DC1\nip access-list snmp_acl\n"
+        "  10 permit ip 10.0.0.0/24 any\n"
+    )
+    store = get_store()
+    store.add("r1", "nxos_ssh", "hostname r1\nsnmp-server location DC2\n")
+
+    task = mock.Mock()
+    task.host.name = "r1"
+    task.host.platform = "nxos_ssh"
+    task.host.get_connection.return_value = get_network_driver("sim")(
+        "r1", "admin", "admin"
+    )
+    task.is_dry_run.return_value = False
+    yield task
+    store.clear()
+
+
+def sync_sections(task):
+    return napalm_sync_sections_from_devices(
+        task, {"nxos_ssh": ["snmp", "aclmgr"]}, {"nxos_ssh": selectors}
+    )
+
+
+def test_sync_fails_without_writing_when_the_device_rejects_a_command(
+    sim_task, monkeypatch
+):
+    device = get_store().get("r1")
+    monkeypatch.setattr(
+        device, "run_command", lambda command: "% Permission denied for the role\n"
+    )
+    cfg = open("cfg/r1.cfg").read()
+
+    result = sync_sections(sim_task)
+
+    assert result.failed
+    assert "Permission denied" in result.result
+    assert open("cfg/r1.cfg").read() == cfg
+
+
+def test_sync_fails_without_writing_when_no_section_is_shown(sim_task):
+    get_store().get("r1").running = ["hostname r1"]
+    cfg = open("cfg/r1.cfg").read()
+
+    result = sync_sections(sim_task)
+
+    assert result.failed
+    assert open("cfg/r1.cfg").read() == cfg
+
+
+def test_sync_replaces_the_sections(sim_task):
+    result = sync_sections(sim_task)
+
+    assert not result.failed
+    assert open("cfg/r1.cfg").read() == "hostname r1\nsnmp-server location DC2\n"